@@ -0,0 +1,132 @@
+"""
+書目資料庫基準
+在暫存目錄以合成資料量測：逐頁寫入（每頁一個交易）的吞吐量、由進度日誌補齊資料庫、
+以查詢串流發佈列 vs 逐一串流進度日誌、Sheets 比對（SQL join vs 載入整份書單建索引）、ISBN 查詢延遲，
+以及寫入進行中另外幾個程序同時讀取時的讀取延遲
+
+用法：python scripts/benchmarks/bench_catalogue_db.py [--pages 5000] [--rows 40] [--readers 3]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bookplanet.catalogue_db import CatalogueDB  # noqa: E402
+from bookplanet.dedup import dedup_books  # noqa: E402
+from bookplanet.progress import ProgressStore  # noqa: E402
+from bookplanet.publish import iter_journal_rows  # noqa: E402
+from bookplanet.sheets import plan_isbn_updates  # noqa: E402
+
+
+def synthetic_page(page, rows, rng):
+    return [{'name': f'書名 {rng.randrange(rows * page + 1)}', 'isbn': f'978{page:05d}{position:05d}'}
+            for position in range(rows)]
+
+
+def write_journal(progress_file, pages, rows, seed=1):
+    rng = random.Random(seed)
+    store = ProgressStore(progress_file, fsync_every=1000, compact_every=0)
+    for page in range(1, pages + 1):
+        store.record_page(page, synthetic_page(page, rows, rng))
+    store.close()
+
+
+def reader(path, stop_at, latencies):
+    """寫入期間反覆查詢 ISBN 與統計，記錄每次讀取的耗時（毫秒）"""
+    catalogue = CatalogueDB(path)
+    rng = random.Random(os.getpid())
+    while time.time() < stop_at:
+        started = time.perf_counter()
+        catalogue.find_by_isbn(f'978{rng.randrange(1, 100):05d}{rng.randrange(10):05d}')
+        len(catalogue)
+        latencies.append((time.perf_counter() - started) * 1000)
+        time.sleep(0.005)
+    catalogue.close()
+
+
+def timed(label, func):
+    started = time.perf_counter()
+    result = func()
+    print(f"{label:>28} | {time.perf_counter() - started:8.3f} 秒")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='量測書目資料庫的寫入、查詢與並行讀取')
+    parser.add_argument('--pages', type=int, default=5000, help='合成頁數（預設 5000）')
+    parser.add_argument('--rows', type=int, default=40, help='每頁列數（預設 40）')
+    parser.add_argument('--readers', type=int, default=3, help='寫入期間同時讀取的程序數（預設 3）')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        progress_file = os.path.join(workdir, 'books.json')
+        path = os.path.join(workdir, 'catalogue.sqlite3')
+        print(f"📦 合成 {args.pages} 頁 × {args.rows} 列 = {args.pages * args.rows} 列")
+        timed('寫入進度日誌', lambda: write_journal(progress_file, args.pages, args.rows))
+
+        # 逐頁寫入，同時有 readers 個程序在讀
+        manager = multiprocessing.Manager()
+        latencies = manager.list()
+        catalogue = CatalogueDB(path)
+        catalogue.start_run('bench', 'sequential')
+        rng = random.Random(1)
+        pages = [synthetic_page(page, args.rows, rng) for page in range(1, args.pages + 1)]
+        readers = [multiprocessing.Process(target=reader, args=(path, time.time() + 3600, latencies))
+                   for _ in range(args.readers)]
+        for process in readers:
+            process.start()
+        started = time.perf_counter()
+        for page, rows in enumerate(pages, 1):
+            catalogue.record_page('1', page, rows)
+        elapsed = time.perf_counter() - started
+        for process in readers:
+            process.terminate()
+            process.join()
+        catalogue.finish_run()
+        print(f"{'逐頁寫入（每頁一個交易）':>28} | {elapsed:8.3f} 秒（{args.pages / elapsed:.0f} 頁/秒）")
+        if latencies:
+            samples = sorted(latencies)
+            p95 = samples[int(len(samples) * 0.95)]
+            print(f"{'寫入期間的讀取':>28} | {len(samples)} 次，中位數 {statistics.median(samples):.2f}ms，"
+                  f"p95 {p95:.2f}ms，最長 {samples[-1]:.2f}ms")
+        catalogue.close()
+
+        # 由進度日誌重建
+        os.remove(path)
+        catalogue = CatalogueDB(path)
+        timed('由進度日誌補齊（單一交易）', lambda: catalogue.sync_journal('1', progress_file))
+        timed('再次補齊（沒有變動）', lambda: catalogue.sync_journal('1', progress_file))
+
+        # 發佈用的列串流
+        timed('查詢串流所有列', lambda: sum(1 for _ in catalogue.iter_rows()))
+        timed('串流進度日誌所有列', lambda: sum(1 for _ in iter_journal_rows([progress_file])))
+
+        # Sheets 比對
+        rng = random.Random(2)
+        records = [{'書名': f'書名 {rng.randrange(args.pages * args.rows)}', 'ISBN': str(rng.randrange(10 ** 12))}
+                   for _ in range(2500)]
+        changes = timed('Sheets 比對：SQL join', lambda: catalogue.plan_isbn_updates(records))
+        expected = timed('Sheets 比對：載入書單建索引',
+                         lambda: plan_isbn_updates(records, dedup_books(ProgressStore(progress_file).load())))
+        print(f"   兩種比對結果{'一致' if changes == expected else '不一致！'}（{len(changes)} 筆差異）")
+
+        samples = []
+        for _ in range(1000):
+            isbn = f'978{rng.randrange(1, args.pages + 1):05d}{rng.randrange(args.rows):05d}'
+            started = time.perf_counter()
+            catalogue.find_by_isbn(isbn)
+            samples.append((time.perf_counter() - started) * 1000)
+        print(f"{'ISBN 查詢':>28} | 中位數 {statistics.median(samples):.3f}ms")
+        print(f"\n🗄️ 資料庫大小 {os.path.getsize(path) / 1024 / 1024:.1f}MB")
+        catalogue.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+書單載入微基準
+比較縮排 JSON（現行 books_list.json）、精簡 JSON 與欄式 books_list.bin 的檔案大小、gzip 後傳輸量與解析耗時；
+「欄式（欄位）」為 Python 工具直接使用 decode_columns、不逐列建立 dict 的情況
+
+用法：python scripts/benchmarks/bench_catalogue_load.py [放大倍數]
+放大倍數 > 1 時把書單複製成 N 倍（ISBN 加上序號避免重複），觀察大書單時的差距
+"""
+
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bookplanet.columnar import ColumnarWriter, decode_catalogue, decode_columns  # noqa: E402
+
+BOOKS_LIST = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                          'data', 'books_list.json')
+REPEAT = 20
+
+
+def scaled_books(books, factor):
+    if factor <= 1:
+        return books
+    scaled = []
+    for copy in range(factor):
+        for book in books:
+            isbn = book['ISBN'] if copy == 0 else f"{copy:03d}{book['ISBN']}"[:15]
+            scaled.append({'書名': book['書名'], '適合對象': book['適合對象'], 'ISBN': isbn})
+    return scaled
+
+
+def encode_formats(books):
+    """{格式: (原始位元組, 解析函式, 驗證用：解析結果轉成書單)}"""
+    columnar = ColumnarWriter()
+    for book in books:
+        columnar.add(book)
+    as_is = lambda result: result  # noqa: E731
+    parse_json = lambda data: json.loads(data.decode('utf-8'))  # noqa: E731
+    return {
+        '縮排 JSON': (json.dumps(books, ensure_ascii=False, indent=4).encode('utf-8'), parse_json, as_is),
+        '精簡 JSON': (json.dumps(books, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), parse_json, as_is),
+        '欄式 .bin': (columnar.to_bytes(), decode_catalogue, as_is),
+        '欄式（欄位）': (columnar.to_bytes(), decode_columns,
+                    lambda columns: [dict(zip(columns, row)) for row in zip(*columns.values())]),
+    }
+
+
+def median_seconds(func, data):
+    samples = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        func(data)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    factor = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    with open(BOOKS_LIST, 'r', encoding='utf-8-sig') as f:
+        books = scaled_books(json.load(f), factor)
+
+    formats = encode_formats(books)
+    baseline = None
+    print(f"書單 {len(books)} 本，解析耗時取 {REPEAT} 次中位數")
+    print(f"{'格式':>10} | {'原始大小':>10} | {'gzip 後':>10} | {'解析':>9} | {'gunzip+解析':>11} | {'傳輸/解析 vs 縮排':>16}")
+    print('-' * 86)
+    for label, (data, decode, as_books) in formats.items():
+        assert as_books(decode(data)) == books, label
+        compressed = gzip.compress(data, compresslevel=9)
+        parse = median_seconds(decode, data)
+        total = median_seconds(lambda blob: decode(gzip.decompress(blob)), compressed)
+        if baseline is None:
+            baseline = (len(compressed), total)
+        ratio = f'{baseline[0] / len(compressed):.1f}x / {baseline[1] / total:.1f}x'
+        print(f'{label:>10} | {len(data) / 1024:>8.1f}KB | {len(compressed) / 1024:>8.1f}KB | '
+              f'{parse * 1000:>7.2f}ms | {total * 1000:>9.2f}ms | {ratio:>16}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+爬蟲離線基準
+啟動本機 BookListTable 模擬伺服器（bookplanet.mock_server，資料來自 archive/data/progress/），
+以固定的頁面、延遲、抖動、錯誤率與模板渲染延遲分別跑各抓取後端（--json-endpoint 時模板頁的資料
+改由 JSON 端點提供，http 後端以 --json-url 的方式取用），
+報告每秒頁數、每頁耗時 p50/p95/p99 與 RSS 峰值；每個後端在獨立子程序執行，RSS 互不影響
+
+後端：
+  http           HttpBookFetcher 逐頁（isbn_continue.py --workers 1、isbn_memory_optimized.py）
+  http-pool      HttpBookFetcher + PageScheduler 並行（isbn_continue.py 預設）
+  selenium       WebDriver 池 1 個瀏覽器逐頁（--engine selenium --workers 1、isbn_selenium.py、isbn_batch.py）
+  selenium-pool  WebDriver 池 + PageScheduler 並行（--engine selenium）
+
+用法：python scripts/benchmarks/bench_crawl.py [--backends http,http-pool] [--pages 40] [--latency 0.08] ...
+      --save baseline.json 存下結果，之後以 --baseline baseline.json 比較同一組設定
+      --serve 只啟動模擬伺服器，可手動以瀏覽器或爬蟲連線
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bookplanet.metrics import RunMetrics  # noqa: E402
+from bookplanet.mock_server import MockBookListServer  # noqa: E402
+from bookplanet.retry import RetryPolicy  # noqa: E402
+from bookplanet.scheduler import PageScheduler  # noqa: E402
+
+# 後端名稱 → (抓取引擎, 是否並行)
+BACKENDS = {
+    'http': ('http', False),
+    'http-pool': ('http', True),
+    'selenium': ('selenium', False),
+    'selenium-pool': ('selenium', True),
+}
+# 影響結果的設定；--baseline 比較時兩邊不一致會提出警告
+SETTING_KEYS = ('pages', 'latency', 'jitter', 'error_rate', 'render_delay', 'json_endpoint', 'seed', 'workers', 'rate',
+                'retry_delay')
+
+
+def run_backend(name, base_url, jobs, settings, json_url=None):
+    """子程序：以指定後端抓取 jobs，回傳 RunMetrics 摘要"""
+    from bookplanet.driver_pool import DriverPool, PooledBookFetcher, create_chrome_driver
+    from bookplanet.http_fetcher import HttpBookFetcher
+
+    engine, parallel = BACKENDS[name]
+    workers = settings['workers'] if parallel else 1
+    metrics = RunMetrics(rss_interval=0.2)
+    pool = None
+    if engine == 'selenium':
+        pool = DriverPool(create_chrome_driver, size=workers, max_pages=50)
+        if not pool.prewarm():
+            return {'error': '無法啟動 Chrome'}
+        factory = lambda: PooledBookFetcher(pool, render_timeout=5, metrics=metrics, base_url=base_url)  # noqa: E731
+    else:
+        factory = lambda: HttpBookFetcher(base_url=base_url, json_url=json_url, metrics=metrics)  # noqa: E731
+
+    policy = RetryPolicy(base_delay=settings['retry_delay'], seed=settings['seed'])
+    scheduler = PageScheduler(factory, workers=workers, rate=settings['rate'], policy=policy, base_url=base_url,
+                              metrics=metrics)
+    rows = 0
+    try:
+        for _, _, page_rows, _ in scheduler.run(jobs):
+            rows += len(page_rows or ())
+    finally:
+        if pool:
+            pool.close()
+    summary = metrics.close()
+    summary['rows_fetched'] = rows
+    return summary
+
+
+def run_backend_subprocess(name, server, jobs, settings, verbose=False):
+    """在獨立子程序跑一個後端，避免前一個後端的記憶體影響 RSS 峰值"""
+    with tempfile.TemporaryDirectory() as tmp:
+        result_path = os.path.join(tmp, 'result.json')
+        command = [sys.executable, os.path.abspath(__file__), '--run-backend', name,
+                   '--base-url', server.base_url, '--jobs', json.dumps(jobs),
+                   '--settings', json.dumps(settings), '--result', result_path]
+        if server.json_endpoint:
+            command += ['--json-url', server.json_url]
+        output = None if verbose else subprocess.DEVNULL
+        subprocess.run(command, stdout=output, stderr=output)
+        if not os.path.exists(result_path):
+            return {'error': '子程序沒有產生結果（加上 --verbose 查看輸出）'}
+        with open(result_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+
+def _ms(stats, key):
+    return f"{stats[key] * 1000:>8.1f}" if stats else f"{'-':>8}"
+
+
+def print_results(results, expected_rows, baseline=None):
+    print(f"{'後端':>13} | {'成功/失敗':>9} | {'列數':>11} | {'頁/秒':>7} | {'p50(ms)':>8} | {'p95(ms)':>8} | "
+          f"{'p99(ms)':>8} | {'Python RSS':>10} | {'瀏覽器 RSS':>10} | {'頁/秒、p95 vs 基準':>18}")
+    print('-' * 136)
+    for name, summary in results.items():
+        if 'error' in summary:
+            print(f"{name:>13} | ⚠️ {summary['error']}")
+            continue
+        counters = summary['counters']
+        page = summary['stages'].get('page')
+        compare = ''
+        previous = (baseline or {}).get(name)
+        if previous and 'error' not in previous and previous.get('pages_per_second') and page:
+            previous_page = previous['stages'].get('page')
+            compare = f"{summary['pages_per_second'] / previous['pages_per_second']:.2f}x"
+            if previous_page:
+                compare += f" / {page['p95'] / previous_page['p95']:.2f}x"
+        print(f"{name:>13} | {counters.get('pages_ok', 0):>4}/{counters.get('pages_failed', 0):<4} | "
+              f"{summary['rows_fetched']:>5}/{expected_rows:<5} | {summary['pages_per_second'] or 0:>7.2f} | "
+              f"{_ms(page, 'p50')} | {_ms(page, 'p95')} | {_ms(page, 'p99')} | "
+              f"{summary['peak_python_mb']:>8.1f}MB | {summary['peak_children_mb']:>8.1f}MB | {compare:>18}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='以本機模擬伺服器量測各抓取後端')
+    parser.add_argument('--backends', default='http,http-pool,selenium,selenium-pool',
+                        help='以逗號分隔的後端（預設全部）：' + ', '.join(BACKENDS))
+    parser.add_argument('--pages', type=int, default=40, help='抓取頁數，取中文書單前 N 頁（預設 40）')
+    parser.add_argument('--latency', type=float, default=0.08, help='伺服器回應延遲秒數（預設 0.08）')
+    parser.add_argument('--jitter', type=float, default=0.04, help='延遲抖動 ± 秒數（預設 0.04）')
+    parser.add_argument('--error-rate', type=float, default=0.02, help='回 503 的比例（預設 0.02）')
+    parser.add_argument('--render-delay', type=float, default=0.3,
+                        help='前端模板延遲渲染秒數（預設 0.3；負值表示直接輸出已渲染的表格）')
+    parser.add_argument('--json-endpoint', action='store_true',
+                        help='模板頁不內嵌資料，改由 JSON 端點提供（http 後端以 --json-url 取用）')
+    parser.add_argument('--seed', type=int, default=42, help='延遲與錯誤的亂數種子（預設 42）')
+    parser.add_argument('--workers', type=int, default=4, help='並行後端的工作執行緒數（預設 4）')
+    parser.add_argument('--rate', type=float, default=0, help='全域限速，每秒頁數（預設 0 = 不限速）')
+    parser.add_argument('--retry-delay', type=float, default=0.5, help='第一次重試前的等待秒數，之後每次加倍（預設 0.5）')
+    parser.add_argument('--save', metavar='PATH', help='把結果存成基準檔')
+    parser.add_argument('--baseline', metavar='PATH', help='與先前 --save 的基準比較')
+    parser.add_argument('--serve', action='store_true', help='只啟動模擬伺服器直到 Ctrl+C')
+    parser.add_argument('--port', type=int, default=0, help='--serve 使用的連接埠（預設隨機）')
+    parser.add_argument('--verbose', action='store_true', help='顯示子程序輸出')
+    # 子程序內部使用
+    parser.add_argument('--run-backend', help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    parser.add_argument('--json-url', help=argparse.SUPPRESS)
+    parser.add_argument('--jobs', help=argparse.SUPPRESS)
+    parser.add_argument('--settings', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_backend:
+        jobs = [tuple(job) for job in json.loads(args.jobs)]
+        summary = run_backend(args.run_backend, args.base_url, jobs, json.loads(args.settings), args.json_url)
+        with open(args.result, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False)
+        return
+
+    render_delay = args.render_delay if args.render_delay >= 0 else None
+    settings = {'pages': args.pages, 'latency': args.latency, 'jitter': args.jitter, 'error_rate': args.error_rate,
+                'render_delay': render_delay, 'json_endpoint': args.json_endpoint, 'seed': args.seed,
+                'workers': args.workers, 'rate': args.rate, 'retry_delay': args.retry_delay}
+    server = MockBookListServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                render_delay=render_delay, seed=args.seed, port=args.port,
+                                json_endpoint=args.json_endpoint)
+
+    if args.serve:
+        with server:
+            print(f"🧪 模擬伺服器：{server.base_url}?BookType=6&PlanetLanguage=1&BookSort=1&page=1（Ctrl+C 結束）")
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                pass
+        return
+
+    backends = [name.strip() for name in args.backends.split(',') if name.strip()]
+    unknown = [name for name in backends if name not in BACKENDS]
+    if unknown:
+        parser.error(f"未知的後端：{', '.join(unknown)}")
+
+    jobs = sorted(page for page in server.pages if page[0] == '1')[:args.pages]
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        differs = [key for key in SETTING_KEYS if saved['settings'].get(key) != settings[key]]
+        if differs:
+            print(f"⚠️ 基準的設定不同（{', '.join(differs)}），比較結果僅供參考")
+        baseline = saved['results']
+
+    results = {}
+    with server:
+        rendering = '無' if render_delay is None else f"{render_delay} 秒{'（JSON 端點）' if args.json_endpoint else ''}"
+        print(f"🧪 模擬伺服器 {server.base_url}：{len(jobs)} 頁，延遲 {args.latency}±{args.jitter} 秒，"
+              f"錯誤率 {args.error_rate:.0%}，模板渲染 {rendering}")
+        for name in backends:
+            print(f"   ▶️ {name} ...")
+            results[name] = run_backend_subprocess(name, server, jobs, settings, args.verbose)
+        stats = dict(server.stats)
+
+    print()
+    print_results(results, server.expected_rows(jobs), baseline)
+    print(f"\n伺服器：{stats['requests']} 個請求，注入 {stats['errors']} 個錯誤，傳送 {stats['bytes'] / 1024:.0f}KB")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'settings': settings, 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"📄 已存下基準：{args.save}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+去重效能微基準
+比較舊的 any() 線性掃描與 BookIndex 雜湊索引在 2.5k 與 100k 本書時的耗時
+
+用法：python scripts/benchmarks/bench_dedup.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bookplanet.dedup import BookIndex  # noqa: E402
+
+# 100k 本時完整跑線性掃描要數小時，只量測最後 SAMPLE 筆再外推
+SAMPLE = 200
+
+
+def synthetic_rows(count, duplicate_ratio=0.5, seed=42):
+    """產生含重複列的爬蟲結果（實際進度檔約有一半重複）"""
+    rng = random.Random(seed)
+    unique = [{'name': f'書名{i:06d}', 'isbn': f'978{i:010d}'} for i in range(count)]
+    rows = list(unique)
+    rows.extend(rng.choice(unique) for _ in range(int(count * duplicate_ratio)))
+    rng.shuffle(rows)
+    return rows
+
+
+def linear_dedup(rows):
+    books = []
+    for row in rows:
+        name, isbn = row['name'], row['isbn']
+        if not any(book['name'] == name and book['isbn'] == isbn for book in books):
+            books.append({'name': name, 'isbn': isbn})
+    return books
+
+
+def indexed_dedup(rows):
+    books = []
+    index = BookIndex()
+    for row in rows:
+        if index.add(row['name'], row['isbn']):
+            books.append({'name': row['name'], 'isbn': row['isbn']})
+    return books
+
+
+def estimate_linear(rows):
+    """先用索引建好前 n-SAMPLE 筆，只對最後 SAMPLE 筆做線性掃描，依 O(n²) 外推總耗時"""
+    head, tail = rows[:-SAMPLE], rows[-SAMPLE:]
+    books = indexed_dedup(head)
+    started = time.perf_counter()
+    for row in tail:
+        name, isbn = row['name'], row['isbn']
+        if not any(book['name'] == name and book['isbn'] == isbn for book in books):
+            books.append({'name': name, 'isbn': isbn})
+    per_row = (time.perf_counter() - started) / SAMPLE
+    # 每筆的掃描長度從 0 線性成長到 len(books)，平均約為最後一段的一半
+    return per_row * len(rows) / 2
+
+
+def timed(func, rows):
+    started = time.perf_counter()
+    result = func(rows)
+    return time.perf_counter() - started, result
+
+
+def main():
+    print(f"{'書籍數':>8} | {'列數':>8} | {'any() 線性':>14} | {'BookIndex':>10} | {'加速':>8}")
+    print('-' * 62)
+    for count in (2_500, 100_000):
+        rows = synthetic_rows(count)
+        index_seconds, indexed = timed(indexed_dedup, rows)
+
+        if count <= 10_000:
+            linear_seconds, linear = timed(linear_dedup, rows)
+            assert linear == indexed
+            linear_label = f'{linear_seconds:.3f}s'
+        else:
+            linear_seconds = estimate_linear(rows)
+            linear_label = f'~{linear_seconds:.0f}s (估計)'
+
+        speedup = linear_seconds / index_seconds if index_seconds else float('inf')
+        print(f'{count:>8} | {len(rows):>8} | {linear_label:>14} | {index_seconds:>9.3f}s | {speedup:>7.0f}x')
+
+
+if __name__ == '__main__':
+    main()
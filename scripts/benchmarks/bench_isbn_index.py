@@ -0,0 +1,140 @@
+"""
+掃描端 ISBN 比對微基準
+以 data/books_list.json 重播條碼候選碼，比較前端原本的 Array.find 線性比對與預先建立的查詢索引；
+線性比對找得到的掃描兩者結果應完全相同，索引只多了以 ISBN-10/13 別名找到的書
+
+用法：python scripts/benchmarks/bench_isbn_index.py [掃描次數]
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bookplanet.isbn import ean13_check_digit, isbn13_to_10  # noqa: E402
+from bookplanet.lookup_index import build_lookup_index, match_candidates  # noqa: E402
+
+BOOKS_LIST = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                          'data', 'books_list.json')
+
+_NON_DIGITS = re.compile(r'\D')
+
+
+def barcode_candidates(raw_code):
+    """index.html advancedBarcodeProcessor 的移植（保留候選碼順序）"""
+    cleaned = _NON_DIGITS.sub('', raw_code)
+    if not cleaned:
+        return []
+    results = {cleaned: None}
+    length = len(cleaned)
+    if length == 18:
+        results[cleaned[:13]] = None
+    if length == 15:
+        results[cleaned[:10]] = None
+    if length > 13:
+        results[cleaned[:13]] = None
+    if length > 10:
+        results[cleaned[:10]] = None
+    if length > 8:
+        results[cleaned[:-1]] = None
+    if length >= 10:
+        for i in range(length - 9):
+            slice13 = cleaned[i:i + 13]
+            slice10 = cleaned[i:i + 10]
+            if len(slice13) == 13:
+                results[slice13] = None
+            if len(slice10) == 10:
+                results[slice10] = None
+    return [code for code in results if len(code) >= 8]
+
+
+def linear_match(books, raw_code):
+    """index.html intelligentBookMatch 原本的線性比對；回傳列號或 None"""
+    for candidate in barcode_candidates(raw_code):
+        for row, book in enumerate(books):
+            if not book.get('ISBN'):
+                continue
+            normalized = _NON_DIGITS.sub('', book['ISBN'])
+            if normalized == candidate:
+                return row
+            if len(normalized) == len(candidate) and normalized[:-1] == candidate[:-1]:
+                return row
+            if candidate in normalized or normalized in candidate:
+                if abs(len(normalized) - len(candidate)) <= 2:
+                    return row
+    return None
+
+
+def indexed_match(index, raw_code):
+    return match_candidates(index, barcode_candidates(raw_code))[0]
+
+
+def replay_scans(books, count, seed=42):
+    """模擬掃描：書單內的 EAN-13、附加碼、檢查碼誤讀、ISBN-10，以及不在書單中的書"""
+    rng = random.Random(seed)
+    isbns = [_NON_DIGITS.sub('', book['ISBN']) for book in books if book.get('ISBN')]
+    isbn13s = [isbn for isbn in isbns if len(isbn) == 13]
+    scans = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.5:
+            scans.append(('書單內', rng.choice(isbns)))
+        elif kind < 0.6:
+            scans.append(('附加碼', rng.choice(isbn13s) + f'{rng.randrange(100000):05d}'))
+        elif kind < 0.7:
+            isbn = rng.choice(isbn13s)
+            scans.append(('檢查碼誤讀', isbn[:-1] + str((int(isbn[-1]) + 1) % 10)))
+        elif kind < 0.75:
+            isbn10 = isbn13_to_10(rng.choice(isbn13s)) or ''
+            scans.append(('ISBN-10', isbn10))
+        else:
+            body = f'978{rng.randrange(10 ** 9):09d}'
+            scans.append(('不在書單', body + ean13_check_digit(body)))
+    return scans
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with open(BOOKS_LIST, 'r', encoding='utf-8-sig') as f:
+        books = json.load(f)
+    scans = replay_scans(books, count)
+
+    started = time.perf_counter()
+    index = build_lookup_index(book.get('ISBN', '') for book in books)
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    linear = [linear_match(books, code) for _, code in scans]
+    linear_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    indexed = [indexed_match(index, code) for _, code in scans]
+    indexed_seconds = time.perf_counter() - started
+
+    print(f"書單 {len(books)} 本，重播 {len(scans)} 次掃描（建立索引 {build_seconds * 1000:.1f} ms）")
+    print(f"{'方式':>10} | {'總耗時':>10} | {'每次掃描':>12}")
+    print('-' * 40)
+    for label, seconds in (('線性比對', linear_seconds), ('查詢索引', indexed_seconds)):
+        print(f'{label:>10} | {seconds:>9.3f}s | {seconds / len(scans) * 1e6:>9.1f} µs')
+    speedup = linear_seconds / indexed_seconds if indexed_seconds else float('inf')
+    print(f'加速 {speedup:.0f}x')
+
+    print(f"\n{'掃描類型':>10} | {'次數':>6} | {'線性找到':>8} | {'索引找到':>8} | {'改變原結果':>8}")
+    print('-' * 56)
+    kinds = {}
+    for (kind, _), old, new in zip(scans, linear, indexed):
+        stats = kinds.setdefault(kind, [0, 0, 0, 0])
+        stats[0] += 1
+        stats[1] += old is not None
+        stats[2] += new is not None
+        stats[3] += old is not None and old != new
+    for kind, (total, old_found, new_found, different) in kinds.items():
+        print(f'{kind:>10} | {total:>6} | {old_found:>8} | {new_found:>8} | {different:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+命令列冷啟動基準
+以全新的 Python 子程序量測 python -m bookplanet 各子命令從啟動到開始工作前（匯入、參數解析、
+建立抓取器所需的模組）的耗時，並列出載入了哪些重量級相依（selenium、gspread、oauth2client、requests）；
+各情境不連網、不讀憑證，也不抓取任何頁面
+
+用法：python scripts/benchmarks/bench_startup.py [--runs 7]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('selenium', 'gspread', 'oauth2client', 'requests')
+
+# 情境名稱 → (子命令參數, 開始工作前還會載入的模組)
+SCENARIOS = {
+    'crawl (http)': (['crawl'], 'from bookplanet.crawl import create_fetcher; create_fetcher("http").close()'),
+    'crawl (selenium)': (['crawl', '--engine', 'selenium'], 'import bookplanet.driver_pool'),
+    'merge': (['merge'], ''),
+    'publish': (['publish'], ''),
+    'sync-sheet': (['sync-sheet'], 'import bookplanet.sheets'),
+}
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+from bookplanet.cli import build_parser
+build_parser().parse_args(sys.argv[1:])
+%s
+elapsed = time.perf_counter() - started
+heavy = [name for name in %r if name in sys.modules]
+print(json.dumps({'in_process_ms': elapsed * 1000, 'heavy': heavy}))
+"""
+
+
+def run_once(argv, extra):
+    command = [sys.executable, '-c', CHILD % (extra, HEAVY_MODULES)] + argv
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=SCRIPTS_DIR, capture_output=True, text=True)
+    wall = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        return {'error': result.stderr.strip().splitlines()[-1] if result.stderr.strip() else '子程序失敗'}
+    return dict(json.loads(result.stdout.strip().splitlines()[-1]), wall_ms=wall)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='量測 python -m bookplanet 各子命令的冷啟動時間')
+    parser.add_argument('--runs', type=int, default=7, help='每個情境執行次數，取中位數（預設 7）')
+    args = parser.parse_args()
+
+    print(f"{'情境':>16} | {'整體(ms)':>9} | {'程序內(ms)':>10} | 載入的重量級相依")
+    print('-' * 72)
+    started = time.perf_counter()
+    for _ in range(args.runs):
+        subprocess.run([sys.executable, '-c', 'pass'])
+    python_ms = (time.perf_counter() - started) * 1000 / args.runs
+    for name, (argv, extra) in SCENARIOS.items():
+        results = [run_once(argv, extra) for _ in range(args.runs)]
+        failed = [result for result in results if 'error' in result]
+        if failed:
+            print(f"{name:>16} | ⚠️ {failed[0]['error']}")
+            continue
+        wall = statistics.median(result['wall_ms'] for result in results)
+        in_process = statistics.median(result['in_process_ms'] for result in results)
+        heavy = ', '.join(results[0]['heavy']) or '無'
+        print(f"{name:>16} | {wall:>9.0f} | {in_process:>10.0f} | {heavy}")
+    print(f"\n（空的 Python 直譯器啟動平均 {python_ms:.0f}ms，已包含在「整體」中）")
+
+
+if __name__ == '__main__':
+    main()
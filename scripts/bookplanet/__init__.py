@@ -0,0 +1,11 @@
+"""
+布可星球書單爬蟲共用模組
+由 scripts/ 底下的爬蟲程式共用（抓取引擎等）
+"""
+
+BOOK_LIST_URL = 'https://read.tn.edu.tw/Book/BookListTable'
+
+
+def build_page_url(lang_code, page, base_url=BOOK_LIST_URL):
+    """組出書單列表頁網址"""
+    return f'{base_url}?BookType=6&PlanetLanguage={lang_code}&BookSort=1&page={page}'
@@ -0,0 +1,7 @@
+"""python -m bookplanet：見 bookplanet.cli"""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,292 @@
+"""
+瀏覽器程序登記與孤兒回收
+爬蟲每啟動一個 chromedriver 就在 ~/.cache/bookplanet/browsers/ 寫一個登記檔（chromedriver 與 Chrome 的 PID、
+程序群組、啟動它的爬蟲 PID），正常關閉時刪除。啟動者已結束但登記檔還在的就是孤兒：
+回收時只掃描一次程序表，依程序群組（Linux/macOS 上 chromedriver 以新 session 啟動，Chrome 的所有子程序都在同一群組，
+即使被重新掛到 init 底下也找得到）整組終止，並回報釋放的 RSS；不再依程序名稱或命令列關鍵字猜測
+"""
+
+import json
+import os
+import signal
+import threading
+import time
+
+import psutil
+
+from .metrics import NULL_METRICS
+
+REGISTRY_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'bookplanet', 'browsers')
+# 傳給 selenium Service：chromedriver 以新 session 啟動，自成一個程序群組（Windows 上沒有程序群組，改為逐棵程序樹終止）
+SERVICE_OPTIONS = {'popen_kw': {'start_new_session': True}} if os.name == 'posix' else {}
+
+
+def _create_time(pid):
+    try:
+        return psutil.Process(pid).create_time()
+    except psutil.Error:
+        return None
+
+
+def _getpgid(pid):
+    if not hasattr(os, 'getpgid'):
+        return None
+    try:
+        return os.getpgid(pid)
+    except OSError:
+        return None
+
+
+def _entry_path(registry_dir, driver_pid):
+    return os.path.join(registry_dir, f'{driver_pid}.json')
+
+
+def _driver_pid(driver):
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+def register_browser(driver, registry_dir=REGISTRY_DIR):
+    """登記 driver 的 chromedriver 與 Chrome 程序；無法取得 PID 時回傳 None"""
+    driver_pid = _driver_pid(driver)
+    if driver_pid is None:
+        return None
+    try:
+        browser_pids = [child.pid for child in psutil.Process(driver_pid).children()]
+    except psutil.Error:
+        browser_pids = []
+    pgid = _getpgid(driver_pid)
+    if pgid is not None and pgid == _getpgid(os.getpid()):
+        pgid = None  # 與爬蟲同一群組時不能整組終止
+    owner_pid = os.getpid()
+    entry = {
+        'driver_pid': driver_pid,
+        'driver_started': _create_time(driver_pid),
+        'browser_pids': browser_pids,
+        'pgid': pgid,
+        'owner_pid': owner_pid,
+        'owner_started': _create_time(owner_pid),
+        'registered': time.time(),
+    }
+    try:
+        os.makedirs(registry_dir, exist_ok=True)
+        temp_path = _entry_path(registry_dir, driver_pid) + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(temp_path, _entry_path(registry_dir, driver_pid))
+    except OSError as e:
+        print(f"警告：無法登記瀏覽器程序: {e}")
+    return entry
+
+
+def release_browser(driver, force=False, registry_dir=REGISTRY_DIR, timeout=5.0):
+    """driver.quit() 之後呼叫以刪除登記；force 時（quit 失敗）連同殘留的程序一併終止，回傳釋放的 RSS（MB）"""
+    driver_pid = _driver_pid(driver)
+    if driver_pid is None:
+        return 0.0
+    path = _entry_path(registry_dir, driver_pid)
+    reclaimed = 0.0
+    if force:
+        entry = _read_entry(path)
+        if entry is not None:
+            members = browser_processes(entry, scan_processes())
+            reclaimed = sum(members.values())
+            kill_browser(entry, members, timeout)
+    _remove(path)
+    return reclaimed
+
+
+def _read_entry(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def registered_browsers(registry_dir=REGISTRY_DIR):
+    """所有登記中的瀏覽器（損毀的登記檔直接刪除）"""
+    try:
+        names = os.listdir(registry_dir)
+    except OSError:
+        return []
+    entries = []
+    for name in names:
+        if not name.endswith('.json'):
+            continue
+        path = os.path.join(registry_dir, name)
+        entry = _read_entry(path)
+        if entry is None:
+            _remove(path)
+            continue
+        entry['path'] = path
+        entries.append(entry)
+    return entries
+
+
+def is_orphan(entry):
+    """啟動這個瀏覽器的爬蟲程序已結束（PID 不存在或已被其他程序重複使用）"""
+    started = _create_time(entry['owner_pid'])
+    return started is None or (entry.get('owner_started') is not None and
+                               abs(started - entry['owner_started']) > 1)
+
+
+def scan_processes():
+    """一次掃描程序表：PID → {'ppid', 'pgid', 'rss_mb', 'started'}"""
+    processes = {}
+    for proc in psutil.process_iter(['pid', 'ppid', 'memory_info', 'create_time']):
+        info = proc.info
+        if info['memory_info'] is None:
+            continue
+        processes[info['pid']] = {
+            'ppid': info['ppid'],
+            'pgid': _getpgid(info['pid']),
+            'rss_mb': info['memory_info'].rss / 1024 / 1024,
+            'started': info['create_time'],
+        }
+    return processes
+
+
+def browser_processes(entry, processes):
+    """登記的瀏覽器目前還在的程序：PID → RSS（MB）；程序群組的成員加上登記 PID 的子孫"""
+    def same_driver(info):
+        # chromedriver 的 PID 可能已被其他程序重複使用，比對啟動時間
+        return entry.get('driver_started') is not None and abs(info['started'] - entry['driver_started']) <= 1
+
+    members = set()
+    pgid = entry.get('pgid')
+    leader = processes.get(pgid) if pgid is not None else None
+    # 群組還有成員時 PGID 不會被重複使用；只有群組長換成別的程序才表示群組已經不是原來那一組
+    if pgid is not None and (leader is None or same_driver(leader)):
+        members.update(pid for pid, info in processes.items() if info['pgid'] == pgid)
+    roots = list(entry.get('browser_pids') or [])
+    driver = processes.get(entry['driver_pid'])
+    if driver and same_driver(driver):
+        roots.append(entry['driver_pid'])
+    children = {}
+    for pid, info in processes.items():
+        children.setdefault(info['ppid'], []).append(pid)
+    seen = set()
+    stack = [pid for pid in roots if pid in processes]
+    while stack:
+        pid = stack.pop()
+        if pid in seen:
+            continue
+        seen.add(pid)
+        stack.extend(children.get(pid, ()))
+    members |= seen
+    members.discard(os.getpid())
+    return {pid: processes[pid]['rss_mb'] for pid in members}
+
+
+def kill_browser(entry, members, timeout=5.0):
+    """先 SIGTERM 整個程序群組（或逐一 terminate），timeout 秒後仍在的強制結束"""
+    procs = []
+    for pid in members:
+        try:
+            procs.append(psutil.Process(pid))
+        except psutil.Error:
+            continue
+    if not procs:
+        return
+    if entry.get('pgid') is not None and hasattr(os, 'killpg'):
+        try:
+            os.killpg(entry['pgid'], signal.SIGTERM)
+        except OSError:
+            pass
+    for proc in procs:
+        try:
+            proc.terminate()
+        except psutil.Error:
+            continue
+    _, alive = psutil.wait_procs(procs, timeout=timeout)
+    for proc in alive:
+        try:
+            proc.kill()
+        except psutil.Error:
+            continue
+    psutil.wait_procs(alive, timeout=timeout)
+
+
+def reap_orphans(registry_dir=REGISTRY_DIR, include_live=False, dry_run=False, timeout=5.0):
+    """
+    回收孤兒瀏覽器，回傳 {'browsers', 'processes', 'reclaimed_mb'}
+    include_live 時連同爬蟲仍在執行的瀏覽器一起終止；dry_run 只列出不終止
+    沒有任何登記時不掃描程序表
+    """
+    result = {'browsers': 0, 'processes': 0, 'reclaimed_mb': 0.0}
+    entries = registered_browsers(registry_dir)
+    if not include_live:
+        entries = [entry for entry in entries if is_orphan(entry)]
+    if not entries:
+        return result
+
+    processes = scan_processes()
+    for entry in entries:
+        members = browser_processes(entry, processes)
+        if not members:
+            if not dry_run:
+                _remove(entry['path'])  # 程序都已結束，只剩登記檔
+            continue
+        rss = sum(members.values())
+        owner = '仍在執行' if not is_orphan(entry) else '已結束'
+        print(f"🧹 {'發現' if dry_run else '回收'}孤兒瀏覽器：chromedriver PID {entry['driver_pid']}"
+              f"（爬蟲 PID {entry['owner_pid']} {owner}），{len(members)} 個程序，{rss:.0f}MB")
+        result['browsers'] += 1
+        result['processes'] += len(members)
+        result['reclaimed_mb'] += rss
+        if not dry_run:
+            kill_browser(entry, members, timeout)
+            _remove(entry['path'])
+    return result
+
+
+class ReaperWatchdog:
+    """爬蟲執行期間每 interval 秒回收一次孤兒瀏覽器（例如異常結束的工作程序留下的 Chrome）"""
+
+    def __init__(self, interval=60.0, registry_dir=REGISTRY_DIR, metrics=None):
+        self.interval = interval
+        self.registry_dir = registry_dir
+        self.metrics = metrics or NULL_METRICS
+        self.reclaimed_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def start(self):
+        if self.interval and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='browser-reaper', daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                result = reap_orphans(self.registry_dir)
+            except Exception as e:
+                print(f"警告：回收孤兒瀏覽器時發生錯誤: {e}")
+                continue
+            if result['browsers']:
+                self.reclaimed_mb += result['reclaimed_mb']
+                self.metrics.count('reaper.browsers', result['browsers'])
+                print(f"   🧹 已回收 {result['browsers']} 個孤兒瀏覽器，釋放 {result['reclaimed_mb']:.0f}MB")
@@ -0,0 +1,293 @@
+"""
+SQLite 書目資料庫（WAL 模式）
+書籍、頁面與抓取執行紀錄集中在 ../進度檔案/catalogue.sqlite3：books 依 ISBN、書名與 (語言, 頁碼) 建索引，
+pages 記錄每頁的抓取狀態，crawl_runs 記錄每次執行。爬蟲每抓完一頁以一個交易整批寫入該頁所有列，
+執行結束時再由進度日誌補上分片、增量與重試等路徑寫入的頁面；
+發佈書單與 Sheets 比對改用查詢，不必載入整份 JSON，抓取寫入時其他程序也能同時讀取。
+進度日誌仍是續傳的依據，資料庫隨時可以由日誌重建
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from .isbn import normalize_isbn
+from .progress import ProgressStore
+
+CATALOGUE_DB = '../進度檔案/catalogue.sqlite3'
+
+# books 與 pages 以主鍵 (lang, page, ...) 排序存放，依頁碼串流與刪除整頁都不必另建索引；
+# books_name 的索引項目包含主鍵，同名時取第一筆可直接由索引完成
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    finished REAL,
+    engine TEXT,
+    mode TEXT,
+    pages_ok INTEGER NOT NULL DEFAULT 0,
+    pages_failed INTEGER NOT NULL DEFAULT 0,
+    row_count INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'running'
+);
+CREATE TABLE IF NOT EXISTS pages (
+    lang TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    ok INTEGER NOT NULL,
+    row_count INTEGER NOT NULL,
+    error TEXT,
+    fetched REAL NOT NULL,
+    run_id INTEGER,
+    PRIMARY KEY (lang, page)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS books (
+    lang TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    isbn TEXT NOT NULL,
+    isbn_raw TEXT,
+    PRIMARY KEY (lang, page, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS books_isbn ON books (isbn);
+CREATE INDEX IF NOT EXISTS books_name ON books (name);
+"""
+
+_UPSERT_PAGE = """
+INSERT INTO pages (lang, page, ok, row_count, error, fetched, run_id) VALUES (?, ?, 1, ?, NULL, ?, ?)
+ON CONFLICT (lang, page) DO UPDATE SET
+    ok = 1, row_count = excluded.row_count, error = NULL, fetched = excluded.fetched, run_id = excluded.run_id
+"""
+
+# 已成功的頁面不會被之後的失敗紀錄覆蓋（與進度日誌相同），原有的列也保留
+_UPSERT_FAILURE = """
+INSERT INTO pages (lang, page, ok, row_count, error, fetched, run_id) VALUES (?, ?, 0, 0, ?, ?, ?)
+ON CONFLICT (lang, page) DO UPDATE SET
+    error = excluded.error, fetched = excluded.fetched, run_id = excluded.run_id
+WHERE NOT pages.ok
+"""
+
+# 每個書名取 (語言, 頁碼, 列) 最前面的一筆，與 sheets.index_books_by_name 的同名規則相同
+_SHEET_DIFF = """
+SELECT row, name, isbn, new_isbn FROM (
+    SELECT s.row, s.name, s.isbn,
+           (SELECT b.isbn FROM books AS b WHERE b.name = s.name
+            ORDER BY b.lang, b.page, b.position LIMIT 1) AS new_isbn
+    FROM temp.sheet_rows AS s
+)
+WHERE new_isbn IS NOT NULL AND new_isbn != isbn
+ORDER BY row
+"""
+
+
+def _connect(path, timeout):
+    # isolation_level=None：自行以 BEGIN 控制交易；讀取語句在自動提交模式下各自看到一致的快照
+    conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+    conn.execute(f'PRAGMA busy_timeout = {int(timeout * 1000)}')
+    return conn
+
+
+class CatalogueDB:
+    """
+    書目資料庫；寫入由同一個連線以鎖串接（抓取的工作執行緒可共用），
+    串流讀取另開唯讀連線，不會卡住寫入。start_run 之後寫入的頁面都記在該次執行底下
+    """
+
+    def __init__(self, path=CATALOGUE_DB, timeout=30.0):
+        self.path = path
+        self.timeout = timeout
+        self.run_id = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = _connect(path, timeout)
+        # WAL：寫入時其他程序仍可讀取；synchronous=NORMAL 在 WAL 下只有斷電才可能遺失最後幾個交易，
+        # 而資料庫本來就能由進度日誌補回
+        self._conn.execute('PRAGMA journal_mode = WAL')
+        self._conn.execute('PRAGMA synchronous = NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @contextmanager
+    def transaction(self):
+        """寫入交易；BEGIN IMMEDIATE 一開始就取得寫入鎖，其他寫入者在 busy_timeout 內等待"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    # --- 執行紀錄 ---
+
+    def start_run(self, engine=None, mode=None):
+        with self.transaction() as conn:
+            cursor = conn.execute('INSERT INTO crawl_runs (started, engine, mode) VALUES (?, ?, ?)',
+                                  (time.time(), engine, mode))
+        self.run_id = cursor.lastrowid
+        return self.run_id
+
+    def finish_run(self, status='done'):
+        if self.run_id is None:
+            return
+        with self.transaction() as conn:
+            conn.execute('UPDATE crawl_runs SET finished = ?, status = ? WHERE id = ?',
+                         (time.time(), status, self.run_id))
+        self.run_id = None
+
+    def _count_run(self, conn, ok, rows):
+        if self.run_id is None:
+            return
+        if ok:
+            conn.execute('UPDATE crawl_runs SET pages_ok = pages_ok + 1, row_count = row_count + ? WHERE id = ?',
+                         (rows, self.run_id))
+        else:
+            conn.execute('UPDATE crawl_runs SET pages_failed = pages_failed + 1 WHERE id = ?', (self.run_id,))
+
+    # --- 寫入 ---
+
+    def _write_page(self, conn, lang, page, rows, fetched):
+        conn.execute('DELETE FROM books WHERE lang = ? AND page = ?', (lang, page))
+        conn.executemany(
+            'INSERT INTO books (lang, page, position, name, isbn, isbn_raw) VALUES (?, ?, ?, ?, ?, ?)',
+            [(lang, page, position, str(row['name']).strip(), row['isbn'], row.get('isbn_raw'))
+             for position, row in enumerate(rows)]
+        )
+        conn.execute(_UPSERT_PAGE, (lang, page, len(rows), fetched, self.run_id))
+
+    def record_page(self, lang, page, rows):
+        """以一個交易取代該頁所有列（整頁重抓時舊列一併刪除）"""
+        with self.transaction() as conn:
+            self._write_page(conn, lang, page, rows, time.time())
+            self._count_run(conn, True, len(rows))
+
+    def record_failure(self, lang, page, error):
+        with self.transaction() as conn:
+            conn.execute(_UPSERT_FAILURE, (lang, page, str(error), time.time(), self.run_id))
+            self._count_run(conn, False, 0)
+
+    def sync_journal(self, lang, progress_file, start_page=1):
+        """由進度日誌補上資料庫中沒有或比日誌舊的頁面，整個批次一個交易，回傳更新的頁數"""
+        entries = ProgressStore(progress_file).entries()
+        updated = 0
+        with self.transaction() as conn:
+            if all(page is not None for page, _ in entries):
+                # 日誌已改為逐頁紀錄（或沒有舊版進度）：移除先前由舊版進度匯入的資料，避免過期的書排在最前面
+                conn.execute('DELETE FROM books WHERE lang = ? AND page = ?', (lang, -start_page))
+                if conn.execute('DELETE FROM pages WHERE lang = ? AND page = ?', (lang, -start_page)).rowcount:
+                    updated += 1
+            known = dict(conn.execute('SELECT page, fetched FROM pages WHERE lang = ?', (lang,)))
+            for page, entry in entries:
+                if page is None:
+                    # 舊版進度沒有頁碼（只在日誌還沒有逐頁紀錄時出現），以負的起始頁碼存放
+                    page = -start_page
+                if known.get(page, 0) >= entry['ts']:
+                    continue
+                if entry.get('ok', True):
+                    self._write_page(conn, lang, page, entry['rows'], entry['ts'])
+                else:
+                    conn.execute(_UPSERT_FAILURE, (lang, page, entry.get('error'), entry['ts'], self.run_id))
+                updated += 1
+        return updated
+
+    def sync_batches(self, batches):
+        """依批次由進度日誌補齊資料庫，回傳更新的頁數"""
+        updated = sum(self.sync_journal(batch['lang_code'], batch['progress_file'], batch['start_page'])
+                      for batch in batches)
+        if updated:
+            print(f"🗄️ 書目資料庫由進度日誌補上 {updated} 頁（{self.path}）")
+        return updated
+
+    # --- 查詢 ---
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def iter_rows(self, chunk_size=2000):
+        """
+        依 (語言, 頁碼, 列) 順序串流成功頁面的列，格式與進度日誌的列相同；
+        另開連線讀取，整個串流看到的是同一個快照，不受同時進行的寫入影響
+        """
+        conn = _connect(self.path, self.timeout)
+        try:
+            cursor = conn.execute('SELECT name, isbn, isbn_raw FROM books ORDER BY lang, page, position')
+            while True:
+                chunk = cursor.fetchmany(chunk_size)
+                if not chunk:
+                    break
+                for name, isbn, isbn_raw in chunk:
+                    row = {'name': name, 'isbn': isbn}
+                    if isbn_raw is not None:
+                        row['isbn_raw'] = isbn_raw
+                    yield row
+        finally:
+            conn.close()
+
+    def __len__(self):
+        return self._query('SELECT count(*) FROM books')[0][0]
+
+    def find_by_isbn(self, isbn):
+        rows = self._query('SELECT lang, page, name, isbn FROM books WHERE isbn = ? ORDER BY lang, page, position',
+                           (normalize_isbn(isbn),))
+        return [{'lang': lang, 'page': page, 'name': name, 'isbn': value} for lang, page, name, value in rows]
+
+    def find_by_name(self, name):
+        rows = self._query('SELECT lang, page, name, isbn FROM books WHERE name = ? ORDER BY lang, page, position',
+                           (name.strip(),))
+        return [{'lang': lang, 'page': page, 'name': value, 'isbn': isbn} for lang, page, value, isbn in rows]
+
+    def page_rows(self, lang, page):
+        """某頁成功抓取的列；沒有紀錄或失敗時回傳 None"""
+        status = self._query('SELECT ok FROM pages WHERE lang = ? AND page = ?', (lang, page))
+        if not status or not status[0][0]:
+            return None
+        rows = self._query('SELECT name, isbn FROM books WHERE lang = ? AND page = ? ORDER BY position', (lang, page))
+        return [{'name': name, 'isbn': isbn} for name, isbn in rows]
+
+    def summary(self):
+        """列數、不重複 ISBN 數、成功與失敗頁數，以及最近一次執行"""
+        (rows, isbns), = self._query('SELECT count(*), count(DISTINCT isbn) FROM books')
+        (ok, failed), = self._query('SELECT coalesce(sum(ok), 0), coalesce(sum(NOT ok), 0) FROM pages')
+        last_run = self._query('SELECT id, started, finished, engine, mode, pages_ok, pages_failed, row_count, status '
+                               'FROM crawl_runs ORDER BY id DESC LIMIT 1')
+        keys = ('id', 'started', 'finished', 'engine', 'mode', 'pages_ok', 'pages_failed', 'rows', 'status')
+        return {'rows': rows, 'isbns': isbns, 'pages_ok': ok, 'pages_failed': failed,
+                'last_run': dict(zip(keys, last_run[0])) if last_run else None}
+
+    def plan_isbn_updates(self, all_records):
+        """
+        以查詢比對 Sheets 紀錄與資料庫，回傳與 sheets.plan_isbn_updates 相同格式的差異清單；
+        工作表的書名與 ISBN 放進暫存資料表，和 books 的書名索引 join，不必載入整份書單
+        """
+        from .sheets import sheet_rows
+
+        with self._lock:
+            conn = self._conn
+            conn.execute('CREATE TEMP TABLE IF NOT EXISTS sheet_rows '
+                         '(row INTEGER PRIMARY KEY, name TEXT NOT NULL, isbn TEXT NOT NULL)')
+            conn.execute('BEGIN')
+            try:
+                conn.execute('DELETE FROM temp.sheet_rows')
+                conn.executemany('INSERT INTO temp.sheet_rows (row, name, isbn) VALUES (?, ?, ?)',
+                                 sheet_rows(all_records))
+                rows = conn.execute(_SHEET_DIFF).fetchall()
+            finally:
+                conn.execute('COMMIT')
+        return [{'row': row, 'name': name, 'old': old, 'new': new} for row, name, old, new in rows]
@@ -0,0 +1,187 @@
+"""
+命令列入口：在 scripts/ 底下執行 python -m bookplanet <子命令>
+  crawl       斷點續傳抓取書單（原 isbn_continue.py），可加 --publish 與 --sync-sheet
+  merge       併回殘留的分片，並由各批次進度日誌合併去重成 all_books_complete.json（離線）
+  publish     以書目資料庫查詢產生 data/books_list.json 與索引、欄式書單、差異檔（離線）
+  sync-sheet  以書目資料庫（或 --input 指定的完整書單）比對並更新 Google Sheets
+  catalogue   由進度日誌補齊書目資料庫，列出統計或依 ISBN、書名查詢（離線）
+匯入與參數解析不連網：requests 與 selenium 在建立抓取器時才載入（selenium 只有 selenium 引擎會用到），
+gspread 與 Google 憑證只有同步 Sheets 時才載入
+"""
+
+import argparse
+import json
+import time
+
+from .catalogue_db import CATALOGUE_DB, CatalogueDB
+from .crawl import BATCHES, COMPLETE_FILE, add_crawl_arguments, load_progress, run_crawl, save_progress
+from .dedup import dedup_books
+from .isbn import IsbnAudit
+from .progress import ProgressStore
+from .publish import BOOKS_LIST_PATH, publish_books_list
+from .sharding import leftover_shards, merge_shard
+
+
+def add_sheet_arguments(parser):
+    parser.add_argument('--dry-run', action='store_true',
+                        help='只列出Google Sheets需要修正的ISBN，不寫入')
+    parser.add_argument('--credentials', default='myapikey.json', metavar='PATH',
+                        help='Google 服務帳戶憑證（預設 myapikey.json）')
+    parser.add_argument('--sheet-url', default=None, metavar='URL',
+                        help='書單試算表網址（預設為布可星球書單）')
+    parser.add_argument('--no-fuzzy', action='store_true',
+                        help='只比對完全相同的書名，不做模糊比對')
+    parser.add_argument('--fuzzy-score', type=float, default=0.9, metavar='SCORE',
+                        help='模糊比對自動修正所需的相似度（0-1，預設 0.9），較低的只列出供人工確認')
+
+
+def sync_sheet(all_books, args, catalogue=None):
+    """開啟試算表並比對更新（有傳入 catalogue 時以資料庫查詢比對）；憑證與 gspread 都在這裡才載入"""
+    from .sheets import SHEET_URL, open_sheet, update_sheet
+
+    sheet = open_sheet(args.credentials, args.sheet_url or SHEET_URL)
+    return update_sheet(sheet, all_books, dry_run=args.dry_run, catalogue=catalogue, fuzzy=not args.no_fuzzy,
+                        auto_score=args.fuzzy_score)
+
+
+def open_catalogue(path):
+    """開啟書目資料庫，先由各批次進度日誌補上還沒寫入的頁面"""
+    catalogue = CatalogueDB(path)
+    catalogue.sync_batches(BATCHES)
+    return catalogue
+
+
+def cmd_crawl(args):
+    print("🚀 開始執行布可星球ISBN更新程式（智能續傳版本）...")
+    print(f"抓取引擎：{args.engine}")
+    if args.engine == 'http' and args.json_url:
+        print(f"模板頁 JSON 端點：{args.json_url}")
+    print(f"執行時間：{time.strftime('%Y-%m-%d %H:%M:%S')}")
+
+    all_books = run_crawl(args)
+
+    if not all_books:
+        print("\n❌ 沒有抓取到書籍資料")
+    elif args.sync_sheet:
+        if args.no_catalogue:
+            sync_sheet(all_books, args)
+        else:
+            with CatalogueDB(args.catalogue) as catalogue:
+                sync_sheet(all_books, args, catalogue)
+        print(f"\n🎉 全部完成！共處理 {len(all_books)} 本書籍")
+
+    print(f"結束時間：{time.strftime('%Y-%m-%d %H:%M:%S')}")
+
+
+def cmd_merge(args):
+    audit = IsbnAudit()
+    all_books = []
+    for batch in BATCHES:
+        progress_file = batch['progress_file']
+        shard_files = leftover_shards(progress_file)
+        if shard_files:
+            store = ProgressStore(progress_file)
+            for shard_file in shard_files:
+                merged = merge_shard(shard_file, store, audit)
+                print(f"🧩 併回殘留的分片 {shard_file}：{merged} 頁")
+            store.close()
+        books = load_progress(progress_file)
+        print(f"📖 {batch['name']}：{len(books)} 本")
+        all_books.extend(books)
+
+    unique_books = dedup_books(all_books)
+    print(f"📊 合計 {len(all_books)} 本，去重後 {len(unique_books)} 本")
+    save_progress(unique_books, args.output)
+    print(f"   已保存完整結果到 {args.output}")
+
+
+def cmd_publish(args):
+    progress_files = [batch['progress_file'] for batch in BATCHES]
+    if args.from_journals:
+        publish_books_list(progress_files, args.output)
+        return
+    with open_catalogue(args.catalogue) as catalogue:
+        publish_books_list(progress_files, args.output, catalogue=catalogue)
+
+
+def cmd_sync_sheet(args):
+    if args.input is None:
+        with open_catalogue(args.catalogue) as catalogue:
+            sync_sheet(None, args, catalogue)
+        return
+    try:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            all_books = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ 無法讀取 {args.input}（請先執行 crawl 或 merge）: {e}")
+        return 1
+    print(f"📖 由 {args.input} 載入 {len(all_books)} 本書")
+    sync_sheet(all_books, args)
+
+
+def cmd_catalogue(args):
+    with open_catalogue(args.catalogue) as catalogue:
+        if args.isbn or args.name:
+            matches = catalogue.find_by_isbn(args.isbn) if args.isbn else catalogue.find_by_name(args.name)
+            for match in matches:
+                print(f"📖 {match['name']}  ISBN {match['isbn']}（語言代碼 {match['lang']} 第 {match['page']} 頁）")
+            if not matches:
+                print("🔍 書目資料庫中沒有符合的書籍")
+            return 0 if matches else 1
+        summary = catalogue.summary()
+        print(f"🗄️ {args.catalogue}：{summary['rows']} 列，{summary['isbns']} 個不重複 ISBN，"
+              f"成功 {summary['pages_ok']} 頁，失敗待重抓 {summary['pages_failed']} 頁")
+        run = summary['last_run']
+        if run:
+            started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['started']))
+            print(f"   最近一次抓取：#{run['id']} {started}（{run['engine']}，{run['mode']}，{run['status']}），"
+                  f"寫入 {run['pages_ok']} 頁 {run['rows']} 列，失敗 {run['pages_failed']} 頁")
+
+
+def add_catalogue_argument(parser):
+    parser.add_argument('--catalogue', default=CATALOGUE_DB, metavar='PATH',
+                        help='書目資料庫（SQLite）路徑（預設 ../進度檔案/catalogue.sqlite3）')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m bookplanet', description='布可星球書單爬蟲與同步工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    crawl = subparsers.add_parser('crawl', help='斷點續傳抓取書單')
+    add_crawl_arguments(crawl)
+    crawl.add_argument('--sync-sheet', action='store_true', help='抓取完成後比對並更新 Google Sheets')
+    add_sheet_arguments(crawl)
+    crawl.set_defaults(func=cmd_crawl)
+
+    merge = subparsers.add_parser('merge', help='由進度日誌合併去重，產生完整書單（離線）')
+    merge.add_argument('--output', default=COMPLETE_FILE, metavar='PATH',
+                       help=f'輸出路徑（預設 {COMPLETE_FILE}）')
+    merge.set_defaults(func=cmd_merge)
+
+    publish = subparsers.add_parser('publish', help='以書目資料庫查詢產生網站書單（離線）')
+    publish.add_argument('--output', default=BOOKS_LIST_PATH, metavar='PATH',
+                         help='書單 JSON 路徑（預設 data/books_list.json）')
+    add_catalogue_argument(publish)
+    publish.add_argument('--from-journals', action='store_true',
+                         help='不使用書目資料庫，直接串流各批次的進度日誌')
+    publish.set_defaults(func=cmd_publish)
+
+    sync = subparsers.add_parser('sync-sheet', help='以書目資料庫比對並更新 Google Sheets')
+    sync.add_argument('--input', default=None, metavar='PATH',
+                      help=f'改用完整書單 JSON 比對（例如 {COMPLETE_FILE}），預設以書目資料庫查詢')
+    add_catalogue_argument(sync)
+    add_sheet_arguments(sync)
+    sync.set_defaults(func=cmd_sync_sheet)
+
+    catalogue = subparsers.add_parser('catalogue', help='書目資料庫統計與查詢（離線）')
+    add_catalogue_argument(catalogue)
+    lookup = catalogue.add_mutually_exclusive_group()
+    lookup.add_argument('--isbn', default=None, help='依 ISBN 查詢')
+    lookup.add_argument('--name', default=None, help='依書名查詢')
+    catalogue.set_defaults(func=cmd_catalogue)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,210 @@
+"""
+書單的精簡欄式二進位格式（books_list.bin）
+與 books_list.json 同序同列號，掃描端與 Python 工具可直接載入，不必解析 365KB 的縮排 JSON。
+發佈時存成預先 gzip 的 books_list.bin.gz：CDN 不會壓縮 octet-stream，
+由前端以 DecompressionStream 自行解壓，不論伺服器設定為何傳輸量都固定
+
+格式（little-endian）：
+  檔頭 16 bytes   magic 'BPC1', 列數 u32, 書名區位元組數 u32, 字串表位元組數 u32
+  isbn     u64 × 列數   ISBN 數字（前導 0 由長度還原）；溢位列為字串表索引
+  meta     u8  × 列數   ISBN 長度，0x80 表示結尾為 X，0x7F 表示存放在溢位字串表
+  audience u8  × 列數   適合對象在字串表中的索引
+  names               所有書名以 \\n 分隔的 UTF-8（一次解碼再切開，比逐筆解碼快）
+  strings             適合對象表與溢位 ISBN 表，以 \\n 分隔：第一行為適合對象個數
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import struct
+import sys
+from array import array
+
+from .delta import file_sha256
+from .lookup_index import index_path_for, write_index_for_books_list
+
+MAGIC = b'BPC1'
+HEADER = struct.Struct('<4sIII')
+META_X = 0x80
+META_OVERFLOW = 0x7F
+_MIN_13_DIGITS = 10 ** 12
+
+# u64 可放 19 位數，但前端以兩個 u32 組回 Number，最多只能精確表示 15 位數
+_PACKABLE = re.compile(r'^(\d{1,15})(X?)$')
+
+
+def _little_endian(values):
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values.tobytes()
+
+
+def columnar_path_for(books_list_path):
+    """data/books_list.json → data/books_list.bin.gz"""
+    return os.path.splitext(books_list_path)[0] + '.bin.gz'
+
+
+class ColumnarWriter:
+    """逐筆加入書單紀錄 {書名, 適合對象, ISBN}，最後一次寫出"""
+
+    def __init__(self):
+        self.isbns = array('Q')
+        self.meta = bytearray()
+        self.audience = bytearray()
+        self.names = []
+        self._audiences = {}
+        self._overflow = []
+
+    def add(self, record):
+        isbn = str(record.get('ISBN', ''))
+        match = _PACKABLE.match(isbn)
+        if match:
+            self.isbns.append(int(match.group(1)))
+            self.meta.append(len(isbn) | (META_X if match.group(2) else 0))
+        else:
+            self.isbns.append(len(self._overflow))
+            self.meta.append(META_OVERFLOW)
+            self._overflow.append(isbn.replace('\n', ' '))
+
+        audience = record.get('適合對象', '')
+        if audience not in self._audiences:
+            if len(self._audiences) >= 256:
+                raise ValueError('適合對象種類超過 256 種，無法以 u8 編碼')
+            self._audiences[audience] = len(self._audiences)
+        self.audience.append(self._audiences[audience])
+
+        self.names.append(str(record.get('書名', '')).replace('\n', ' '))
+
+    def to_bytes(self):
+        strings = [str(len(self._audiences))] + list(self._audiences) + self._overflow
+        strings_blob = '\n'.join(s.replace('\n', ' ') for s in strings).encode('utf-8')
+        names_blob = '\n'.join(self.names).encode('utf-8')
+        return b''.join((
+            HEADER.pack(MAGIC, len(self.meta), len(names_blob), len(strings_blob)),
+            _little_endian(array('Q', self.isbns)),
+            bytes(self.meta),
+            bytes(self.audience),
+            names_blob,
+            strings_blob,
+        ))
+
+    def write(self, filename):
+        """
+        tmp 檔 + os.replace 原子換檔；副檔名為 .gz 時先壓縮（mtime 固定為 0，內容相同時檔案也相同）
+        回傳未壓縮內容的 sha256，記在查詢索引的 bin_sha256
+        """
+        data = self.to_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        if filename.endswith('.gz'):
+            data = gzip.compress(data, compresslevel=9, mtime=0)
+        tmp = f'{filename}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, filename)
+        return digest
+
+
+def _isbn_text(value, flags, overflow):
+    if flags == META_OVERFLOW:
+        return overflow[value]
+    if flags & META_X:
+        return str(value).zfill((flags & ~META_X) - 1) + 'X'
+    return str(value).zfill(flags)
+
+
+def decode_columns(data):
+    """解析 books_list.bin 成欄位 {'書名': [...], '適合對象': [...], 'ISBN': [...]}，不逐列建立 dict"""
+    if data[:2] == b'\x1f\x8b':
+        data = gzip.decompress(data)
+    magic, count, names_size, strings_size = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError('不是 books_list.bin 格式')
+
+    offset = HEADER.size
+    isbns = array('Q')
+    isbns.frombytes(data[offset:offset + 8 * count])
+    offset += 8 * count
+    meta = data[offset:offset + count]
+    offset += count
+    audience = data[offset:offset + count]
+    offset += count
+    if sys.byteorder != 'little':
+        isbns.byteswap()
+    names = data[offset:offset + names_size].decode('utf-8').split('\n') if count else []
+    offset += names_size
+    strings = data[offset:offset + strings_size].decode('utf-8').split('\n')
+    audiences = strings[1:1 + int(strings[0])]
+    overflow = strings[1 + int(strings[0]):]
+
+    # 絕大多數是沒有前導 0 的 13 碼 ISBN，直接 str()，其餘才補前導 0 或查溢位表
+    isbn_texts = [str(value) if flags == 13 and value >= _MIN_13_DIGITS else _isbn_text(value, flags, overflow)
+                  for value, flags in zip(isbns, meta)]
+    return {'書名': names, '適合對象': [audiences[i] for i in audience], 'ISBN': isbn_texts}
+
+
+def decode_catalogue(data):
+    """解析 books_list.bin（或 .bin.gz），回傳與 books_list.json 相同格式的清單"""
+    columns = decode_columns(data)
+    return [{'書名': name, '適合對象': audience, 'ISBN': isbn}
+            for name, audience, isbn in zip(columns['書名'], columns['適合對象'], columns['ISBN'])]
+
+
+def load_catalogue(filename):
+    with open(filename, 'rb') as f:
+        return decode_catalogue(f.read())
+
+
+def load_columns(filename):
+    with open(filename, 'rb') as f:
+        return decode_columns(f.read())
+
+
+def _load_published_columns(books_list_path):
+    """
+    查詢索引記錄的 JSON 檔雜湊、欄式書單（未壓縮）雜湊與列數都和磁碟上的檔案相符時回傳欄位，否則回傳 None；
+    git checkout 會任意設定 mtime，不能以新舊判斷欄式書單是否出自同一次發佈
+    """
+    with open(index_path_for(books_list_path), 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    if not index.get('bin_sha256') or index.get('json_sha256') != file_sha256(books_list_path):
+        return None
+    with open(columnar_path_for(books_list_path), 'rb') as f:
+        data = f.read()
+    if data[:2] == b'\x1f\x8b':
+        data = gzip.decompress(data)
+    if hashlib.sha256(data).hexdigest() != index['bin_sha256']:
+        return None
+    columns = decode_columns(data)
+    return columns if len(columns['ISBN']) == index.get('count') else None
+
+
+def load_books_list_columns(books_list_path):
+    """
+    讀取書單成欄位：books_list.bin.gz 與 JSON 經查詢索引確認為同一次發佈時直接解析欄式檔，
+    否則退回解析 JSON
+    """
+    try:
+        columns = _load_published_columns(books_list_path)
+        if columns is not None:
+            return columns
+    except (OSError, ValueError, KeyError):
+        pass
+    with open(books_list_path, 'r', encoding='utf-8-sig') as f:
+        books = json.load(f)
+    return {key: [book.get(key, '') for book in books] for key in ('書名', '適合對象', 'ISBN')}
+
+
+def export_books_list(books_list_path):
+    """由現有書單 JSON 產生 books_list.bin.gz 並重建查詢索引（記下兩者的雜湊），回傳輸出路徑"""
+    with open(books_list_path, 'r', encoding='utf-8-sig') as f:
+        books = json.load(f)
+    writer = ColumnarWriter()
+    for book in books:
+        writer.add(book)
+    path = columnar_path_for(books_list_path)
+    write_index_for_books_list(books_list_path, writer.write(path))
+    return path
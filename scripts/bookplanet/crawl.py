@@ -0,0 +1,520 @@
+"""
+斷點續傳抓取流程（python -m bookplanet crawl，原 isbn_continue.py）
+依批次檢查進度日誌，只抓缺少或失敗的頁面；可逐頁、多執行緒、多程序分片或增量檢查。
+selenium 與 requests 只在實際建立抓取器時才匯入，匯入本模組不連網也不需要憑證
+"""
+
+import time
+
+from .browser_registry import ReaperWatchdog, reap_orphans
+from .catalogue_db import CATALOGUE_DB, CatalogueDB
+from .dedup import BookIndex, dedup_books
+from .fingerprint import FingerprintStore, refresh_pages
+from .isbn import IsbnAudit
+from .memory_governor import MemoryGovernor
+from .metrics import NULL_METRICS, RunMetrics
+from .progress import ProgressStore, write_json_atomic
+from .publish import BOOKS_LIST_PATH, publish_books_list
+from .retry import DeadLetterQueue, RetryExhausted, RetryPolicy, retry_into_journals
+from .scheduler import PageScheduler
+from .sharding import WORKER_MEMORY_MB, MemoryBudget, crawl_sharded
+
+PROGRESS_DIR = '../進度檔案'
+COMPLETE_FILE = f'{PROGRESS_DIR}/all_books_complete.json'
+FINGERPRINT_FILE = f'{PROGRESS_DIR}/page_fingerprints.json'
+
+BATCHES = [
+    {
+        'name': '第一批：中文書籍 第1-80頁',
+        'lang_code': '1',
+        'start_page': 1,
+        'end_page': 80,
+        'progress_file': f'{PROGRESS_DIR}/zh_books_1_80.json'
+    },
+    {
+        'name': '第二批：中文書籍 第81-160頁',
+        'lang_code': '1',
+        'start_page': 81,
+        'end_page': 160,
+        'progress_file': f'{PROGRESS_DIR}/zh_books_81_160.json'
+    },
+    {
+        'name': '第三批：中文書籍 第161-242頁',
+        'lang_code': '1',
+        'start_page': 161,
+        'end_page': 242,
+        'progress_file': f'{PROGRESS_DIR}/zh_books_161_242.json'
+    },
+    {
+        'name': '第四批：英文書籍 第1-11頁',
+        'lang_code': '2',
+        'start_page': 1,
+        'end_page': 11,
+        'progress_file': f'{PROGRESS_DIR}/en_books.json'
+    }
+]
+
+
+def save_progress(data, filename):
+    """保存進度到文件（原子換檔）"""
+    write_json_atomic(filename, data)
+
+
+def load_progress(filename):
+    """從進度日誌載入並去重"""
+    return dedup_books(ProgressStore(filename).load())
+
+
+def check_batch_completion(filename, start_page, end_page):
+    """檢查批次還缺哪些頁面（依進度日誌逐頁紀錄，缺少或失敗的頁面都要重抓）"""
+    store = ProgressStore(filename)
+    missing_pages = store.missing_pages(start_page, end_page)
+    failed_pages = [page for page in store.failed_pages() if start_page <= page <= end_page]
+    done = end_page - start_page + 1 - len(missing_pages)
+
+    print(f"檢查 {filename}: 已完成 {done}/{end_page - start_page + 1} 頁，"
+          f"缺少 {len(missing_pages) - len(failed_pages)} 頁，失敗待重抓 {len(failed_pages)} 頁")
+
+    return missing_pages
+
+
+def fetch_books_batch(lang_code, start_page, end_page, progress_file, batch_name, engine='http', pool=None,
+                      render_timeout=5, audit=None, metrics=None, policy=None, dead_letters=None, catalogue=None,
+                      governor=None, json_url=None):
+    """
+    分批抓取書籍資料；重試用盡的頁面放入 dead_letters，執行結束前再試；有傳入 catalogue 時逐頁寫入書目資料庫
+    governor 超過記憶體軟上限時可清掉本批次暫存的書籍清單，批次結束時再從進度日誌載入
+    json_url 為 http 引擎遇到前端模板頁時改取資料的 JSON 端點
+    """
+    if audit is None:
+        audit = IsbnAudit()
+    metrics = metrics or NULL_METRICS
+    policy = policy or RetryPolicy()
+    if dead_letters is None:
+        dead_letters = DeadLetterQueue()
+    print(f"\n{'='*60}")
+    print(f"開始執行：{batch_name}")
+    print(f"頁面範圍：第{start_page}-{end_page}頁")
+    print(f"進度檔案：{progress_file}")
+
+    # 檢查是否已完成
+    missing_pages = check_batch_completion(progress_file, start_page, end_page)
+
+    if not missing_pages:
+        print(f"✅ {batch_name} 已完成！載入現有進度")
+        return load_progress(progress_file)
+
+    print(f"🔄 {batch_name} 尚未完成，從第 {missing_pages[0]} 頁續傳，共 {len(missing_pages)} 頁待抓取...")
+
+    store = ProgressStore(progress_file)
+    index = BookIndex()  # 去重索引，隨新增書籍一併更新
+    books = dedup_books(store.load(), index)  # 載入現有進度
+    initial_count = len(books)
+    print(f"已載入現有進度：{initial_count} 本書")
+
+    own_pool = None
+    if engine == 'selenium' and pool is None:
+        from .driver_pool import DriverPool, create_chrome_driver
+
+        pool = own_pool = DriverPool(create_chrome_driver)
+
+        if not pool.prewarm():
+            print("❌ 無法初始化Chrome driver")
+            return books
+
+    spilled = []
+
+    def spill_rows():
+        """每頁都已寫入進度日誌，清單可以直接丟掉"""
+        if not books:
+            return False
+        spilled.append(len(books))
+        books.clear()
+
+    if governor:
+        governor.add_action('spill_rows', spill_rows, '暫存書籍清單交回進度日誌')
+
+    fetcher = create_fetcher(engine, pool, render_timeout, metrics, json_url)
+
+    try:
+        for page in missing_pages:
+            if governor:
+                governor.checkpoint()
+            print(f'🔍 正在抓取第 {page} 頁資料 (語言代碼: {lang_code})...')
+            metrics.page_started()
+
+            try:
+                rows, retries = policy.call(lambda: fetcher.fetch_page(lang_code, page), f'第 {page} 頁', metrics)
+            except RetryExhausted as e:
+                print(f'   ⚠️ 第 {page} 頁重試用盡，執行結束前會再試一次（已記錄，下次續傳也會重抓）')
+                store.record_failure(page, e.error)
+                if catalogue is not None:
+                    catalogue.record_failure(lang_code, page, e.error)
+                dead_letters.add(lang_code, page, e.error, progress_file=progress_file)
+                metrics.page_done(lang_code, page, 0, ok=False, retries=e.attempts - 1)
+                continue
+
+            page_books = 0
+            rows = audit.normalize_rows(rows)
+            with metrics.timer('journal'):
+                store.record_page(page, rows)  # 每頁附加一行進度日誌
+            if catalogue is not None:
+                with metrics.timer('catalogue'):
+                    catalogue.record_page(lang_code, page, rows)
+
+            for row in rows:
+                name = row['name']
+                isbn = row['isbn']
+                # 檢查是否已存在（避免重複）
+                if index.add(name, isbn):
+                    books.append({'name': name, 'isbn': isbn})
+                    page_books += 1
+
+            print(f'   ✅ 第 {page} 頁找到 {page_books} 本新書')
+            metrics.page_done(lang_code, page, len(rows), ok=True, retries=retries)
+
+    finally:
+        fetcher.close()
+        if own_pool:
+            own_pool.close()
+        store.close()
+        if governor:
+            governor.remove_action('spill_rows')
+        if spilled:
+            books = load_progress(progress_file)
+        final_count = len(books)
+        new_books = final_count - initial_count
+        print(f"\n✅ {batch_name} 執行完成！")
+        print(f"   📊 原有書籍：{initial_count} 本")
+        print(f"   📊 新增書籍：{new_books} 本")
+        print(f"   📊 總計書籍：{final_count} 本")
+
+    return books
+
+
+def create_fetcher(engine, pool=None, render_timeout=5, metrics=None, json_url=None):
+    """建立 fetcher；selenium 引擎每頁向 WebDriver 池租借瀏覽器，http 引擎遇到前端模板頁時改向 json_url 取資料"""
+    if engine == 'selenium':
+        from .driver_pool import PooledBookFetcher
+
+        return PooledBookFetcher(pool, render_timeout=render_timeout, metrics=metrics)
+    from .http_fetcher import HttpBookFetcher
+
+    return HttpBookFetcher(json_url=json_url, metrics=metrics)
+
+
+def refresh_batch_incremental(batch, fingerprints, engine='http', pool=None, render_timeout=5, stop_after=3,
+                              audit=None, metrics=None, policy=None, dead_letters=None, json_url=None):
+    """增量模式：依頁面指紋重新檢查批次，未變動的頁面沿用進度日誌中的資料"""
+    print(f"\n{'='*60}")
+    print(f"增量檢查：{batch['name']}")
+
+    store = ProgressStore(batch['progress_file'])
+    store.load()
+    fetcher = create_fetcher(engine, pool, render_timeout, metrics, json_url)
+
+    try:
+        changed, checked = refresh_pages(
+            fetcher, store, fingerprints, batch['lang_code'],
+            range(batch['start_page'], batch['end_page'] + 1), stop_after, audit, metrics, policy, dead_letters
+        )
+    finally:
+        fetcher.close()
+        store.close()
+        fingerprints.save()
+
+    print(f"   📊 檢查 {checked} 頁，其中 {changed} 頁有變動")
+    missing = store.missing_pages(batch['start_page'], batch['end_page'])
+    if missing:
+        print(f"   ⚠️ 仍有 {len(missing)} 頁缺少或失敗（第 {', '.join(map(str, missing))} 頁），下次執行會再抓取")
+    return dedup_books(store.books())
+
+
+def fetch_batches_concurrently(batches, engine='http', workers=4, rate=2.0, pool=None, render_timeout=5,
+                               audit=None, metrics=None, policy=None, dead_letters=None, catalogue=None,
+                               governor=None, json_url=None):
+    """以工作池同時抓取所有未完成批次的頁面，回傳各批次的書籍清單（依批次順序）"""
+    if audit is None:
+        audit = IsbnAudit()
+    metrics = metrics or NULL_METRICS
+    if dead_letters is None:
+        dead_letters = DeadLetterQueue()
+    print(f"\n{'='*60}")
+    print(f"並行抓取：{workers} 個工作執行緒，限速每秒 {rate} 頁")
+
+    states = []
+    page_owner = {}
+    jobs = []
+
+    for batch in batches:
+        progress_file = batch['progress_file']
+        missing_pages = check_batch_completion(progress_file, batch['start_page'], batch['end_page'])
+        store = ProgressStore(progress_file)
+        index = BookIndex()
+        books = dedup_books(store.load(), index)
+        state = {'batch': batch, 'books': books, 'index': index, 'store': store,
+                 'initial_count': len(books)}
+        states.append(state)
+
+        if not missing_pages:
+            print(f"✅ {batch['name']} 已完成！載入現有的 {len(books)} 本書")
+            continue
+
+        print(f"🔄 {batch['name']} 尚未完成，已載入現有進度：{len(books)} 本書，{len(missing_pages)} 頁待抓取")
+        for page in missing_pages:
+            page_owner[(batch['lang_code'], page)] = state
+            jobs.append((batch['lang_code'], page))
+
+    if not jobs:
+        return [state['books'] for state in states]
+
+    scheduler = PageScheduler(lambda: create_fetcher(engine, pool, render_timeout, metrics, json_url),
+                              workers=workers, rate=rate, policy=policy, metrics=metrics)
+    started = time.time()
+
+    try:
+        for lang_code, page, rows, error in scheduler.run(jobs):
+            if governor:
+                governor.checkpoint()
+            state = page_owner[(lang_code, page)]
+            books = state['books']
+            index = state['index']
+
+            if error is not None:
+                print(f'   ⚠️ 第 {page} 頁重試用盡，執行結束前會再試一次（已記錄，下次續傳也會重抓）(語言代碼: {lang_code})')
+                state['store'].record_failure(page, error)
+                if catalogue is not None:
+                    catalogue.record_failure(lang_code, page, error)
+                dead_letters.add(lang_code, page, error, progress_file=state['batch']['progress_file'])
+                continue
+
+            rows = audit.normalize_rows(rows)
+            with metrics.timer('journal'):
+                state['store'].record_page(page, rows)  # 每頁附加一行進度日誌
+            if catalogue is not None:
+                with metrics.timer('catalogue'):
+                    catalogue.record_page(lang_code, page, rows)
+
+            page_books = 0
+            for row in rows:
+                name = row['name']
+                isbn = row['isbn']
+                # 檢查是否已存在（避免重複）
+                if index.add(name, isbn):
+                    books.append({'name': name, 'isbn': isbn})
+                    page_books += 1
+
+            print(f'   ✅ 第 {page} 頁找到 {page_books} 本新書 (語言代碼: {lang_code})')
+    finally:
+        for state in states:
+            state['store'].close()
+            new_books = len(state['books']) - state['initial_count']
+            print(f"   📊 {state['batch']['name']}：新增 {new_books} 本，總計 {len(state['books'])} 本")
+        print(f"⏱️ 並行抓取 {len(jobs)} 頁耗時 {time.time() - started:.1f} 秒")
+
+    return [state['books'] for state in states]
+
+
+def add_crawl_arguments(parser):
+    """crawl 子命令（與 isbn_continue.py）的參數"""
+    parser.add_argument('--engine', choices=['http', 'selenium'], default='http',
+                        help='抓取引擎：http 直接下載頁面（預設），selenium 以 Chrome 渲染（備援）')
+    parser.add_argument('--json-url', default=None, metavar='URL',
+                        help='http 引擎：頁面表格是前端 {{...}} 模板且沒有內嵌資料時，改向這個 JSON 端點取同一頁資料'
+                             '（參數與 BookListTable 相同）')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='同時抓取的工作執行緒數，1 表示逐批逐頁抓取（預設 4）')
+    parser.add_argument('--rate', type=float, default=2.0,
+                        help='全域限速：每秒最多請求頁數（預設 2）')
+    parser.add_argument('--processes', type=int, default=0,
+                        help='多程序分片模式：以 N 個工作程序分頭抓取（各自的瀏覽器與分片進度），0 表示不使用（預設 0）')
+    parser.add_argument('--shard-pages', type=int, default=20,
+                        help='多程序分片模式：每個分片的頁數（預設 20）')
+    parser.add_argument('--memory-budget', type=int, default=0,
+                        help='多程序分片模式：所有工作程序合計可用的記憶體（MB），0 表示只看系統可用記憶體（預設 0）')
+    parser.add_argument('--memory-reserve', type=int, default=1024,
+                        help='多程序分片模式：系統至少保留的可用記憶體（MB），不足時減少工作程序（預設 1024）')
+    parser.add_argument('--recycle-pages', type=int, default=50,
+                        help='selenium 引擎：每個瀏覽器處理幾頁後回收重建（預設 50）')
+    parser.add_argument('--max-browser-rss', type=int, default=800,
+                        help='selenium 引擎：瀏覽器程序樹 RSS 超過此值（MB）即回收（預設 800）')
+    parser.add_argument('--render-timeout', type=float, default=5,
+                        help='selenium 引擎：等待表格模板渲染完成的最長秒數（預設 5）')
+    parser.add_argument('--reap-interval', type=float, default=60,
+                        help='selenium 引擎：每隔幾秒回收異常結束的爬蟲留下的瀏覽器，0 表示只在開始時回收一次（預設 60）')
+    parser.add_argument('--soft-memory', type=int, default=0,
+                        help='Python 加瀏覽器的 RSS 超過此值（MB）時在兩頁之間回收瀏覽器、釋放暫存資料，0 表示不控管（預設 0）')
+    parser.add_argument('--hard-memory', type=int, default=0,
+                        help='回收後 RSS 仍超過此值（MB）時暫停抓取新頁面，0 表示不暫停（預設 0）')
+    parser.add_argument('--max-attempts', type=int, default=4,
+                        help='每頁最多嘗試次數，失敗後以指數退避加抖動重試（預設 4）')
+    parser.add_argument('--retry-delay', type=float, default=1.0,
+                        help='第一次重試前的等待秒數，之後每次加倍（預設 1）')
+    parser.add_argument('--incremental', action='store_true',
+                        help='增量模式：以頁面指紋與條件式請求重新檢查已抓取的頁面，連續未變動即提前結束')
+    parser.add_argument('--stop-after', type=int, default=3,
+                        help='增量模式：連續幾頁未變動就結束該批次，0 表示檢查全部頁面（預設 3）')
+    parser.add_argument('--publish', nargs='?', const=BOOKS_LIST_PATH, default=None, metavar='PATH',
+                        help='抓取完成後由進度日誌直接產生書單 JSON（預設寫到 data/books_list.json）')
+    parser.add_argument('--catalogue', default=CATALOGUE_DB, metavar='PATH',
+                        help='書目資料庫（SQLite）路徑，抓取時逐頁寫入（預設 ../進度檔案/catalogue.sqlite3）')
+    parser.add_argument('--no-catalogue', action='store_true',
+                        help='不寫入書目資料庫（只寫進度日誌）')
+    parser.add_argument('--metrics-report', default=None, metavar='PATH',
+                        help='執行報告（JSONL）路徑，預設為 ../進度檔案/metrics/run_<時間>.jsonl')
+    parser.add_argument('--no-metrics', action='store_true',
+                        help='不記錄各階段耗時與執行報告')
+
+
+def run_crawl(args, batches=BATCHES):
+    """依 add_crawl_arguments 的參數抓取所有批次，保存並回傳去重後的完整書單"""
+    all_books = []
+    audit = IsbnAudit()  # 本次執行抓到的 ISBN 檢查統計
+    # 所有抓取路徑共用同一個重試策略與斷路器；重試用盡的頁面在執行結束前再試一輪
+    policy = RetryPolicy(max_attempts=args.max_attempts, base_delay=args.retry_delay)
+    dead_letters = DeadLetterQueue()
+    metrics = NULL_METRICS
+    if not args.no_metrics:
+        metrics = RunMetrics(args.metrics_report or
+                             f"{PROGRESS_DIR}/metrics/run_{time.strftime('%Y%m%d_%H%M%S')}.jsonl")
+
+    # 書目資料庫：抓取時逐頁寫入，本次執行記在 crawl_runs
+    sharded = args.processes > 1 and not args.incremental
+    catalogue = None
+    if not args.no_catalogue:
+        catalogue = CatalogueDB(args.catalogue)
+        if args.incremental:
+            mode = 'incremental'
+        elif sharded:
+            mode = 'sharded'
+        else:
+            mode = 'concurrent' if args.workers > 1 else 'sequential'
+        catalogue.start_run(args.engine, mode)
+    status = 'failed'
+
+    # selenium 引擎：整個執行期間共用一個預熱好的 WebDriver 池
+    pool = None
+    watchdog = None
+    if args.engine == 'selenium':
+        from .driver_pool import DriverPool, create_chrome_driver
+
+        # 先回收上次異常結束留下的瀏覽器，執行期間也定期檢查（例如分片工作程序當掉時）
+        reclaimed = reap_orphans()
+        if reclaimed['browsers']:
+            print(f"🧹 已回收 {reclaimed['browsers']} 個殘留的瀏覽器（{reclaimed['processes']} 個程序），"
+                  f"釋放 {reclaimed['reclaimed_mb']:.0f}MB")
+        watchdog = ReaperWatchdog(args.reap_interval, metrics=metrics).start()
+        pool = DriverPool(create_chrome_driver, size=1 if sharded else max(1, args.workers),
+                          max_pages=args.recycle_pages, max_rss_mb=args.max_browser_rss)
+        if not sharded:
+            # 分片模式由各工作程序自備瀏覽器，這個池只在最後重試失敗頁面時才啟動瀏覽器
+            pool.prewarm()
+
+    # 記憶體控管：分片模式的工作程序各自受 MemoryBudget 限制，這裡只管本程序與它的瀏覽器
+    governor = None
+    if args.soft_memory and not sharded:
+        governor = MemoryGovernor(args.soft_memory, args.hard_memory, metrics=metrics).start()
+        if pool:
+            governor.add_action('recycle_browser', lambda: pool.recycle() or False, '回收瀏覽器')
+
+    # 執行各批次
+    try:
+        if args.incremental:
+            fingerprints = FingerprintStore(FINGERPRINT_FILE)
+            for batch in batches:
+                all_books.extend(refresh_batch_incremental(
+                    batch, fingerprints, args.engine, pool, args.render_timeout, args.stop_after, audit, metrics,
+                    policy, dead_letters, args.json_url
+                ))
+        elif sharded:
+            options = {
+                'engine': args.engine,
+                'json_url': args.json_url,
+                'rate': args.rate,
+                'render_timeout': args.render_timeout,
+                'recycle_pages': args.recycle_pages,
+                'max_browser_rss': args.max_browser_rss,
+                'max_attempts': args.max_attempts,
+                'retry_delay': args.retry_delay,
+            }
+            budget = MemoryBudget(WORKER_MEMORY_MB[args.engine], args.memory_budget or None, args.memory_reserve)
+            for books in crawl_sharded(batches, options, args.processes, args.shard_pages, budget, audit, metrics,
+                                       dead_letters, check_batch_completion):
+                all_books.extend(books)
+        elif args.workers > 1:
+            for books in fetch_batches_concurrently(batches, args.engine, args.workers, args.rate, pool,
+                                                    args.render_timeout, audit, metrics, policy, dead_letters,
+                                                    catalogue, governor, args.json_url):
+                all_books.extend(books)
+        else:
+            for batch in batches:
+                books = fetch_books_batch(
+                    lang_code=batch['lang_code'],
+                    start_page=batch['start_page'],
+                    end_page=batch['end_page'],
+                    progress_file=batch['progress_file'],
+                    batch_name=batch['name'],
+                    engine=args.engine,
+                    pool=pool,
+                    render_timeout=args.render_timeout,
+                    audit=audit,
+                    metrics=metrics,
+                    policy=policy,
+                    dead_letters=dead_letters,
+                    catalogue=catalogue,
+                    governor=governor,
+                    json_url=args.json_url
+                )
+                all_books.extend(books)
+
+        if len(dead_letters):
+            fetcher = create_fetcher(args.engine, pool, args.render_timeout, metrics, args.json_url)
+            try:
+                all_books.extend(retry_into_journals(dead_letters, fetcher, policy, audit, metrics))
+            finally:
+                fetcher.close()
+        dead_letters.print_summary()
+        if catalogue is not None:
+            # 分片、增量與重試路徑只寫進度日誌，由日誌補上（已逐頁寫入的頁面會略過）
+            catalogue.sync_batches(batches)
+        status = 'done'
+    finally:
+        if catalogue is not None:
+            catalogue.finish_run(status)
+        if governor:
+            governor.close()
+        if pool:
+            pool.close()
+        if watchdog:
+            watchdog.close()
+        if metrics is not NULL_METRICS:
+            metrics.close()
+
+    # 合併所有結果
+    print(f"\n{'='*60}")
+    print("📊 最終統計結果")
+    print(f"   總共抓取書籍：{len(all_books)} 本")
+    if audit.total:
+        audit.print_summary()
+    if governor:
+        governor.print_summary()
+
+    # 去重處理（與批次內去重共用同一種索引）
+    unique_books = dedup_books(all_books)
+
+    duplicate_count = len(all_books) - len(unique_books)
+    if duplicate_count > 0:
+        print(f"   去重後書籍：{len(unique_books)} 本 (移除 {duplicate_count} 本重複)")
+        all_books = unique_books
+
+    # 保存完整結果
+    save_progress(all_books, COMPLETE_FILE)
+    print(f"   已保存完整結果到 {COMPLETE_FILE}")
+
+    # 發佈書單：以書目資料庫查詢（--no-catalogue 時直接串流各批次的進度日誌），不經過 all_books
+    if args.publish:
+        publish_books_list([batch['progress_file'] for batch in batches], args.publish, catalogue=catalogue)
+    if catalogue is not None:
+        catalogue.close()
+
+    return all_books
@@ -0,0 +1,41 @@
+"""
+書籍去重索引
+以 (書名, 正規化 ISBN) 為鍵的雜湊集合，取代逐筆 any() 線性掃描；
+ISBN 的正規化與 IsbnAudit 共用 isbn.normalize_isbn，去重的鍵與檢查後寫入的 ISBN 一致
+"""
+
+from .isbn import normalize_isbn
+
+
+def book_key(name, isbn):
+    return name.strip(), normalize_isbn(isbn)
+
+
+class BookIndex:
+    """O(1) 判斷書籍是否已存在；由 load_progress 載入的批次建立，之後隨新增一併更新"""
+
+    def __init__(self, books=()):
+        self._keys = set()
+        for book in books:
+            self._keys.add(book_key(book['name'], book['isbn']))
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, book):
+        return book_key(book['name'], book['isbn']) in self._keys
+
+    def add(self, name, isbn):
+        """加入索引；已存在時回傳 False"""
+        key = book_key(name, isbn)
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        return True
+
+
+def dedup_books(books, index=None):
+    """保留第一次出現的書籍，回傳去重後的新清單"""
+    if index is None:
+        index = BookIndex()
+    return [book for book in books if index.add(book['name'], book['isbn'])]
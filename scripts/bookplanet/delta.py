@@ -0,0 +1,208 @@
+"""
+書單差異發佈
+發佈新書單時與上一版以雜湊鍵比對（線性時間），產生 N→N+1 的小型 patch 與 manifest，
+已有第 N 版的使用端只需下載 patch，不必重新下載整份書單：
+  data/delta/manifest.json   目前版本、內容雜湊與可用的 patch 清單
+  data/delta/v{N}-v{N+1}.json  {added, removed, changed}
+內容雜湊與列的順序無關，套用 patch 後可自行驗證結果是否與發佈端一致
+"""
+
+import hashlib
+import json
+import os
+
+from .progress import write_json_atomic
+
+MANIFEST_NAME = 'manifest.json'
+# 只保留最近幾個 patch，版本落後更多的使用端改下載整份書單
+MAX_PATCHES = 30
+
+
+def delta_dir_for(books_list_path):
+    """data/books_list.json → data/delta"""
+    return os.path.join(os.path.dirname(books_list_path), 'delta')
+
+
+def _row_key(name, isbn):
+    return f'{name}\t{isbn}'
+
+
+def _row_digest(name, audience, isbn):
+    return hashlib.sha256(f'{isbn}\t{name}\t{audience}'.encode('utf-8')).digest()
+
+
+def _combine(digests):
+    return hashlib.sha256(b''.join(sorted(digests))).hexdigest()
+
+
+def catalogue_hash(books):
+    """與順序無關的書單雜湊：各列雜湊後排序再整體雜湊"""
+    return _combine(_row_digest(book['書名'], book['適合對象'], book['ISBN']) for book in books)
+
+
+def columns_hash(columns):
+    """與 catalogue_hash 相同，輸入為 load_books_list_columns 的欄位"""
+    return _combine(_row_digest(*row) for row in zip(columns['書名'], columns['適合對象'], columns['ISBN']))
+
+
+class CatalogueHasher:
+    """逐筆累計 catalogue_hash，寫出書單時順便計算，不必再讀一次"""
+
+    def __init__(self):
+        self._digests = []
+
+    def observe(self, record):
+        self._digests.append(_row_digest(record['書名'], record['適合對象'], record['ISBN']))
+
+    def hexdigest(self):
+        return _combine(self._digests)
+
+
+def file_sha256(path):
+    """檔案內容的 sha256（十六進位）"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class CatalogueDiff:
+    """以上一版書單的欄位建立鍵索引，逐筆比對新書單，結束時產生 patch"""
+
+    def __init__(self, previous_columns=None):
+        # (書名, ISBN) → 適合對象清單（同名同 ISBN 可能不只一筆）
+        self._previous = {}
+        columns = previous_columns or {'書名': [], '適合對象': [], 'ISBN': []}
+        for name, audience, isbn in zip(columns['書名'], columns['適合對象'], columns['ISBN']):
+            self._previous.setdefault(_row_key(name, isbn), []).append(audience)
+        self._new_rows = []
+        self.changed = []
+        self._digests = []
+
+    def observe(self, record):
+        """比對一筆新紀錄；同鍵的舊紀錄配對後移出索引"""
+        self._digests.append(_row_digest(record['書名'], record['適合對象'], record['ISBN']))
+        audiences = self._previous.get(_row_key(record['書名'], record['ISBN']))
+        if not audiences:
+            self._new_rows.append(record)
+            return
+        audience = audiences.pop(0)
+        if audience != record['適合對象']:
+            self.changed.append({'書名': record['書名'], 'ISBN': record['ISBN'], '適合對象': record['適合對象']})
+
+    @property
+    def new_hash(self):
+        return _combine(self._digests)
+
+    def finish(self):
+        """回傳 {'added', 'removed', 'changed'}；同書名、ISBN 不同的一增一減視為 ISBN 變更"""
+        removed_by_name = {}
+        for key, audiences in self._previous.items():
+            name, isbn = key.split('\t', 1)
+            for _ in audiences:
+                removed_by_name.setdefault(name, []).append(isbn)
+
+        added = []
+        changed = list(self.changed)
+        for record in self._new_rows:
+            old_isbns = removed_by_name.get(record['書名'])
+            if old_isbns:
+                changed.append({'書名': record['書名'], 'old_ISBN': old_isbns.pop(0),
+                                'ISBN': record['ISBN'], '適合對象': record['適合對象']})
+            else:
+                added.append(record)
+
+        removed = [{'書名': name, 'ISBN': isbn} for name, isbns in removed_by_name.items() for isbn in isbns]
+        return {'added': added, 'removed': removed, 'changed': changed}
+
+
+def apply_patch(books, patch):
+    """把 patch 套用到書單（使用端），回傳新清單；新增的書接在最後"""
+    removed = {}
+    for row in patch['removed']:
+        key = _row_key(row['書名'], row['ISBN'])
+        removed[key] = removed.get(key, 0) + 1
+    changes = {}
+    for row in patch['changed']:
+        changes.setdefault(_row_key(row['書名'], row.get('old_ISBN', row['ISBN'])), []).append(row)
+
+    result = []
+    for book in books:
+        key = _row_key(book['書名'], book['ISBN'])
+        if removed.get(key):
+            removed[key] -= 1
+            continue
+        if changes.get(key):
+            change = changes[key].pop(0)
+            book = {'書名': book['書名'], '適合對象': change['適合對象'], 'ISBN': change['ISBN']}
+        result.append(book)
+    result.extend(patch['added'])
+    return result
+
+
+def load_manifest(delta_dir):
+    path = os.path.join(delta_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"讀取差異 manifest 時發生錯誤，將重新建立: {e}")
+        return None
+
+
+def publish_delta(delta_dir, patch, previous_hash, new_hash, full_path=None):
+    """
+    寫出 patch 並更新 manifest，回傳新的 manifest
+    沒有 manifest 時以上一版為第 1 版；內容沒有變動時不產生新版本
+    """
+    manifest = load_manifest(delta_dir)
+    if manifest is None or manifest.get('sha256') != previous_hash:
+        # 第一次發佈，或書單曾被手動修改：以上一版重新起算，舊的 patch 鏈不再可用
+        version = (manifest or {}).get('version', 0) + 1
+        manifest = {'version': version, 'sha256': previous_hash, 'patches': []}
+
+    if new_hash == manifest['sha256']:
+        print("🧩 書單內容沒有變動，不產生新版本")
+        return manifest
+
+    version = manifest['version']
+    filename = f'v{version}-v{version + 1}.json'
+    patch_path = os.path.join(delta_dir, filename)
+    write_json_atomic(patch_path, dict(patch, **{'from': version, 'to': version + 1,
+                                                 'from_sha256': manifest['sha256'], 'to_sha256': new_hash}),
+                      indent=None)
+
+    patches = manifest['patches'] + [{
+        'from': version,
+        'to': version + 1,
+        'file': filename,
+        'bytes': os.path.getsize(patch_path),
+        'sha256': file_sha256(patch_path),
+        'added': len(patch['added']),
+        'removed': len(patch['removed']),
+        'changed': len(patch['changed']),
+    }]
+    for stale in patches[:-MAX_PATCHES]:
+        stale_path = os.path.join(delta_dir, stale['file'])
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+
+    manifest = {'version': version + 1, 'sha256': new_hash, 'patches': patches[-MAX_PATCHES:]}
+    if full_path:
+        manifest['full'] = os.path.relpath(full_path, delta_dir).replace(os.sep, '/')
+        manifest['full_bytes'] = os.path.getsize(full_path)
+    write_json_atomic(os.path.join(delta_dir, MANIFEST_NAME), manifest)
+
+    print(f"🧩 差異發佈 v{version} → v{version + 1}：新增 {len(patch['added'])}、移除 {len(patch['removed'])}、"
+          f"變更 {len(patch['changed'])}（{filename}，{patches[-1]['bytes']} bytes）")
+    return manifest
+
+
+def patches_since(manifest, version):
+    """使用端：從 version 更新到最新版需要依序下載的 patch；鏈結中斷時回傳 None（改下載整份書單）"""
+    if version == manifest['version']:
+        return []
+    chain = [patch for patch in manifest['patches'] if patch['from'] >= version]
+    if not chain or chain[0]['from'] != version:
+        return None
+    return chain
@@ -0,0 +1,271 @@
+"""
+WebDriver 池
+一次預熱 K 個 Chrome 並租借給各頁面工作，
+瀏覽器處理 M 頁或記憶體超過上限後自動回收重建；chromedriver 路徑快取在磁碟上
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import psutil
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+from .browser_registry import SERVICE_OPTIONS, register_browser, release_browser
+from .http_fetcher import USER_AGENT
+from .metrics import NULL_METRICS
+from .selenium_fetcher import SeleniumBookFetcher
+
+DRIVER_PATH_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'bookplanet', 'chromedriver.json')
+
+CHROME_ARGUMENTS = (
+    '--headless',
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--ignore-ssl-errors',
+    '--ignore-certificate-errors',
+    '--allow-running-insecure-content',
+    '--disable-web-security',
+    '--disable-features=VizDisplayCompositor',
+    '--disable-gpu',
+    '--disable-blink-features=AutomationControlled',
+    f'--user-agent={USER_AGENT}',
+    '--disable-extensions',
+    '--disable-plugins',
+    '--disable-images',
+    '--no-first-run',
+    '--no-default-browser-check',
+    '--disable-default-apps',
+    '--page-load-strategy=eager',
+)
+
+
+def cached_driver_path(cache_file=DRIVER_PATH_CACHE):
+    """取得 chromedriver 路徑；快取有效時不再呼叫 ChromeDriverManager（避免每次連網查詢）"""
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            path = json.load(f).get('path')
+        if path and os.path.isfile(path):
+            return path
+    except (OSError, ValueError):
+        pass
+
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    path = ChromeDriverManager().install()
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump({'path': path}, f)
+    except OSError as e:
+        print(f"警告：無法寫入 chromedriver 路徑快取: {e}")
+    return path
+
+
+def create_chrome_driver():
+    """以爬蟲共用的設定啟動無頭 Chrome；失敗時回傳 None（可在子程序中直接使用）"""
+    chrome_options = Options()
+    for argument in CHROME_ARGUMENTS:
+        chrome_options.add_argument(argument)
+    try:
+        driver = webdriver.Chrome(service=Service(cached_driver_path(), **SERVICE_OPTIONS), options=chrome_options)
+        driver.set_page_load_timeout(20)
+        driver.implicitly_wait(5)
+        return driver
+    except Exception as e:
+        print(f"Chrome driver setup failed: {e}")
+        return None
+
+
+def driver_rss_mb(driver):
+    """計算 chromedriver 及其底下所有 Chrome 程序的 RSS 總和（MB）"""
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        processes = [root] + root.children(recursive=True)
+    except (AttributeError, psutil.Error):
+        return 0.0
+
+    total = 0
+    for proc in processes:
+        try:
+            total += proc.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / 1024 / 1024
+
+
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.retire = False
+
+
+class DriverPool:
+    """預熱並租借 WebDriver，依頁數或 RSS 上限回收"""
+
+    def __init__(self, driver_factory, size=1, max_pages=50, max_rss_mb=800):
+        self.driver_factory = driver_factory
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._all = set()
+        self._reserved = 0
+        self._closed = False
+        self.recycled = 0
+
+    def prewarm(self):
+        """同時啟動 size 個瀏覽器，回傳成功啟動的數量"""
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            drivers = list(executor.map(lambda _: self._create(), range(self.size)))
+        started = 0
+        for entry in drivers:
+            if entry is not None:
+                self._idle.put(entry)
+                started += 1
+        print(f"🚗 WebDriver 池已預熱 {started}/{self.size} 個瀏覽器")
+        return started
+
+    def _create(self):
+        """建立新瀏覽器；池已滿時回傳 None"""
+        with self._lock:
+            if len(self._all) + self._reserved >= self.size:
+                return None
+            self._reserved += 1
+        try:
+            driver = self.driver_factory()
+        finally:
+            with self._lock:
+                self._reserved -= 1
+        if driver is None:
+            return None
+        register_browser(driver)  # 爬蟲異常結束時，殘留的瀏覽器由 browser_registry 回收
+        entry = _PooledDriver(driver)
+        with self._lock:
+            self._all.add(entry)
+        return entry
+
+    def _dispose(self, entry):
+        with self._lock:
+            if entry not in self._all:
+                return  # 已關閉過
+            self._all.discard(entry)
+        try:
+            entry.driver.delete_all_cookies()
+            entry.driver.quit()
+        except Exception as e:
+            reclaimed = release_browser(entry.driver, force=True)
+            print(f"警告：關閉 WebDriver 時發生錯誤: {e}（已強制終止殘留程序，釋放 {reclaimed:.0f}MB）")
+        else:
+            release_browser(entry.driver)
+
+    def _healthy(self, entry):
+        try:
+            return entry.driver.execute_script("return 1;") == 1
+        except Exception:
+            return False
+
+    def _needs_recycle(self, entry):
+        if self.max_pages and entry.pages >= self.max_pages:
+            return f'已處理 {entry.pages} 頁'
+        if self.max_rss_mb:
+            rss = driver_rss_mb(entry.driver)
+            if rss > self.max_rss_mb:
+                return f'RSS {rss:.0f}MB 超過上限 {self.max_rss_mb}MB'
+        return None
+
+    def _acquire(self):
+        """從池中取出健康的瀏覽器，池未滿時補建"""
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                entry = None
+                with self._lock:
+                    can_create = len(self._all) + self._reserved < self.size
+                if can_create:
+                    entry = self._create()
+                    if entry is None and not self._all:
+                        raise RuntimeError('無法初始化Chrome driver')
+                if entry is None:
+                    entry = self._idle.get()
+
+            if self._healthy(entry):
+                return entry
+            print("♻️ WebDriver 健康檢查失敗，重新建立")
+            self._dispose(entry)
+            self.recycled += 1
+
+    @contextmanager
+    def lease(self):
+        """租借一個瀏覽器處理一頁，歸還時檢查是否需要回收"""
+        if self._closed:
+            raise RuntimeError('WebDriver 池已關閉')
+        entry = self._acquire()
+        try:
+            yield entry.driver
+        finally:
+            entry.pages += 1
+            reason = '記憶體控管要求回收' if entry.retire else self._needs_recycle(entry)
+            if reason or self._closed:
+                if reason:
+                    print(f"♻️ 回收 WebDriver：{reason}")
+                    self.recycled += 1
+                self._dispose(entry)
+            else:
+                self._idle.put(entry)
+
+    def recycle(self):
+        """立即關閉閒置的瀏覽器，租借中的在歸還時關閉，之後需要時再重建；回傳立即關閉的數量"""
+        with self._lock:
+            entries = list(self._all)
+        for entry in entries:
+            entry.retire = True
+        closed = 0
+        while True:
+            try:
+                entry = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._dispose(entry)
+            closed += 1
+        self.recycled += closed
+        return closed
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            entries = list(self._all)
+        for entry in entries:
+            self._dispose(entry)
+
+
+class PooledBookFetcher:
+    """每抓一頁向 DriverPool 租借瀏覽器的 fetcher"""
+
+    def __init__(self, pool, **fetcher_options):
+        self.pool = pool
+        self.fetcher_options = fetcher_options
+        self.metrics = fetcher_options.get('metrics') or NULL_METRICS
+        self.last_ready_seconds = None
+
+    def fetch_page(self, lang_code, page):
+        lease_started = time.perf_counter()
+        with self.pool.lease() as driver:
+            self.metrics.record('pool.lease', time.perf_counter() - lease_started)
+            fetcher = SeleniumBookFetcher(driver, **self.fetcher_options)
+            try:
+                return fetcher.fetch_page(lang_code, page)
+            finally:
+                self.last_ready_seconds = fetcher.last_ready_seconds
+
+    def close(self):
+        """瀏覽器由 DriverPool 統一關閉"""
@@ -0,0 +1,143 @@
+"""
+頁面指紋與增量抓取
+為每頁記錄擷取結果的雜湊（以及伺服器提供的 ETag / Last-Modified），
+增量模式下以條件式請求確認頁面是否變動，連續多頁未變動即提前結束
+"""
+
+import hashlib
+import json
+import os
+import time
+from functools import partial
+
+from .metrics import NULL_METRICS
+from .progress import write_json_atomic
+from .retry import RetryExhausted, RetryPolicy
+
+
+def rows_hash(rows):
+    """頁面擷取結果的內容雜湊（順序有意義，BookSort=1 的排序是穩定的）"""
+    payload = json.dumps([[row['name'], row['isbn']] for row in rows], ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class FingerprintStore:
+    """{'lang:page': {'hash', 'count', 'etag', 'last_modified', 'ts'}} 的 JSON 檔"""
+
+    def __init__(self, path):
+        self.path = path
+        self._data = {}
+        self._dirty = False
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"載入頁面指紋時發生錯誤，將重新建立: {e}")
+
+    @staticmethod
+    def _key(lang_code, page):
+        return f'{lang_code}:{page}'
+
+    def get(self, lang_code, page):
+        return self._data.get(self._key(lang_code, page))
+
+    def seed(self, lang_code, page, rows):
+        """以進度日誌中既有的資料建立初始指紋（沒有 ETag / Last-Modified）"""
+        self.update(lang_code, page, rows)
+
+    def update(self, lang_code, page, rows, validators=None):
+        """記錄新指紋，回傳內容是否與上次不同"""
+        key = self._key(lang_code, page)
+        digest = rows_hash(rows)
+        previous = self._data.get(key)
+        changed = previous is None or previous['hash'] != digest
+        validators = validators or {}
+        self._data[key] = {
+            'hash': digest,
+            'count': len(rows),
+            'etag': validators.get('etag'),
+            'last_modified': validators.get('last_modified'),
+            'ts': time.time(),
+        }
+        self._dirty = True
+        return changed
+
+    def save(self):
+        if self._dirty:
+            write_json_atomic(self.path, self._data)
+            self._dirty = False
+
+
+def _unconditional(fetcher, lang_code, page):
+    return fetcher.fetch_page(lang_code, page), None
+
+
+def refresh_pages(fetcher, store, fingerprints, lang_code, pages, stop_after=3, audit=None, metrics=None,
+                  policy=None, dead_letters=None):
+    """
+    依序重新檢查頁面：未變動（304 或內容雜湊相同）就沿用進度日誌中的資料，
+    變動的頁面重新寫入日誌；連續 stop_after 頁未變動即不再檢查已抓過的頁面（0 表示全部檢查），
+    日誌中缺少或先前失敗的頁面則一定會抓取
+    有傳入 audit（IsbnAudit）時，新抓到的列先正規化 ISBN 再比對指紋；
+    每頁依 policy 重試，用盡後記為失敗並放入 dead_letters
+    回傳 (變動頁數, 實際檢查頁數)
+    """
+    metrics = metrics or NULL_METRICS
+    policy = policy or RetryPolicy()
+    conditional = getattr(fetcher, 'fetch_page_conditional', None)
+    changed_pages = 0
+    checked = 0
+    unchanged_run = 0
+    stopped = False
+
+    for page in pages:
+        known_rows = store.page_rows(page)
+        if stopped and known_rows is not None:
+            continue
+        if fingerprints.get(lang_code, page) is None and known_rows is not None:
+            fingerprints.seed(lang_code, page, known_rows)
+        # 日誌中沒有這頁的資料時不能接受 304，必須完整下載
+        previous = fingerprints.get(lang_code, page) if known_rows is not None else None
+        checked += 1
+        metrics.page_started()
+        if conditional and previous:
+            request = partial(conditional, lang_code, page, previous.get('etag'), previous.get('last_modified'))
+        elif conditional:
+            request = partial(conditional, lang_code, page)
+        else:
+            request = partial(_unconditional, fetcher, lang_code, page)
+        try:
+            (rows, validators), retries = policy.call(request, f'第 {page} 頁', metrics)
+        except RetryExhausted as e:
+            print(f'   ⚠️ 第 {page} 頁檢查失敗: {e}')
+            store.record_failure(page, e.error)
+            if dead_letters is not None:
+                dead_letters.add(lang_code, page, e.error, progress_file=store.progress_file)
+            metrics.page_done(lang_code, page, 0, ok=False, retries=e.attempts - 1)
+            unchanged_run = 0
+            continue
+
+        if rows is None:
+            # 304 Not Modified：伺服器確認頁面未變動
+            changed = False
+        else:
+            if audit is not None:
+                rows = audit.normalize_rows(rows)
+            changed = fingerprints.update(lang_code, page, rows, validators)
+            if changed or known_rows is None:
+                with metrics.timer('journal'):
+                    store.record_page(page, rows)
+        metrics.page_done(lang_code, page, len(rows) if rows is not None else 0, ok=True, retries=retries)
+
+        if changed:
+            changed_pages += 1
+            unchanged_run = 0
+            print(f'   🔄 第 {page} 頁有變動' if known_rows is not None else f'   🆕 第 {page} 頁首次抓取')
+        else:
+            unchanged_run += 1
+            if stop_after and unchanged_run >= stop_after and not stopped:
+                stopped = True
+                print(f'   ⏩ 連續 {unchanged_run} 頁未變動，第 {page} 頁之後只補抓缺少或失敗的頁面')
+
+    return changed_pages, checked
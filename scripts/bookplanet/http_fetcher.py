@@ -0,0 +1,249 @@
+"""
+純 HTTP 書單抓取引擎
+不啟動瀏覽器，直接以 keep-alive 連線池下載 BookListTable 頁面並解析書籍列
+若表格內容是 {{...}} 模板，改從頁面內嵌 JSON（或指定的 JSON 端點）取得資料
+"""
+
+import json
+import re
+from html.parser import HTMLParser
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import BOOK_LIST_URL, build_page_url
+from .metrics import NULL_METRICS
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.160 Safari/537.36'
+
+# 表格欄位：第 0 欄為書名，第 3 欄為 ISBN
+NAME_COLUMN = 0
+ISBN_COLUMN = 3
+
+TEMPLATE_KEY_PATTERN = re.compile(r'\{\{\s*(?:[\w$]+\.)*([\w$]+)')
+
+
+class PageParseError(Exception):
+    """頁面內容無法解析成書籍列"""
+
+
+class _TableParser(HTMLParser):
+    """收集 table tbody tr 中每個 td 的純文字與內嵌 script 內容"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self.scripts = []
+        self._tbody_depth = 0
+        self._row = None
+        self._cell = None
+        self._in_script = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'script':
+            self._in_script = True
+            self.scripts.append('')
+        elif tag == 'tbody':
+            self._tbody_depth += 1
+        elif tag == 'tr' and self._tbody_depth:
+            self._row = []
+        elif tag in ('td', 'th') and self._row is not None:
+            self._cell = []
+        elif tag == 'br' and self._cell is not None:
+            self._cell.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag == 'script':
+            self._in_script = False
+        elif tag == 'tbody' and self._tbody_depth:
+            self._tbody_depth -= 1
+        elif tag in ('td', 'th') and self._cell is not None:
+            self._row.append(' '.join(''.join(self._cell).split()))
+            self._cell = None
+        elif tag == 'tr' and self._row is not None:
+            self.rows.append(self._row)
+            self._row = None
+
+    def handle_data(self, data):
+        if self._in_script:
+            self.scripts[-1] += data
+        elif self._cell is not None:
+            self._cell.append(data)
+
+
+def _valid_book(name, isbn):
+    """略過模板變數或空值"""
+    return bool(name and isbn and '{{' not in name and '{{' not in isbn)
+
+
+def extract_books(cells_list):
+    """從表格列（每列為欄位文字清單）取出書名與 ISBN"""
+    books = []
+    for tds in cells_list:
+        if len(tds) >= 4:
+            name = tds[NAME_COLUMN].strip()
+            isbn = tds[ISBN_COLUMN].strip()
+            if _valid_book(name, isbn):
+                books.append({'name': name, 'isbn': isbn})
+    return books
+
+
+def _template_keys(rows):
+    """從模板列（例如 {{item.BookName}}）找出書名與 ISBN 對應的 JSON 欄位名"""
+    for tds in rows:
+        if len(tds) >= 4:
+            name_key = TEMPLATE_KEY_PATTERN.search(tds[NAME_COLUMN])
+            isbn_key = TEMPLATE_KEY_PATTERN.search(tds[ISBN_COLUMN])
+            if name_key and isbn_key:
+                return name_key.group(1), isbn_key.group(1)
+    return None
+
+
+def _iter_record_lists(obj, keys):
+    """遞迴尋找同時含有指定欄位的物件陣列"""
+    if isinstance(obj, list):
+        if obj and all(isinstance(item, dict) for item in obj) and all(k in obj[0] for k in keys):
+            yield obj
+        else:
+            for item in obj:
+                yield from _iter_record_lists(item, keys)
+    elif isinstance(obj, dict):
+        for value in obj.values():
+            yield from _iter_record_lists(value, keys)
+
+
+def _records_to_books(records, name_key, isbn_key):
+    """把 JSON 物件陣列轉成 {'name', 'isbn'} 清單"""
+    books = []
+    for record in records:
+        name = str(record.get(name_key) or '').strip()
+        isbn = str(record.get(isbn_key) or '').strip()
+        if _valid_book(name, isbn):
+            books.append({'name': name, 'isbn': isbn})
+    return books
+
+
+def _find_inline_records(scripts, keys):
+    """在內嵌 script 中尋找書籍 JSON 陣列"""
+    decoder = json.JSONDecoder()
+    for script in scripts:
+        if keys[0] not in script:
+            continue
+        for match in re.finditer(r'\[\s*\{', script):
+            try:
+                obj, _ = decoder.raw_decode(script, match.start())
+            except ValueError:
+                continue
+            for records in _iter_record_lists(obj, keys):
+                return records
+    return None
+
+
+def parse_book_list_html(html):
+    """解析 BookListTable HTML，回傳 ({'name', 'isbn'} 清單, 模板欄位名或 None)"""
+    parser = _TableParser()
+    parser.feed(html)
+    parser.close()
+
+    if not parser.rows:
+        raise PageParseError('頁面中找不到 table tbody tr')
+
+    books = extract_books(parser.rows)
+    if books:
+        return books, None
+
+    # 表格仍是 {{...}} 模板：資料由前端渲染，改找內嵌 JSON
+    keys = _template_keys(parser.rows)
+    if not keys:
+        return [], None
+
+    records = _find_inline_records(parser.scripts, keys)
+    if records is not None:
+        return _records_to_books(records, *keys), keys
+    return [], keys
+
+
+class HttpBookFetcher:
+    """以 requests.Session 連線池抓取書單頁面"""
+
+    def __init__(self, base_url=BOOK_LIST_URL, json_url=None, timeout=(5, 20), pool_size=4, verify=True,
+                 metrics=None):
+        self.base_url = base_url
+        self.json_url = json_url
+        self.timeout = timeout
+        self.metrics = metrics or NULL_METRICS
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept-Language': 'zh-TW,zh;q=0.9,en;q=0.8',
+        })
+        self.session.verify = verify
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def page_url(self, lang_code, page):
+        return build_page_url(lang_code, page, self.base_url)
+
+    def fetch_page(self, lang_code, page):
+        """抓取單頁並回傳 [{'name', 'isbn'}, ...]"""
+        with self.metrics.timer('http.get'):
+            response = self.session.get(self.page_url(lang_code, page), timeout=self.timeout)
+        response.raise_for_status()
+        return self._parse_response(response, lang_code, page)
+
+    def fetch_page_conditional(self, lang_code, page, etag=None, last_modified=None):
+        """
+        條件式請求（If-None-Match / If-Modified-Since）
+        回傳 (rows, {'etag', 'last_modified'})；伺服器回 304 時 rows 為 None
+        """
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        with self.metrics.timer('http.get'):
+            response = self.session.get(self.page_url(lang_code, page), headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            self.metrics.count('not_modified')
+        validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+        if response.status_code == 304:
+            return None, validators
+        response.raise_for_status()
+        return self._parse_response(response, lang_code, page), validators
+
+    def _parse_response(self, response, lang_code, page):
+        with self.metrics.timer('parse'):
+            books, keys = parse_book_list_html(response.text)
+
+        if not books and keys and self.json_url:
+            books = self._fetch_json(lang_code, page, keys)
+
+        if not books and keys:
+            raise PageParseError(
+                f'第 {page} 頁為前端模板 ({keys[0]}/{keys[1]})，且找不到對應的 JSON 資料；'
+                '請以 --json-url 指定 JSON 端點或改用 --engine selenium'
+            )
+        return books
+
+    def _fetch_json(self, lang_code, page, keys):
+        """向模板背後的 JSON 端點取得同一頁資料"""
+        params = {'BookType': 6, 'PlanetLanguage': lang_code, 'BookSort': 1, 'page': page}
+        with self.metrics.timer('http.json'):
+            response = self.session.get(self.json_url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        for records in _iter_record_lists(response.json(), keys):
+            return _records_to_books(records, *keys)
+        return []
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,182 @@
+"""
+ISBN 正規化與檢查
+驗證 ISBN-10 / ISBN-13 檢查碼、互相轉換，區分 978/979 以外的一般 EAN-13 商品碼，
+還原被 Excel 轉成科學記號的數字；一律保留原始值，並統計每次執行的無效與可疑代碼
+"""
+
+import re
+from collections import Counter
+
+# 檢查結果
+STATUS_OK = 'ok'
+STATUS_EAN = 'ean'                # 檢查碼正確，但不是 978/979 開頭的書籍 ISBN（可疑）
+STATUS_SCIENTIFIC = 'scientific'  # 被 Excel 轉成科學記號，位數可能已遺失（可疑）
+STATUS_CHECKSUM = 'checksum'      # 檢查碼錯誤（無效）
+STATUS_FORMAT = 'format'          # 長度或字元不符（無效）
+STATUS_EMPTY = 'empty'            # 空值（無效）
+
+SUSPECT_STATUSES = (STATUS_EAN, STATUS_SCIENTIFIC)
+INVALID_STATUSES = (STATUS_CHECKSUM, STATUS_FORMAT, STATUS_EMPTY)
+
+STATUS_LABELS = {
+    STATUS_EAN: '非 ISBN 的 EAN-13',
+    STATUS_SCIENTIFIC: '科學記號',
+    STATUS_CHECKSUM: '檢查碼錯誤',
+    STATUS_FORMAT: '格式不符',
+    STATUS_EMPTY: '空值',
+}
+
+_NON_ISBN_CHARS = re.compile(r'[^0-9X]')
+_SCIENTIFIC = re.compile(r'^(\d)\.(\d+)E\+(\d+)$')
+_ISBN10 = re.compile(r'^\d{9}[\dX]$')
+_ISBN13 = re.compile(r'^\d{13}$')
+
+# 檢查碼權重（ISBN-10 為 10..2，EAN-13 為 1,3 交錯）
+_ISBN10_WEIGHTS = tuple(range(10, 1, -1))
+_EAN13_WEIGHTS = (1, 3) * 6
+
+
+def isbn10_check_digit(first9):
+    total = sum(weight * int(digit) for weight, digit in zip(_ISBN10_WEIGHTS, first9))
+    check = (11 - total % 11) % 11
+    return 'X' if check == 10 else str(check)
+
+
+def ean13_check_digit(first12):
+    total = sum(weight * int(digit) for weight, digit in zip(_EAN13_WEIGHTS, first12))
+    return str((10 - total % 10) % 10)
+
+
+def isbn10_to_13(isbn10):
+    """ISBN-10 → 978 開頭的 ISBN-13；格式不符時回傳 None"""
+    if len(isbn10) != 10 or not isbn10[:9].isdigit():
+        return None
+    body = '978' + isbn10[:9]
+    return body + ean13_check_digit(body)
+
+
+def isbn13_to_10(isbn13):
+    """978 開頭的 ISBN-13 → ISBN-10；979 與其他 EAN 沒有對應的 ISBN-10，回傳 None"""
+    if len(isbn13) != 13 or not isbn13.isdigit() or not isbn13.startswith('978'):
+        return None
+    body = isbn13[3:12]
+    return body + isbn10_check_digit(body)
+
+
+def _expand_scientific(text):
+    """9.78627E+12 → 9786270000000（與 csv_to_json.ps1 的還原方式相同）；不是科學記號時回傳 None"""
+    match = _SCIENTIFIC.match(text)
+    if not match:
+        return None
+    lead, fraction, exponent = match.group(1), match.group(2), int(match.group(3))
+    zeros = exponent - len(fraction)
+    if zeros >= 0:
+        return lead + fraction + '0' * zeros
+    return str(round(float(text)))
+
+
+def _normalize(raw):
+    """回傳 (正規化後的代碼, 科學記號還原結果或 None)"""
+    text = '' if raw is None else str(raw).strip().upper()
+    if not text:
+        return '', None
+    expanded = _expand_scientific(text.replace(' ', ''))
+    return _NON_ISBN_CHARS.sub('', expanded or text), expanded
+
+
+def normalize_isbn(raw):
+    """
+    去重、比對與查詢共用的正規化：還原科學記號，去掉連字號、空白等非 ISBN 字元（保留檢查碼 X），
+    與 parse_isbn 的 value 相同
+    """
+    return _normalize(raw)[0]
+
+
+def parse_isbn(raw):
+    """
+    檢查單一代碼，回傳 {'raw', 'value', 'isbn13', 'kind', 'status'}：
+    value 為去掉連字號、空白後的代碼（ISBN-10 保留原本的 10 碼），
+    isbn13 為可用於比對的 ISBN-13（一般 EAN 與無效代碼為 None）
+    """
+    text = '' if raw is None else str(raw).strip().upper()
+    result = {'raw': raw, 'value': '', 'isbn13': None, 'kind': None, 'status': STATUS_EMPTY}
+    if not text:
+        return result
+
+    value, expanded = _normalize(text)
+    result['value'] = value
+
+    if _ISBN13.match(value):
+        if ean13_check_digit(value[:12]) != value[12]:
+            result['status'] = STATUS_CHECKSUM
+        elif value.startswith(('978', '979')):
+            result.update(kind='isbn13', isbn13=value, status=STATUS_OK)
+        else:
+            result.update(kind='ean13', status=STATUS_EAN)
+    elif _ISBN10.match(value):
+        if isbn10_check_digit(value[:9]) != value[9]:
+            result['status'] = STATUS_CHECKSUM
+        else:
+            result.update(kind='isbn10', isbn13=isbn10_to_13(value), status=STATUS_OK)
+    else:
+        result['status'] = STATUS_FORMAT
+
+    if expanded is not None:
+        result['status'] = STATUS_SCIENTIFIC
+    return result
+
+
+class IsbnAudit:
+    """在抓取過程中逐列正規化 ISBN，並累計本次執行的檢查結果"""
+
+    def __init__(self, max_examples=5):
+        self.counts = Counter()
+        self.examples = {}
+        self.max_examples = max_examples
+        self._cache = {}
+
+    def check(self, raw):
+        # 同一本書常出現在多頁，相同原始值只檢查一次
+        info = self._cache.get(raw)
+        if info is None:
+            info = self._cache[raw] = parse_isbn(raw)
+        self.counts[info['status']] += 1
+        if info['status'] != STATUS_OK:
+            examples = self.examples.setdefault(info['status'], [])
+            if len(examples) < self.max_examples and raw not in examples:
+                examples.append(raw)
+        return info
+
+    def normalize_rows(self, rows):
+        """回傳 ISBN 已正規化的新列；正規化後與原始值不同時以 isbn_raw 保留原始值"""
+        normalized = []
+        for row in rows:
+            info = self.check(row['isbn'])
+            new_row = {'name': row['name'], 'isbn': info['value'] or row['isbn']}
+            if new_row['isbn'] != row['isbn']:
+                new_row['isbn_raw'] = row['isbn']
+            normalized.append(new_row)
+        return normalized
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    @property
+    def invalid(self):
+        return sum(self.counts[status] for status in INVALID_STATUSES)
+
+    @property
+    def suspect(self):
+        return sum(self.counts[status] for status in SUSPECT_STATUSES)
+
+    def summary(self):
+        return {'total': self.total, 'invalid': self.invalid, 'suspect': self.suspect,
+                'by_status': dict(self.counts), 'examples': self.examples}
+
+    def print_summary(self):
+        print(f"🔎 ISBN 檢查：共 {self.total} 筆，無效 {self.invalid} 筆，可疑 {self.suspect} 筆")
+        for status, label in STATUS_LABELS.items():
+            if self.counts[status]:
+                examples = '、'.join(str(raw) for raw in self.examples.get(status, []))
+                print(f"   {label}：{self.counts[status]} 筆（例：{examples}）")
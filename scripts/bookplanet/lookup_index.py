@@ -0,0 +1,152 @@
+"""
+掃描端 ISBN 查詢索引
+發佈書單時一併預先計算，前端 intelligentBookMatch 改為雜湊查詢，不必每次偵測都線性掃描整份書單：
+  exact      正規化 ISBN（只留數字）→ 列號
+  alias      ISBN-10 ↔ ISBN-13 互轉後的別名 → 列號
+  prefix     去掉最後一位檢查碼的前綴 → 列號（長度相同、只有檢查碼不同）
+  contained  比 ISBN 短 1~2 碼的子字串 → 列號（候選碼被書的 ISBN 包含）
+列號為書單陣列中的位置；同一個鍵只保留第一本。查詢時取 exact、prefix、contained 中列號最小的一本，
+與原本 Array.find 依書單順序取第一本符合任一規則的書相同；alias 是新增的規則，
+只在所有候選碼都以原本的規則找不到時才使用，不改變原本找得到的結果。
+count 與 sha256（書單內容雜湊，與 delta.catalogue_hash 相同）記錄索引對應的書單；
+bin_sha256 為欄式書單 books_list.bin.gz 解壓後內容的雜湊，前端只需對下載的檔案算一次雜湊，
+json_sha256 為 books_list.json 檔案的雜湊，Python 端讀取上一版書單時以兩者確認欄式書單與 JSON 出自同一次發佈
+contained 的鍵數是其他表的好幾倍，因此不寫進索引檔，由 exact 表在第一次查詢時推導（前端同樣延後建立）
+"""
+
+import json
+import os
+import re
+
+from .delta import catalogue_hash, file_sha256
+from .isbn import isbn10_to_13, isbn13_to_10
+
+INDEX_VERSION = 1
+
+_NON_DIGITS = re.compile(r'\D')
+
+
+def digits_only(isbn):
+    """與前端 book.ISBN.replace(/\\D/g, '') 相同的正規化"""
+    return _NON_DIGITS.sub('', str(isbn))
+
+
+def _contained_keys(digits):
+    for cut in (1, 2):
+        length = len(digits) - cut
+        if length <= 0:
+            break
+        for start in range(cut + 1):
+            yield digits[start:start + length]
+
+
+def index_path_for(books_list_path):
+    """data/books_list.json → data/books_list.index.json"""
+    return os.path.splitext(books_list_path)[0] + '.index.json'
+
+
+class LookupIndexBuilder:
+    """依書單順序逐筆加入 ISBN，建立查詢索引"""
+
+    def __init__(self):
+        self.count = 0
+        self.exact = {}
+        self.alias = {}
+        self.prefix = {}
+
+    def add(self, isbn):
+        row = self.count
+        self.count += 1
+        digits = digits_only(isbn)
+        if not digits:
+            return row
+
+        self.exact.setdefault(digits, row)
+        self.prefix.setdefault(digits[:-1], row)
+
+        raw = str(isbn).strip().upper()
+        for alias in (isbn13_to_10(digits), isbn10_to_13(raw.replace('-', ''))):
+            if alias and alias.isdigit() and alias != digits:
+                self.alias.setdefault(alias, row)
+        return row
+
+    def to_dict(self, sha256=None, json_sha256=None, bin_sha256=None):
+        index = {
+            'version': INDEX_VERSION,
+            'count': self.count,
+            'exact': self.exact,
+            'alias': self.alias,
+            'prefix': self.prefix,
+        }
+        for key, value in (('sha256', sha256), ('json_sha256', json_sha256), ('bin_sha256', bin_sha256)):
+            if value:
+                index[key] = value
+        return index
+
+
+def build_lookup_index(isbns):
+    builder = LookupIndexBuilder()
+    for isbn in isbns:
+        builder.add(isbn)
+    return builder.to_dict()
+
+
+def contained_table(index):
+    """由 exact 表推導 contained 表（依列號順序，同鍵保留第一本），結果快取在 index 中"""
+    if 'contained' not in index:
+        contained = {}
+        for digits, row in sorted(index['exact'].items(), key=lambda item: item[1]):
+            for key in _contained_keys(digits):
+                contained.setdefault(key, row)
+        index['contained'] = contained
+    return index['contained']
+
+
+def lookup(index, candidate):
+    """
+    單一候選碼的查詢，結果與前端原本的線性比對相同：完全相同、只差檢查碼、或互相包含（長度差 1~2 碼）
+    的書中列號最小的一本；找不到回傳 None
+    """
+    rows = [index['exact'].get(candidate), index['prefix'].get(candidate[:-1])]
+    # 書的 ISBN 被候選碼包含（候選碼長 1~2 碼）
+    rows.extend(index['exact'].get(key) for key in _contained_keys(candidate))
+    # 候選碼被書的 ISBN 包含（書的 ISBN 長 1~2 碼）
+    rows.append(contained_table(index).get(candidate))
+    return min((row for row in rows if row is not None), default=None)
+
+
+def lookup_alias(index, candidate):
+    """ISBN-10 ↔ ISBN-13 互轉後相同的書；只在所有候選碼以 lookup 都找不到時使用"""
+    return index['alias'].get(candidate)
+
+
+def match_candidates(index, candidates):
+    """依序以 lookup 查詢各候選碼，都找不到時再依序查別名；回傳 (列號, 候選碼)，找不到時列號為 None"""
+    for find in (lookup, lookup_alias):
+        for candidate in candidates:
+            row = find(index, candidate)
+            if row is not None:
+                return row, candidate
+    return None, None
+
+
+def write_lookup_index(index, filename):
+    """以精簡 JSON 寫出索引（tmp 檔 + os.replace）"""
+    tmp = f'{filename}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, filename)
+
+
+def write_index_for_books_list(books_list_path, bin_sha256=None):
+    """為現有的書單檔重建索引，回傳索引檔路徑；bin_sha256 為由同一份 JSON 產生的欄式書單雜湊"""
+    with open(books_list_path, 'r', encoding='utf-8-sig') as f:
+        books = json.load(f)
+    path = index_path_for(books_list_path)
+    builder = LookupIndexBuilder()
+    for book in books:
+        builder.add(book.get('ISBN', ''))
+    write_lookup_index(builder.to_dict(catalogue_hash(books), file_sha256(books_list_path), bin_sha256), path)
+    return path
@@ -0,0 +1,135 @@
+"""
+記憶體控管
+背景執行緒定期取樣 Python 與瀏覽器子程序樹的 RSS 總和；超過軟上限時，抓取迴圈在兩頁之間
+依序執行登記的動作（回收瀏覽器、把暫存的書籍清單交回進度日誌…）直到降回軟上限以下，
+仍超過硬上限則暫停抓取新頁面。每個動作都會記錄執行前後的 RSS 與釋放的記憶體，
+取代原本各處定期呼叫的 gc.collect()
+"""
+
+import threading
+import time
+
+from .metrics import NULL_METRICS, process_rss_mb
+
+
+class MemoryGovernor:
+    """
+    soft_mb：超過時執行回收動作；hard_mb：回收後仍超過則暫停新工作，至多 pause_timeout 秒
+    兩者都是 Python 本身加上 chromedriver/Chrome 子程序樹的 RSS（MB），0 表示不設限
+    """
+
+    def __init__(self, soft_mb=1024, hard_mb=1536, interval=2.0, pause_timeout=60.0, metrics=None):
+        self.soft_mb = soft_mb
+        self.hard_mb = hard_mb
+        self.interval = interval
+        self.pause_timeout = pause_timeout
+        self.metrics = metrics or NULL_METRICS
+        self.current_mb = 0.0
+        self.peak_mb = 0.0
+        self.events = []
+        self._actions = []
+        self._gave_up = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.sample()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def start(self):
+        if self.interval and self._thread is None:
+            self._thread = threading.Thread(target=self._run_sampler, name='memory-governor', daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def add_action(self, name, func, label=None):
+        """
+        登記回收動作，超過軟上限時依登記順序執行；func() 回傳 False 表示目前沒有可回收的
+        name 同時作為指標名稱（governor.<name>），label 用於記錄訊息
+        """
+        self._actions.append((name, label or name, func))
+
+    def remove_action(self, name):
+        self._actions = [action for action in self._actions if action[0] != name]
+
+    # --- 取樣 ---
+
+    def _run_sampler(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        """量測目前的 RSS 總和（MB）"""
+        self.current_mb = sum(process_rss_mb())
+        self.peak_mb = max(self.peak_mb, self.current_mb)
+        return self.current_mb
+
+    # --- 控管 ---
+
+    def checkpoint(self):
+        """抓取迴圈在兩頁之間呼叫；未超過軟上限時只讀取背景執行緒最近一次的取樣"""
+        if not self.soft_mb or self.current_mb <= self.soft_mb:
+            return
+        # 多個工作執行緒同時呼叫時只由一個執行回收，其餘在這裡等待
+        with self._lock:
+            if self.sample() <= self.soft_mb:
+                return
+            for name, label, func in list(self._actions):
+                self._act(name, label, func)
+                if self.current_mb <= self.soft_mb:
+                    return
+        if not self.hard_mb or self.current_mb <= self.hard_mb:
+            self._gave_up = False
+        elif not self._gave_up:
+            self._pause()
+
+    def _act(self, name, label, func):
+        before = self.current_mb
+        started = time.perf_counter()
+        if func() is False:
+            return
+        self.metrics.record(f'governor.{name}', time.perf_counter() - started)
+        self.metrics.count(f'governor.{name}')
+        after = self.sample()
+        self.events.append({'ts': time.time(), 'action': name, 'before_mb': round(before, 1),
+                            'after_mb': round(after, 1)})
+        print(f"🧠 記憶體 {before:.0f}MB 超過軟上限 {self.soft_mb}MB：{label}，"
+              f"釋放 {before - after:.0f}MB（目前 {after:.0f}MB）")
+
+    def _pause(self):
+        before = self.current_mb
+        print(f"⏸️ 記憶體 {before:.0f}MB 超過硬上限 {self.hard_mb}MB，暫停抓取新頁面...")
+        started = time.perf_counter()
+        while self.sample() > self.hard_mb and time.perf_counter() - started < self.pause_timeout:
+            time.sleep(self.interval or 1.0)
+        waited = time.perf_counter() - started
+        self.metrics.record('governor.pause', waited)
+        self.events.append({'ts': time.time(), 'action': 'pause', 'before_mb': round(before, 1),
+                            'after_mb': round(self.current_mb, 1), 'seconds': round(waited, 1)})
+        if self.current_mb > self.hard_mb:
+            # 等待也降不下來（例如記憶體被本程序以外佔用），降回硬上限以下之前不再暫停
+            self._gave_up = True
+            print(f"⚠️ 暫停 {waited:.1f} 秒後仍有 {self.current_mb:.0f}MB，繼續執行")
+        else:
+            print(f"▶️ 暫停 {waited:.1f} 秒後降到 {self.current_mb:.0f}MB，繼續抓取")
+
+    def print_summary(self):
+        """列出執行期間的 RSS 峰值與各動作次數、合計釋放的記憶體"""
+        print(f"🧠 記憶體控管：RSS 峰值 {self.peak_mb:.0f}MB（軟上限 {self.soft_mb or '無'}MB，"
+              f"硬上限 {self.hard_mb or '無'}MB）")
+        totals = {}
+        for event in self.events:
+            count, freed = totals.get(event['action'], (0, 0.0))
+            totals[event['action']] = (count + 1, freed + event['before_mb'] - event['after_mb'])
+        for action, (count, freed) in totals.items():
+            print(f"   {action}：{count} 次，合計釋放 {freed:.0f}MB")
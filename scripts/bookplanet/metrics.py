@@ -0,0 +1,226 @@
+"""
+抓取指標與各階段耗時
+以計時器與計數器記錄每個階段（driver.get、等待、擷取、寫入進度…）與每一頁的耗時，
+背景執行緒定期取樣 RSS；結果逐行寫入 JSONL 執行報告，結束時印出摘要表。
+每次計時只有一次 perf_counter 與一次 list.append，可以常駐開啟
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psutil
+
+
+def percentile(sorted_values, fraction):
+    """最近排名法百分位數；sorted_values 需已排序"""
+    if not sorted_values:
+        return None
+    rank = min(len(sorted_values), max(1, math.ceil(fraction * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+def process_rss_mb():
+    """(本程序 RSS, 子程序樹 RSS 總和)，單位 MB；子程序包含 chromedriver 與 Chrome"""
+    try:
+        process = psutil.Process()
+        own = process.memory_info().rss
+        children = 0
+        for child in process.children(recursive=True):
+            try:
+                children += child.memory_info().rss
+            except psutil.Error:
+                continue
+    except psutil.Error:
+        return 0.0, 0.0
+    return own / 1024 / 1024, children / 1024 / 1024
+
+
+class _NullMetrics:
+    """未啟用指標時使用，所有操作都不做事"""
+
+    @contextmanager
+    def timer(self, stage):
+        yield
+
+    def record(self, stage, seconds):
+        pass
+
+    def count(self, name, amount=1):
+        pass
+
+    def page_started(self):
+        pass
+
+    def page_done(self, lang_code, page, rows=0, ok=True, retries=0):
+        pass
+
+    def merge(self, snapshot):
+        pass
+
+
+NULL_METRICS = _NullMetrics()
+
+
+class RunMetrics:
+    """單次執行的指標；各工作執行緒可同時使用"""
+
+    def __init__(self, report_path=None, rss_interval=5.0):
+        self.report_path = report_path
+        self.rss_interval = rss_interval
+        self.started = time.time()
+        self._clock = time.perf_counter()
+        self._stages = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._report = None
+        self._peak_rss = (0.0, 0.0)
+        self._stop = threading.Event()
+        self._sampler = None
+
+        if report_path:
+            directory = os.path.dirname(report_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._report = open(report_path, 'a', encoding='utf-8')
+            self._write({'type': 'run_start', 'ts': self.started, 'pid': os.getpid()})
+        if rss_interval:
+            self._sampler = threading.Thread(target=self._sample_rss, name='metrics-rss', daemon=True)
+            self._sampler.start()
+
+    # --- 記錄 ---
+
+    @contextmanager
+    def timer(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self._stages.setdefault(stage, []).append(seconds)
+        current = getattr(self._local, 'page', None)
+        if current is not None:
+            current[stage] = current.get(stage, 0.0) + seconds
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def page_started(self):
+        """開始一頁：之後這個執行緒的計時也會計入該頁的明細"""
+        self._local.page = {}
+        self._local.page_started = time.perf_counter()
+
+    def page_done(self, lang_code, page, rows=0, ok=True, retries=0):
+        stages = getattr(self._local, 'page', None) or {}
+        started = getattr(self._local, 'page_started', None)
+        self._local.page = None
+        seconds = time.perf_counter() - started if started is not None else sum(stages.values())
+        self.record('page', seconds)
+        self.count('pages_ok' if ok else 'pages_failed')
+        self.count('rows', rows)
+        if retries:
+            self.count('retries', retries)
+        self._write({'type': 'page', 'ts': time.time(), 'lang': lang_code, 'page': page, 'ok': ok,
+                     'rows': rows, 'retries': retries, 'seconds': round(seconds, 4),
+                     'stages': {stage: round(value, 4) for stage, value in stages.items()}})
+
+    def snapshot(self):
+        """各階段耗時與計數器的複本（可 pickle），多程序分片的工作程序回傳給協調程序以 merge() 併入"""
+        with self._lock:
+            return {'stages': {stage: list(values) for stage, values in self._stages.items()},
+                    'counters': dict(self._counters)}
+
+    def merge(self, snapshot):
+        """併入其他程序的 snapshot()：耗時併入各階段的分佈，計數器相加"""
+        with self._lock:
+            for stage, values in snapshot['stages'].items():
+                self._stages.setdefault(stage, []).extend(values)
+            for name, amount in snapshot['counters'].items():
+                self._counters[name] = self._counters.get(name, 0) + amount
+
+    def _sample_rss(self):
+        while not self._stop.wait(self.rss_interval):
+            self.sample_rss()
+
+    def sample_rss(self):
+        own, children = process_rss_mb()
+        with self._lock:
+            self._peak_rss = (max(self._peak_rss[0], own), max(self._peak_rss[1], children))
+        self._write({'type': 'rss', 'ts': time.time(), 'python_mb': round(own, 1), 'children_mb': round(children, 1)})
+
+    def _write(self, event):
+        if self._report is None:
+            return
+        line = json.dumps(event, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self._report is not None:
+                self._report.write(line)
+
+    # --- 摘要 ---
+
+    def summary(self):
+        elapsed = time.perf_counter() - self._clock
+        with self._lock:
+            stages = {stage: sorted(values) for stage, values in self._stages.items()}
+            counters = dict(self._counters)
+            peak = self._peak_rss
+        pages = counters.get('pages_ok', 0)
+        result = {
+            'elapsed_seconds': round(elapsed, 3),
+            'pages_per_second': round(pages / elapsed, 3) if elapsed else None,
+            'rows_per_page': round(counters.get('rows', 0) / pages, 2) if pages else None,
+            'counters': counters,
+            'peak_python_mb': round(peak[0], 1),
+            'peak_children_mb': round(peak[1], 1),
+            'stages': {},
+        }
+        for stage, values in stages.items():
+            result['stages'][stage] = {
+                'count': len(values),
+                'total': round(sum(values), 4),
+                'p50': round(percentile(values, 0.50), 4),
+                'p95': round(percentile(values, 0.95), 4),
+                'p99': round(percentile(values, 0.99), 4),
+            }
+        return result
+
+    def print_summary(self, summary=None):
+        summary = summary or self.summary()
+        counters = summary['counters']
+        print(f"\n{'='*60}")
+        print("⏱️ 執行指標")
+        print(f"   耗時 {summary['elapsed_seconds']:.1f} 秒，成功 {counters.get('pages_ok', 0)} 頁，"
+              f"失敗 {counters.get('pages_failed', 0)} 頁，重試 {counters.get('retries', 0)} 次")
+        if summary['pages_per_second'] is not None:
+            print(f"   每秒 {summary['pages_per_second']:.2f} 頁，平均每頁 {summary['rows_per_page'] or 0} 列")
+        print(f"   RSS 峰值：Python {summary['peak_python_mb']}MB，瀏覽器等子程序 {summary['peak_children_mb']}MB")
+        if summary['stages']:
+            print(f"   {'階段':<16} {'次數':>6} {'總計(s)':>9} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9}")
+            for stage, stats in sorted(summary['stages'].items(), key=lambda item: -item[1]['total']):
+                print(f"   {stage:<16} {stats['count']:>6} {stats['total']:>9.2f} {stats['p50'] * 1000:>9.1f} "
+                      f"{stats['p95'] * 1000:>9.1f} {stats['p99'] * 1000:>9.1f}")
+
+    def close(self):
+        """停止 RSS 取樣、寫入摘要並印出摘要表，回傳摘要"""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self.sample_rss()
+        summary = self.summary()
+        self._write(dict(summary, type='run_end', ts=time.time()))
+        with self._lock:
+            if self._report is not None:
+                self._report.close()
+                self._report = None
+        self.print_summary(summary)
+        if self.report_path:
+            print(f"   📄 執行報告：{self.report_path}")
+        return summary
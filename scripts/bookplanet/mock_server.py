@@ -0,0 +1,266 @@
+"""
+本機 BookListTable 模擬伺服器
+以 archive/data/progress/ 的封存進度檔合成 BookListTable?PlanetLanguage=&page= 頁面，
+可設定延遲、抖動、錯誤率與前端模板延遲渲染（資料內嵌在頁面或另由 JSON 端點提供），
+讓爬蟲效能可以在本機對固定基準量測，不必連到 read.tn.edu.tw
+"""
+
+import hashlib
+import html
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ARCHIVE_PROGRESS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                    'archive', 'data', 'progress')
+
+# 與爬蟲批次設定相同：(封存檔名, 語言代碼, 起始頁)
+ARCHIVE_BATCHES = [
+    ('zh_books_1_80.json', '1', 1),
+    ('zh_books_81_160.json', '1', 81),
+    ('zh_books_161_242.json', '1', 161),
+    ('en_books.json', '2', 1),
+]
+PAGE_SIZE = 20
+BOOK_LIST_PATH = '/Book/BookListTable'
+# json_endpoint 模式下模板頁背後的資料端點，參數與 BookListTable 相同
+BOOK_LIST_JSON_PATH = '/Book/BookListJson'
+
+_PAGE_HEAD = """<!DOCTYPE html>
+<html lang="zh-Hant">
+<head><meta charset="utf-8"><title>布可星球書單</title></head>
+<body>
+<table class="table">
+<thead><tr><th>書名</th><th>作者</th><th>出版社</th><th>ISBN</th></tr></thead>
+<tbody>
+"""
+
+# 模板模式：表格先輸出 {{...}} 模板列，資料內嵌在 script 中，延遲 render_delay 秒後才由前端渲染
+_TEMPLATE_ROW = ('<tr><td>{{item.BookName}}</td><td>{{item.Author}}</td>'
+                 '<td>{{item.Publisher}}</td><td>{{item.ISBN}}</td></tr>\n')
+_RENDER_SCRIPT = """<script>
+var bookList = %s;
+setTimeout(function () {
+    var tbody = document.querySelector('table tbody');
+    var fields = ['BookName', 'Author', 'Publisher', 'ISBN'];
+    tbody.innerHTML = '';
+    for (var i = 0; i < bookList.length; i++) {
+        var tr = document.createElement('tr');
+        for (var j = 0; j < fields.length; j++) {
+            var td = document.createElement('td');
+            td.textContent = bookList[i][fields[j]];
+            tr.appendChild(td);
+        }
+        tbody.appendChild(tr);
+    }
+}, %d);
+</script>
+"""
+# JSON 端點模式：頁面不內嵌資料，由前端向 JSON 端點取回後渲染
+_FETCH_SCRIPT = """<script>
+fetch('%s' + location.search).then(function (response) { return response.json(); }).then(function (data) {
+    var tbody = document.querySelector('table tbody');
+    var fields = ['BookName', 'Author', 'Publisher', 'ISBN'];
+    tbody.innerHTML = '';
+    for (var i = 0; i < data.Data.length; i++) {
+        var tr = document.createElement('tr');
+        for (var j = 0; j < fields.length; j++) {
+            var td = document.createElement('td');
+            td.textContent = data.Data[i][fields[j]];
+            tr.appendChild(td);
+        }
+        tbody.appendChild(tr);
+    }
+});
+</script>
+"""
+
+
+def load_archive_pages(progress_dir=ARCHIVE_PROGRESS_DIR, page_size=PAGE_SIZE):
+    """把封存進度檔依批次起始頁切成每頁 page_size 列，回傳 {(lang_code, page): [{'name', 'isbn'}]}"""
+    pages = {}
+    for filename, lang_code, start_page in ARCHIVE_BATCHES:
+        path = os.path.join(progress_dir, filename)
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            rows = json.load(f)
+        for offset in range(0, len(rows), page_size):
+            pages[(lang_code, start_page + offset // page_size)] = rows[offset:offset + page_size]
+    return pages
+
+
+def _cell(value):
+    return html.escape(str(value), quote=False)
+
+
+def _records(rows):
+    return [{'BookName': row['name'], 'Author': '', 'Publisher': '', 'ISBN': row['isbn']} for row in rows]
+
+
+def render_page(rows, render_delay=None, json_endpoint=False):
+    """
+    產生一頁 BookListTable HTML；render_delay 不為 None 時改為前端模板頁，
+    json_endpoint 時模板頁不內嵌資料，由前端向 BOOK_LIST_JSON_PATH 取回
+    """
+    parts = [_PAGE_HEAD]
+    if render_delay is None:
+        for row in rows:
+            parts.append(f"<tr><td>{_cell(row['name'])}</td><td></td><td></td><td>{_cell(row['isbn'])}</td></tr>\n")
+        parts.append('</tbody>\n</table>\n')
+    elif json_endpoint:
+        parts.append(_TEMPLATE_ROW)
+        parts.append('</tbody>\n</table>\n')
+        parts.append(_FETCH_SCRIPT % BOOK_LIST_JSON_PATH)
+    else:
+        parts.append(_TEMPLATE_ROW)
+        parts.append('</tbody>\n</table>\n')
+        # </ 轉義避免書名中的 </script> 提前結束 script
+        payload = json.dumps(_records(rows), ensure_ascii=False).replace('</', '<\\/')
+        parts.append(_RENDER_SCRIPT % (payload, int(render_delay * 1000)))
+    parts.append('</body>\n</html>\n')
+    return ''.join(parts).encode('utf-8')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.owner.handle(self)
+
+    def log_message(self, format, *args):
+        pass  # 不逐筆印出請求
+
+
+class MockBookListServer:
+    """
+    在背景執行緒提供 BookListTable 頁面
+    latency ± jitter 秒的回應延遲、error_rate 比例回 503；頁面帶 ETag，可測試條件式請求
+    json_endpoint 時模板頁（render_delay 不為 None）的資料改由 json_url 提供
+    """
+
+    def __init__(self, pages=None, latency=0.0, jitter=0.0, error_rate=0.0, render_delay=None, seed=None,
+                 host='127.0.0.1', port=0, json_endpoint=False):
+        self.pages = load_archive_pages() if pages is None else pages
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.render_delay = render_delay
+        self.json_endpoint = json_endpoint
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._bodies = {}
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'not_modified': 0, 'bytes': 0}
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.owner = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}{BOOK_LIST_PATH}'
+
+    @property
+    def json_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}{BOOK_LIST_JSON_PATH}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='mock-booklist', daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def expected_rows(self, jobs):
+        """指定頁面清單應抓到的列數，供基準驗證結果"""
+        return sum(len(self.pages.get((lang_code, page), ())) for lang_code, page in jobs)
+
+    def _body(self, lang_code, page):
+        """每頁只渲染一次；回傳 (內容, ETag)"""
+        key = (lang_code, page)
+        with self._lock:
+            cached = self._bodies.get(key)
+        if cached is None:
+            body = render_page(self.pages.get(key, []), self.render_delay, self.json_endpoint)
+            cached = (body, '"%s"' % hashlib.sha1(body).hexdigest()[:16])
+            with self._lock:
+                self._bodies[key] = cached
+        return cached
+
+    def _draw(self):
+        with self._random_lock:
+            delay = self.latency + (self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+            failed = self._random.random() < self.error_rate if self.error_rate else False
+        return max(0.0, delay), failed
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def handle(self, request):
+        url = urlparse(request.path)
+        is_json = self.json_endpoint and url.path.endswith(BOOK_LIST_JSON_PATH)
+        if not is_json and not url.path.endswith(BOOK_LIST_PATH):
+            self._send(request, 404, b'not found')
+            return
+        self._count('requests')
+
+        delay, failed = self._draw()
+        if delay:
+            time.sleep(delay)
+        if failed:
+            self._count('errors')
+            self._send(request, 503, b'service unavailable')
+            return
+
+        query = parse_qs(url.query)
+        lang_code = query.get('PlanetLanguage', ['1'])[0]
+        try:
+            page = int(query.get('page', ['1'])[0])
+        except ValueError:
+            self._send(request, 400, b'bad page')
+            return
+
+        if is_json:
+            body = json.dumps({'Data': _records(self.pages.get((lang_code, page), []))}, ensure_ascii=False)
+            body = body.encode('utf-8')
+            self._count('bytes', len(body))
+            self._send(request, 200, body, {'Content-Type': 'application/json; charset=utf-8'})
+            return
+
+        body, etag = self._body(lang_code, page)
+        if request.headers.get('If-None-Match') == etag:
+            self._count('not_modified')
+            self._send(request, 304, b'', {'ETag': etag})
+            return
+        self._count('bytes', len(body))
+        self._send(request, 200, body, {'ETag': etag, 'Content-Type': 'text/html; charset=utf-8'})
+
+    def _send(self, request, status, body, headers=None):
+        try:
+            request.send_response(status)
+            for name, value in (headers or {}).items():
+                request.send_header(name, value)
+            request.send_header('Content-Length', str(len(body)))
+            request.end_headers()
+            if body:
+                request.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 用戶端已放棄這個請求
@@ -0,0 +1,317 @@
+"""
+附加式進度日誌（JSON Lines）
+每抓完一頁附加一行 {"page", "count", "ok", "ts", "rows"}，取代每隔幾頁整份重寫 JSON；
+失敗的頁面也會記錄（ok=false），續傳時只重抓缺少或失敗的頁面；
+fsync 分批進行，背景壓縮重複頁面，壓縮與結束時以 tmp 檔 + os.replace 原子換檔；
+沒有換行結尾的最後一行是寫到一半中斷的殘行，讀取時一律略過，下次附加前先截掉
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+# 行首的頁碼與成功與否，串流時不必解析失敗頁面的整行
+_LINE_HEAD = re.compile(r'^\{"page": (null|\d+), "count": (\d+)(?:, "ok": (true|false))?')
+# 書籍列與錯誤訊息中的引號都會被轉義，完整的一行只會在行首出現一次
+_ENTRY_START = '{"page": '
+
+
+def journal_path_for(progress_file):
+    """zh_books_1_80.json → zh_books_1_80.jsonl"""
+    return os.path.splitext(progress_file)[0] + '.jsonl'
+
+
+def write_json_atomic(filename, data, indent=2):
+    """先寫入暫存檔並 fsync，再原子換檔，寫到一半中斷也不會損毀原檔"""
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f'{filename}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, filename)
+
+
+def _entry_line(entry):
+    # 鍵的順序固定為 page, count, ok，_LINE_HEAD 依賴這個順序
+    line = {
+        'page': entry['page'],
+        'count': entry['count'],
+        'ok': entry.get('ok', True),
+        'ts': entry['ts'],
+        'rows': entry['rows'],
+    }
+    if 'error' in entry:
+        line['error'] = entry['error']
+    return json.dumps(line, ensure_ascii=False) + '\n'
+
+
+class ProgressStore:
+    """單一批次的進度日誌"""
+
+    def __init__(self, progress_file, fsync_every=5, compact_every=50):
+        self.progress_file = progress_file
+        self.path = journal_path_for(progress_file)
+        self.fsync_every = fsync_every
+        self.compact_every = compact_every
+        self._entries = {}
+        self._loaded = False
+        self._dirty = False
+        self._lines = 0
+        self._unsynced = 0
+        self._file = None
+        self._lock = threading.Lock()
+        self._compactor = None
+
+    # --- 讀取 ---
+
+    def page_status(self):
+        """
+        {頁碼: (列數, 是否成功)}；只比對每行開頭的頁碼、列數與成功與否，不解析整行的書籍列。
+        只計入完整寫入的行：沒有換行結尾的殘行，以及殘行後面接上了下一筆（同一行有第二個紀錄開頭）的行都略過，
+        這些頁面視為缺少
+        """
+        pages = {}
+        if not os.path.exists(self.path):
+            return pages
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                match = _LINE_HEAD.match(line)
+                if not match or not line.endswith('\n') or line.find(_ENTRY_START, 1) >= 0:
+                    continue
+                if match.group(1) == 'null':
+                    continue
+                page, count, ok = int(match.group(1)), int(match.group(2)), match.group(3) != 'false'
+                # 已成功的頁面不會被之後的失敗紀錄覆蓋
+                if ok or page not in pages or not pages[page][1]:
+                    pages[page] = (count, ok)
+        return pages
+
+    def _read_entries(self):
+        """逐行解析日誌，略過寫到一半中斷的殘行（沒有換行結尾，或殘行後面接上了下一筆而無法解析）"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def completed_pages(self):
+        """{頁碼: 列數}，只包含成功抓取的頁面"""
+        return {page: count for page, (count, ok) in self.page_status().items() if ok}
+
+    def failed_pages(self):
+        return sorted(page for page, (_, ok) in self.page_status().items() if not ok)
+
+    def missing_pages(self, start_page, end_page):
+        """範圍內尚未成功抓取（缺少或失敗）的頁面"""
+        completed = self.completed_pages()
+        return [page for page in range(start_page, end_page + 1) if page not in completed]
+
+    def _load_legacy(self):
+        """讀取舊版整份 JSON 進度檔"""
+        if not os.path.exists(self.progress_file):
+            return []
+        try:
+            with open(self.progress_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"載入進度時發生錯誤: {e}")
+            return []
+
+    def load(self):
+        """載入日誌並回傳依頁碼排序的書籍清單（可能含跨頁重複，由呼叫端去重）"""
+        self._entries = {}
+        self._lines = 0
+        self._loaded = True
+
+        if os.path.exists(self.path):
+            for entry in self._read_entries():
+                self._lines += 1
+                previous = self._entries.get(entry['page'])
+                if entry.get('ok', True) or previous is None or not previous.get('ok', True):
+                    self._entries[entry['page']] = entry
+            if self._drop_legacy():
+                with self._lock:
+                    self._rewrite()
+        else:
+            legacy = self._load_legacy()
+            if legacy:
+                # 舊版進度沒有頁碼資訊，以 page=null 匯入日誌
+                self._entries[None] = {'page': None, 'count': len(legacy), 'ts': time.time(), 'rows': legacy}
+                self._rewrite()
+
+        return self.books()
+
+    def _drop_legacy(self):
+        """
+        舊版進度（page=null）只在還沒有任何成功的逐頁紀錄時代用：續傳會重抓所有頁面，
+        有了逐頁紀錄後再保留舊資料只會讓網站上已移除的書一直留著，回傳是否有移除
+        """
+        if None not in self._entries:
+            return False
+        if not any(page is not None and entry.get('ok', True) for page, entry in self._entries.items()):
+            return False
+        del self._entries[None]
+        return True
+
+    def books(self):
+        books = []
+        for _, entry in self._sorted_entries():
+            if entry.get('ok', True):
+                books.extend(entry['rows'])
+        return books
+
+    def entries(self):
+        """依頁碼排序的 (頁碼, 紀錄)，每頁只有最新一筆（成功的紀錄不會被之後的失敗覆蓋）"""
+        if not self._loaded:
+            self.load()
+        return self._sorted_entries()
+
+    def iter_rows(self):
+        """逐行串流日誌中成功頁面的列，不把整個批次載入記憶體（重複頁面由呼叫端去重）"""
+        if not os.path.exists(self.path):
+            yield from self._load_legacy()
+            return
+        legacy = None
+        has_pages = False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                match = _LINE_HEAD.match(line)
+                if not match or match.group(3) == 'false' or not line.endswith('\n'):
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry['page'] is None:
+                    legacy = entry['rows']  # 與 load() 相同：沒有逐頁紀錄時才使用
+                    continue
+                has_pages = True
+                yield from entry['rows']
+        if legacy and not has_pages:
+            yield from legacy
+
+    def page_rows(self, page):
+        """已載入日誌中某頁成功抓取的列；沒有紀錄時回傳 None"""
+        if not self._loaded:
+            self.load()
+        entry = self._entries.get(page)
+        if entry is None or not entry.get('ok', True):
+            return None
+        return entry['rows']
+
+    def _sorted_entries(self):
+        return sorted(self._entries.items(), key=lambda item: -1 if item[0] is None else item[0])
+
+    # --- 寫入 ---
+
+    def record_page(self, page, rows):
+        """附加一頁的抓取結果（整頁所有列，不只新書）"""
+        self._append({'page': page, 'count': len(rows), 'ok': True, 'ts': time.time(), 'rows': rows})
+
+    def record_failure(self, page, error):
+        """記錄重試用盡仍失敗的頁面，續傳時會重抓"""
+        self._append({'page': page, 'count': 0, 'ok': False, 'ts': time.time(), 'rows': [], 'error': str(error)})
+
+    def _append(self, entry):
+        if not self._loaded:
+            self.load()
+        page = entry['page']
+        with self._lock:
+            if self._file is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._truncate_torn_tail()
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(_entry_line(entry))
+            self._file.flush()
+            previous = self._entries.get(page)
+            if entry['ok'] or previous is None or not previous.get('ok', True):
+                self._entries[page] = entry
+            self._drop_legacy()  # 檔案中的舊版紀錄在下次壓縮或關閉時移除
+            self._dirty = True
+            self._lines += 1
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every:
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+
+        if self.compact_every and self._lines - len(self._entries) >= self.compact_every:
+            self.compact(background=True)
+
+    def _truncate_torn_tail(self, block_size=65536):
+        """最後一行沒有換行表示上次寫到一半中斷：截到最後一個換行，避免下一筆接在殘行後面一起損毀"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            if end == 0:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b'\n':
+                return
+            while end > 0:
+                start = max(0, end - block_size)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b'\n')
+                if newline >= 0:
+                    f.truncate(start + newline + 1)
+                    return
+                end = start
+            f.truncate(0)
+
+    def compact(self, background=False):
+        """把同一頁的多筆紀錄合併成一行，原子換檔"""
+        if background:
+            if self._compactor and self._compactor.is_alive():
+                return
+            self._compactor = threading.Thread(target=self.compact, name='progress-compact', daemon=True)
+            self._compactor.start()
+            return
+        with self._lock:
+            self._rewrite()
+
+    def _rewrite(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        tmp = f'{self.path}.tmp'
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for _, entry in self._sorted_entries():
+                f.write(_entry_line(entry))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._lines = len(self._entries)
+        self._unsynced = 0
+        self._dirty = False
+
+    def close(self):
+        """等待背景壓縮結束，做最後一次壓縮並關檔"""
+        if self._compactor and self._compactor.is_alive():
+            self._compactor.join()
+        with self._lock:
+            if self._dirty:
+                self._rewrite()
+            elif self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
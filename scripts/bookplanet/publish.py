@@ -0,0 +1,173 @@
+"""
+書單發佈管線
+進度日誌（或書目資料庫查詢）逐頁串流 → 正規化 → 去重 → 補上適合對象 → 逐筆寫入 data/books_list.json，
+全程以產生器串接，記憶體只保留去重用的 ISBN 集合，取代 csv_to_json.ps1 與手動步驟；
+同時在書單旁產生掃描端用的 ISBN 查詢索引（books_list.index.json）與精簡欄式書單（books_list.bin），
+並與上一版比對，於 data/delta/ 發佈差異 patch 與 manifest
+"""
+
+import json
+import os
+
+from .columnar import ColumnarWriter, columnar_path_for, load_books_list_columns
+from .delta import CatalogueDiff, CatalogueHasher, columns_hash, delta_dir_for, file_sha256, publish_delta
+from .isbn import STATUS_OK, IsbnAudit, normalize_isbn
+from .lookup_index import LookupIndexBuilder, index_path_for, write_lookup_index
+from .progress import ProgressStore
+
+BOOKS_LIST_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                               'data', 'books_list.json')
+
+# 與 csv_to_json.ps1 相同：不足 10 碼的代碼不發佈；
+# 其他無效或可疑的代碼仍保留（前端會容忍檢查碼差異與缺碼），只列入統計
+MIN_ISBN_LENGTH = 10
+
+
+def new_stats():
+    return {'read': 0, 'skipped': 0, 'duplicates': 0, 'written': 0}
+
+
+def iter_journal_rows(progress_files, stats=None):
+    """依批次順序串流所有進度日誌中的列"""
+    for progress_file in progress_files:
+        for row in ProgressStore(progress_file).iter_rows():
+            if stats is not None:
+                stats['read'] += 1
+            yield row
+
+
+def iter_catalogue_rows(catalogue, stats=None):
+    """依 (語言, 頁碼, 列) 順序串流書目資料庫中的列（與各批次進度日誌依序串接的順序相同）"""
+    for row in catalogue.iter_rows():
+        if stats is not None:
+            stats['read'] += 1
+        yield row
+
+
+def normalize_rows(rows, stats=None, audit=None):
+    """書名去空白、ISBN 經 parse_isbn 正規化，略過缺書名或 ISBN 不足 10 碼的列"""
+    if audit is None:
+        audit = IsbnAudit()
+    for row in rows:
+        name = str(row.get('name', '')).strip()
+        info = audit.check(row.get('isbn_raw', row.get('isbn', '')))
+        if not name or (info['status'] != STATUS_OK and len(info['value']) < MIN_ISBN_LENGTH):
+            if stats is not None:
+                stats['skipped'] += 1
+            continue
+        yield {'name': name, 'isbn': info['value']}
+
+
+def dedup_by_isbn(rows, stats=None):
+    """同一 ISBN 只保留第一次出現的書（與 csv_to_json.ps1 的去重規則一致）"""
+    seen = set()
+    for row in rows:
+        if row['isbn'] in seen:
+            if stats is not None:
+                stats['duplicates'] += 1
+            continue
+        seen.add(row['isbn'])
+        yield row
+
+
+def load_previous_columns(path=BOOKS_LIST_PATH):
+    """讀取上一版書單的欄位；不存在或無法解析時回傳 None"""
+    if not os.path.exists(path):
+        return None
+    try:
+        return load_books_list_columns(path)
+    except (OSError, ValueError) as e:
+        print(f"讀取現有書單時發生錯誤，適合對象將留空: {e}")
+        return None
+
+
+def load_audience_index(path=BOOKS_LIST_PATH, columns=None):
+    """從現有書單建立 ISBN → 適合對象 對照表（抓取結果沒有這個欄位）"""
+    if columns is None:
+        columns = load_previous_columns(path)
+    if columns is None:
+        return {}
+    return {normalize_isbn(isbn): audience for isbn, audience in zip(columns['ISBN'], columns['適合對象'])}
+
+
+def enrich_rows(rows, audiences):
+    """轉成書單格式 {書名, 適合對象, ISBN}"""
+    for row in rows:
+        yield {'書名': row['name'], '適合對象': audiences.get(row['isbn'], ''), 'ISBN': row['isbn']}
+
+
+def index_records(records, builder, columnar=None, diff=None, hasher=None):
+    """寫出書單的同時以相同列號建立查詢索引與欄式書單、計算內容雜湊，並與上一版比對"""
+    for record in records:
+        builder.add(record['ISBN'])
+        if columnar is not None:
+            columnar.add(record)
+        if diff is not None:
+            diff.observe(record)
+        if hasher is not None:
+            hasher.observe(record)
+        yield record
+
+
+def write_json_stream(records, filename, stats=None):
+    """逐筆寫出 JSON 陣列（寫到暫存檔並 fsync 後原子換檔），回傳寫入筆數"""
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f'{filename}.tmp'
+    written = 0
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write('[')
+            for record in records:
+                item = json.dumps(record, ensure_ascii=False, indent=4).replace('\n', '\n    ')
+                f.write(f'{"," if written else ""}\n    {item}')
+                written += 1
+                if stats is not None:
+                    stats['written'] = written
+            f.write('\n]\n' if written else ']\n')
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, filename)
+    return written
+
+
+def publish_books_list(progress_files, out_path=BOOKS_LIST_PATH, audience_path=None, delta=True, catalogue=None):
+    """由進度日誌（有傳入 catalogue 時改由書目資料庫查詢）產生 books_list.json，回傳各階段統計"""
+    stats = new_stats()
+    audit = IsbnAudit()
+    previous = load_previous_columns(out_path)
+    if audience_path:
+        audiences = load_audience_index(audience_path)
+    else:
+        audiences = load_audience_index(out_path, previous)
+    diff = CatalogueDiff(previous) if delta and previous is not None else None
+
+    if catalogue is not None:
+        rows = iter_catalogue_rows(catalogue, stats)
+    else:
+        rows = iter_journal_rows(progress_files, stats)
+    rows = normalize_rows(rows, stats, audit)
+    rows = dedup_by_isbn(rows, stats)
+    builder = LookupIndexBuilder()
+    columnar = ColumnarWriter()
+    hasher = CatalogueHasher()
+    write_json_stream(index_records(enrich_rows(rows, audiences), builder, columnar, diff, hasher), out_path, stats)
+    bin_sha256 = columnar.write(columnar_path_for(out_path))
+    # 索引最後寫出，記下書單內容、JSON 檔與欄式書單的雜湊，讀取端據此確認三者出自同一次發佈
+    write_lookup_index(builder.to_dict(hasher.hexdigest(), file_sha256(out_path), bin_sha256),
+                       index_path_for(out_path))
+    if diff is not None:
+        publish_delta(delta_dir_for(out_path), diff.finish(), columns_hash(previous), diff.new_hash,
+                      columnar_path_for(out_path))
+
+    print(f"📚 已發佈書單：{out_path}（查詢索引：{index_path_for(out_path)}，欄式書單：{columnar_path_for(out_path)}）")
+    print(f"   讀取 {stats['read']} 列，略過無效 {stats['skipped']} 列，"
+          f"移除重複 {stats['duplicates']} 列，寫入 {stats['written']} 本")
+    audit.print_summary()
+    stats['isbn'] = audit.summary()
+    return stats
@@ -0,0 +1,231 @@
+"""
+共用的重試策略
+所有抓取路徑共用：指數退避加抖動、伺服器持續錯誤時暫停所有請求的斷路器，
+以及重試用盡的頁面所進入的 dead-letter 佇列（執行結束前再重試一輪，仍失敗的逐頁列出，不會默默遺失）
+"""
+
+import os
+import random
+import threading
+import time
+from functools import partial
+
+from .metrics import NULL_METRICS
+from .progress import ProgressStore
+
+
+def status_code(error):
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None)
+
+
+def is_server_error(error):
+    """伺服器或網路錯誤（5xx、429、連線失敗、逾時），會計入斷路器"""
+    status = status_code(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    # requests 的例外都繼承 OSError；selenium 的逾時只能從類別名稱判斷
+    return isinstance(error, OSError) or 'Timeout' in type(error).__name__
+
+
+def is_retryable(error):
+    """429 以外的 4xx 重試也不會成功，直接進入 dead-letter 佇列"""
+    status = status_code(error)
+    return status is None or status == 429 or status >= 500
+
+
+class RetryExhausted(Exception):
+    """重試用盡；error 為最後一次的例外"""
+
+    def __init__(self, error, attempts):
+        super().__init__(str(error))
+        self.error = error
+        self.attempts = attempts
+
+
+class CircuitBreaker:
+    """
+    連續 threshold 次伺服器錯誤後斷路 cooldown 秒，期間所有請求都先等待；
+    恢復後第一個請求仍失敗則以加倍的 cooldown 再次斷路（上限 max_cooldown），成功即復原
+    """
+
+    def __init__(self, threshold=5, cooldown=15.0, max_cooldown=120.0):
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened = 0
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return time.monotonic() < self._open_until
+
+    def wait(self):
+        """斷路中則睡到恢復為止，回傳等待秒數"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                remaining = self._open_until - time.monotonic()
+            if remaining <= 0:
+                return waited
+            time.sleep(remaining)
+            waited += remaining
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+
+    def record_failure(self, error):
+        if not self.threshold or not is_server_error(error):
+            return
+        with self._lock:
+            self.failures += 1
+            if self.failures < self.threshold or time.monotonic() < self._open_until:
+                return
+            cooldown = self.cooldown
+            self._open_until = time.monotonic() + cooldown
+            self.cooldown = min(self.max_cooldown, cooldown * 2)
+            self.opened += 1
+        print(f'   🔌 伺服器連續 {self.failures} 次錯誤，暫停所有請求 {cooldown:.0f} 秒')
+
+
+class RetryPolicy:
+    """指數退避加抖動：第 n 次失敗後等待 min(max_delay, base_delay × 2^(n-1))，再隨機縮短至多 jitter 比例"""
+
+    def __init__(self, max_attempts=4, base_delay=1.0, max_delay=30.0, jitter=0.5, breaker=None, seed=None):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self._random = random.Random(seed)
+
+    def backoff(self, attempt):
+        """第 attempt 次失敗後的等待秒數"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * (1 - self.jitter * self._random.random())
+
+    def call(self, func, label='', metrics=None):
+        """
+        執行 func 直到成功或重試用盡，回傳 (結果, 重試次數)
+        用盡或遇到不可重試的錯誤時拋出 RetryExhausted
+        """
+        metrics = metrics or NULL_METRICS
+        for attempt in range(1, self.max_attempts + 1):
+            waited = self.breaker.wait()
+            if waited:
+                metrics.record('breaker.wait', waited)
+            try:
+                result = func()
+            except Exception as e:
+                self.breaker.record_failure(e)
+                print(f'   ❌ {label}載入失敗 (嘗試 {attempt}/{self.max_attempts}): {e}')
+                if attempt == self.max_attempts or not is_retryable(e):
+                    raise RetryExhausted(e, attempt) from e
+                delay = self.backoff(attempt)
+                print(f'   ⏳ 等待 {delay:.1f} 秒後重試...')
+                with metrics.timer('retry.sleep'):
+                    time.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result, attempt - 1
+
+
+class DeadLetterQueue:
+    """重試用盡的頁面；執行結束前以 retry() 再試一輪"""
+
+    def __init__(self):
+        self._letters = []
+        self._lock = threading.Lock()
+
+    def add(self, lang_code, page, error, **context):
+        with self._lock:
+            self._letters.append(dict(context, lang_code=lang_code, page=page, error=str(error)))
+
+    def __len__(self):
+        return len(self._letters)
+
+    def drain(self):
+        with self._lock:
+            letters, self._letters = self._letters, []
+        return letters
+
+    def retry(self, fetch_page, policy, metrics=None, on_success=None, on_failure=None):
+        """
+        逐頁以 fetch_page(lang_code, page) 重試，回傳成功救回的頁數；仍失敗的頁面放回佇列
+        on_success(letter, rows) / on_failure(letter, error) 由呼叫端寫回進度
+        """
+        letters = self.drain()
+        if not letters:
+            return 0
+        metrics = metrics or NULL_METRICS
+        print(f"\n🔁 重試 {len(letters)} 個先前失敗的頁面...")
+        recovered = 0
+        for letter in letters:
+            lang_code, page = letter['lang_code'], letter['page']
+            metrics.page_started()
+            try:
+                rows, retries = policy.call(partial(fetch_page, lang_code, page), f'第 {page} 頁', metrics)
+            except RetryExhausted as e:
+                metrics.page_done(lang_code, page, 0, ok=False, retries=e.attempts - 1)
+                context = {key: value for key, value in letter.items() if key not in ('lang_code', 'page', 'error')}
+                self.add(lang_code, page, e.error, **context)
+                if on_failure:
+                    on_failure(letter, e.error)
+                continue
+            metrics.page_done(lang_code, page, len(rows), ok=True, retries=retries)
+            recovered += 1
+            print(f'   ✅ 第 {page} 頁重試成功，取得 {len(rows)} 列 (語言代碼: {lang_code})')
+            if on_success:
+                on_success(letter, rows)
+        return recovered
+
+    def print_summary(self):
+        """列出仍失敗的頁面，依進度檔分組"""
+        letters = list(self._letters)
+        if not letters:
+            return
+        print(f"\n⚠️ 仍有 {len(letters)} 頁抓取失敗：")
+        groups = {}
+        for letter in letters:
+            source = letter.get('progress_file')
+            key = (os.path.basename(source) if source else f"語言代碼 {letter['lang_code']}")
+            groups.setdefault(key, []).append(letter)
+        for key, group in groups.items():
+            pages = ', '.join(str(letter['page']) for letter in group)
+            print(f"   {key}：第 {pages} 頁（最後錯誤：{group[-1]['error']}）")
+
+
+def retry_into_journals(dead_letters, fetcher, policy, audit=None, metrics=None):
+    """
+    以 fetcher 重試 dead-letter 頁面並寫回各自的進度日誌（letter 需帶 progress_file），
+    回傳救回的列；仍失敗的頁面記為失敗，下次續傳會重抓
+    """
+    stores = {}
+    recovered = []
+
+    def store_for(letter):
+        progress_file = letter['progress_file']
+        if progress_file not in stores:
+            stores[progress_file] = ProgressStore(progress_file)
+        return stores[progress_file]
+
+    def on_success(letter, rows):
+        if audit is not None:
+            rows = audit.normalize_rows(rows)
+        store_for(letter).record_page(letter['page'], rows)
+        recovered.extend(rows)
+
+    def on_failure(letter, error):
+        store_for(letter).record_failure(letter['page'], error)
+
+    try:
+        dead_letters.retry(fetcher.fetch_page, policy, metrics, on_success, on_failure)
+    finally:
+        for store in stores.values():
+            store.close()
+    return recovered
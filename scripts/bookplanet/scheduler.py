@@ -0,0 +1,135 @@
+"""
+並行頁面排程器
+把所有 (lang_code, page) 工作分配給有上限的工作執行緒池，
+並以全域 token bucket 限速、每個主機同時連線數上限保護學校伺服器
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from . import BOOK_LIST_URL
+from .metrics import NULL_METRICS
+from .retry import RetryExhausted, RetryPolicy
+
+
+class TokenBucket:
+    """執行緒安全的 token bucket：平均每秒 rate 個請求，最多累積 capacity 個"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取得一個 token，不足時睡到補滿為止"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostLimiter:
+    """限制每個主機同時進行中的請求數"""
+
+    def __init__(self, max_per_host):
+        self.max_per_host = max_per_host
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, host):
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.max_per_host)
+                self._semaphores[host] = semaphore
+        with semaphore:
+            yield
+
+
+class PageScheduler:
+    """以工作池抓取多個頁面，每個工作執行緒持有自己的 fetcher"""
+
+    def __init__(self, fetcher_factory, workers=4, rate=2.0, burst=None, max_per_host=4,
+                 policy=None, base_url=BOOK_LIST_URL, metrics=None):
+        self.fetcher_factory = fetcher_factory
+        self.workers = max(1, workers)
+        self.bucket = TokenBucket(rate, burst)
+        self.hosts = HostLimiter(max_per_host)
+        self.host = urlparse(base_url).netloc
+        # 所有工作執行緒共用同一個策略，斷路器因此對整個主機生效
+        self.policy = policy or RetryPolicy()
+        self.metrics = metrics or NULL_METRICS
+        self._local = threading.local()
+        self._fetchers = []
+        self._fetchers_lock = threading.Lock()
+
+    def _fetcher(self):
+        """取得目前執行緒的 fetcher，第一次使用時建立"""
+        fetcher = getattr(self._local, 'fetcher', None)
+        if fetcher is None:
+            fetcher = self.fetcher_factory()
+            if fetcher is None:
+                raise RuntimeError('無法建立 fetcher')
+            self._local.fetcher = fetcher
+            with self._fetchers_lock:
+                self._fetchers.append(fetcher)
+        return fetcher
+
+    def _fetch(self, lang_code, page):
+        """抓取單頁（依重試策略），回傳 (rows, error)"""
+        metrics = self.metrics
+        metrics.page_started()
+
+        def attempt():
+            with metrics.timer('rate.wait'):
+                self.bucket.acquire()
+            with self.hosts.slot(self.host):
+                return self._fetcher().fetch_page(lang_code, page)
+
+        try:
+            rows, retries = self.policy.call(attempt, f'第 {page} 頁', metrics)
+        except RetryExhausted as e:
+            metrics.page_done(lang_code, page, 0, ok=False, retries=e.attempts - 1)
+            return None, e.error
+        metrics.page_done(lang_code, page, len(rows), ok=True, retries=retries)
+        return rows, None
+
+    def run(self, jobs):
+        """依完成順序逐一產出 (lang_code, page, rows, error)，結果在呼叫端執行緒處理"""
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='crawl')
+        try:
+            futures = {
+                executor.submit(self._fetch, lang_code, page): (lang_code, page)
+                for lang_code, page in jobs
+            }
+            for future in as_completed(futures):
+                lang_code, page = futures[future]
+                rows, error = future.result()
+                yield lang_code, page, rows, error
+        finally:
+            # 中斷時取消尚未開始的工作
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.close()
+
+    def close(self):
+        with self._fetchers_lock:
+            fetchers, self._fetchers = self._fetchers, []
+        for fetcher in fetchers:
+            try:
+                fetcher.close()
+            except Exception as e:
+                print(f"警告：關閉 fetcher 時發生錯誤: {e}")
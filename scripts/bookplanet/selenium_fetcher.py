@@ -0,0 +1,130 @@
+"""
+Selenium 書單抓取引擎（備援）
+當頁面必須由瀏覽器執行 JavaScript 才能取得資料時使用
+"""
+
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from . import BOOK_LIST_URL, build_page_url
+from .metrics import NULL_METRICS
+
+# 一次 execute_script 取回整個表格，避免每個儲存格各一次 WebDriver 往返
+# 只回傳欄位數 >= 4 的列：[書名, ISBN]
+EXTRACT_ROWS_SCRIPT = """
+var result = [];
+var rows = document.querySelectorAll('table tbody tr');
+for (var i = 0; i < rows.length; i++) {
+    var tds = rows[i].getElementsByTagName('td');
+    if (tds.length >= 4) {
+        result.push([tds[0].innerText || '', tds[3].innerText || '']);
+    }
+}
+return result;
+"""
+
+
+class table_ready:
+    """
+    WebDriverWait 條件：表格列不再含 {{...}} 模板，且列數連續 stable_polls 次輪詢都沒變
+    成立時回傳最後一次取得的 [書名, ISBN] 列
+    """
+
+    def __init__(self, stable_polls=1):
+        self.stable_polls = stable_polls
+        self.last_count = None
+        self.stable = 0
+        self.rows = []
+
+    def __call__(self, driver):
+        rows = driver.execute_script(EXTRACT_ROWS_SCRIPT) or []
+        self.rows = rows
+
+        if not rows or any('{{' in cell for row in rows for cell in row):
+            self.last_count = None
+            self.stable = 0
+            return False
+
+        if len(rows) == self.last_count:
+            self.stable += 1
+        else:
+            self.last_count = len(rows)
+            self.stable = 0
+        return rows if self.stable >= self.stable_polls else False
+
+
+def wait_for_table_ready(driver, max_wait=5, poll=0.1):
+    """
+    取代固定 time.sleep：模板渲染完成就立即返回
+    回傳 (rows, 耗時秒數, 是否在 max_wait 內就緒)；逾時則回傳當下取得的列
+    """
+    started = time.monotonic()
+    condition = table_ready()
+    try:
+        rows = WebDriverWait(driver, max_wait, poll_frequency=poll).until(condition)
+        ready = True
+    except TimeoutException:
+        rows = condition.rows
+        ready = False
+    return rows, time.monotonic() - started, ready
+
+
+class SeleniumBookFetcher:
+    """以既有的 WebDriver 抓取書單頁面；driver 的生命週期由呼叫端管理"""
+
+    def __init__(self, driver, wait_timeout=15, render_timeout=5, stop_after_page=False, metrics=None,
+                 base_url=BOOK_LIST_URL):
+        self.driver = driver
+        self.wait_timeout = wait_timeout
+        self.render_timeout = render_timeout
+        self.stop_after_page = stop_after_page
+        self.metrics = metrics or NULL_METRICS
+        self.base_url = base_url
+        self.last_ready_seconds = None
+
+    def fetch_page(self, lang_code, page):
+        """抓取單頁並回傳 [{'name', 'isbn'}, ...]"""
+        driver = self.driver
+        metrics = self.metrics
+        with metrics.timer('driver.get'):
+            driver.get(build_page_url(lang_code, page, self.base_url))
+
+        # 等待表格載入
+        with metrics.timer('wait.table'):
+            WebDriverWait(driver, self.wait_timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "table tbody tr"))
+            )
+
+        # 等待模板渲染完成（不再固定 sleep），就緒時一併擷取所有列
+        rows, elapsed, ready = wait_for_table_ready(driver, self.render_timeout)
+        metrics.record('wait.render', elapsed)
+        self.last_ready_seconds = elapsed
+        if ready:
+            print(f'   ⏱️ 第 {page} 頁表格就緒耗時 {elapsed:.2f} 秒')
+        else:
+            print(f'   ⚠️ 第 {page} 頁等待 {elapsed:.1f} 秒仍未完成渲染，以目前內容擷取')
+
+        extract_started = time.perf_counter()
+        books = []
+        for name, isbn in rows:
+            name = name.strip()
+            isbn = isbn.strip()
+
+            # 跳過模板變數或空值
+            if name and isbn and '{{' not in name and '{{' not in isbn:
+                books.append({'name': name, 'isbn': isbn})
+
+        metrics.record('extract', time.perf_counter() - extract_started)
+
+        if self.stop_after_page:
+            # 清理頁面資源
+            driver.execute_script("window.stop();")
+
+        return books
+
+    def close(self):
+        """driver 由呼叫端關閉，這裡不做事"""
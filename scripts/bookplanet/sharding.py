@@ -0,0 +1,254 @@
+"""
+多程序分片抓取
+把各批次尚未完成的頁面切成固定頁數的分片，交給工作程序各自抓取：
+每個工作程序有自己的瀏覽器（或 HTTP 連線）、重試策略與分片進度日誌，
+協調程序把完成的分片逐頁併回批次進度日誌，再經過一般的去重流程產生書單。
+同時進行的分片數受全域記憶體預算限制（psutil 量測），可用記憶體不足時自動減少
+"""
+
+import glob
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import psutil
+
+from . import BOOK_LIST_URL
+from .dedup import dedup_books
+from .metrics import NULL_METRICS, RunMetrics, process_rss_mb
+from .progress import ProgressStore
+from .retry import DeadLetterQueue, RetryExhausted, RetryPolicy
+from .scheduler import TokenBucket
+
+SHARD_DIR = 'shards'
+# 工作程序記憶體的初始估計（MB），之後以實際量到的峰值更新
+WORKER_MEMORY_MB = {'http': 150, 'selenium': 600}
+
+
+def shard_progress_file(progress_file, start_page, end_page):
+    """../進度檔案/zh_books_1_80.json → ../進度檔案/shards/zh_books_1_80.p1-20.json"""
+    directory, filename = os.path.split(progress_file)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, SHARD_DIR, f'{stem}.p{start_page}-{end_page}.json')
+
+
+def leftover_shards(progress_file):
+    """上次中斷時留下、尚未併回的分片進度檔"""
+    directory, filename = os.path.split(progress_file)
+    stem = os.path.splitext(filename)[0]
+    pattern = os.path.join(directory, SHARD_DIR, f'{glob.escape(stem)}.p*.jsonl')
+    return sorted(os.path.splitext(path)[0] + '.json' for path in glob.glob(pattern))
+
+
+def plan_shards(batch, pages, shard_pages=20):
+    """把批次的待抓頁面切成每片至多 shard_pages 頁"""
+    shards = []
+    for offset in range(0, len(pages), max(1, shard_pages)):
+        chunk = pages[offset:offset + shard_pages]
+        shards.append({
+            'batch_progress_file': batch['progress_file'],
+            'progress_file': shard_progress_file(batch['progress_file'], chunk[0], chunk[-1]),
+            'lang_code': batch['lang_code'],
+            'pages': chunk,
+        })
+    return shards
+
+
+class MemoryBudget:
+    """
+    依系統可用記憶體決定可同時執行的工作程序數：
+    所有工作程序的估計用量不超過 budget_mb，且系統至少還剩 reserve_mb
+    """
+
+    def __init__(self, per_worker_mb, budget_mb=None, reserve_mb=1024):
+        self.per_worker_mb = per_worker_mb
+        self.budget_mb = budget_mb
+        self.reserve_mb = reserve_mb
+
+    def available_mb(self):
+        return psutil.virtual_memory().available / 1024 / 1024
+
+    def workers(self, maximum):
+        """目前可同時執行的工作程序數（至少 1）；執行中工作程序已用的記憶體算回可用量"""
+        _, children = process_rss_mb()
+        usable = self.available_mb() + children - self.reserve_mb
+        if self.budget_mb:
+            usable = min(usable, self.budget_mb)
+        return max(1, min(maximum, int(usable // self.per_worker_mb)))
+
+    def observe(self, peak_mb):
+        """以工作程序實際量到的峰值修正估計（只往上調）"""
+        if peak_mb > self.per_worker_mb:
+            self.per_worker_mb = peak_mb
+
+
+def crawl_shard(shard, options):
+    """
+    工作程序：抓取一個分片，結果寫入分片進度日誌（不正規化、不去重，由協調程序處理）
+    回傳 {'progress_file', 'ok', 'failed': {頁碼: 錯誤}, 'peak_mb', 'seconds', 'metrics'}；pages 中已完成的頁面不再重抓
+    options['metrics'] 為真時記錄各頁與各階段耗時，以 RunMetrics.snapshot() 放在 'metrics' 交給協調程序併入
+    """
+    from .driver_pool import DriverPool, PooledBookFetcher, create_chrome_driver
+    from .http_fetcher import HttpBookFetcher
+
+    started = time.perf_counter()
+    base_url = options.get('base_url', BOOK_LIST_URL)
+    policy = RetryPolicy(max_attempts=options.get('max_attempts', 4), base_delay=options.get('retry_delay', 1.0))
+    bucket = TokenBucket(options.get('rate', 0))
+    # 工作程序不寫執行報告也不取樣 RSS（協調程序的取樣已包含工作程序），只累計耗時與計數
+    metrics = RunMetrics(rss_interval=0) if options.get('metrics') else NULL_METRICS
+    store = ProgressStore(shard['progress_file'])
+    pages = [page for page in shard['pages'] if page not in store.completed_pages()]
+
+    pool = None
+    if options.get('engine') == 'selenium':
+        pool = DriverPool(create_chrome_driver, size=1, max_pages=options.get('recycle_pages', 50),
+                          max_rss_mb=options.get('max_browser_rss', 800))
+        fetcher = PooledBookFetcher(pool, render_timeout=options.get('render_timeout', 5), base_url=base_url,
+                                    metrics=metrics)
+    else:
+        fetcher = HttpBookFetcher(base_url=base_url, json_url=options.get('json_url'), metrics=metrics)
+
+    ok = 0
+    failed = {}
+    peak = 0.0
+    try:
+        for page in pages:
+            metrics.page_started()
+            with metrics.timer('rate.wait'):
+                bucket.acquire()
+            try:
+                rows, retries = policy.call(lambda: fetcher.fetch_page(shard['lang_code'], page), f'第 {page} 頁',
+                                            metrics)
+            except RetryExhausted as e:
+                store.record_failure(page, e.error)
+                failed[page] = str(e.error)
+                metrics.page_done(shard['lang_code'], page, 0, ok=False, retries=e.attempts - 1)
+            else:
+                with metrics.timer('journal'):
+                    store.record_page(page, rows)
+                ok += 1
+                metrics.page_done(shard['lang_code'], page, len(rows), ok=True, retries=retries)
+            peak = max(peak, sum(process_rss_mb()))
+    finally:
+        fetcher.close()
+        if pool:
+            pool.close()
+        store.close()
+    return {'progress_file': shard['progress_file'], 'ok': ok, 'failed': failed, 'peak_mb': peak,
+            'seconds': time.perf_counter() - started,
+            'metrics': metrics.snapshot() if metrics is not NULL_METRICS else None}
+
+
+def merge_shard(shard_file, batch_store, audit=None, shard=None, errors=None, dead_letters=None):
+    """
+    把分片進度逐頁併回批次進度日誌後刪除分片檔，回傳併入的頁數
+    有傳入 shard 時，分片中沒有成功的頁面記為失敗並放入 dead_letters
+    """
+    shard_store = ProgressStore(shard_file)
+    completed = shard_store.completed_pages()
+    merged = 0
+    for page in sorted(completed):
+        rows = shard_store.page_rows(page)
+        if audit is not None:
+            rows = audit.normalize_rows(rows)
+        batch_store.record_page(page, rows)
+        merged += 1
+    if shard is not None:
+        for page in shard['pages']:
+            if page in completed:
+                continue
+            error = (errors or {}).get(page, '分片工作程序沒有完成這一頁')
+            batch_store.record_failure(page, error)
+            if dead_letters is not None:
+                dead_letters.add(shard['lang_code'], page, error, progress_file=batch_store.progress_file)
+    shard_store.close()
+    for path in (shard_store.path, shard_file):
+        if os.path.exists(path):
+            os.remove(path)
+    return merged
+
+
+def crawl_sharded(batches, options, processes=2, shard_pages=20, memory_budget=None, audit=None, metrics=None,
+                  dead_letters=None, check_completion=None):
+    """
+    協調程序：以至多 processes 個工作程序抓取所有批次的待抓頁面，回傳各批次去重後的書籍清單
+    options 傳給 crawl_shard（engine、json_url、render_timeout、max_attempts、retry_delay、rate…）
+    check_completion(progress_file, start_page, end_page) 回傳待抓頁面，預設直接查進度日誌
+    """
+    metrics = metrics or NULL_METRICS
+    if dead_letters is None:
+        dead_letters = DeadLetterQueue()
+    if memory_budget is None:
+        memory_budget = MemoryBudget(WORKER_MEMORY_MB.get(options.get('engine'), 150))
+    # 各工作程序自行限速，總和維持在原本的全域速率；有啟用指標時工作程序也記錄，完成後併入 metrics
+    options = dict(options, rate=options.get('rate', 0) / max(1, processes), metrics=metrics is not NULL_METRICS)
+
+    stores = {}
+    pending = deque()
+    for batch in batches:
+        progress_file = batch['progress_file']
+        store = stores[progress_file] = ProgressStore(progress_file)
+        for shard_file in leftover_shards(progress_file):
+            merged = merge_shard(shard_file, store, audit)
+            print(f"🧩 併回上次中斷留下的分片 {os.path.basename(shard_file)}：{merged} 頁")
+        store.close()
+        if check_completion:
+            missing = check_completion(progress_file, batch['start_page'], batch['end_page'])
+        else:
+            missing = store.missing_pages(batch['start_page'], batch['end_page'])
+        pending.extend(plan_shards(batch, missing, shard_pages))
+
+    total = len(pending)
+    print(f"\n{'='*60}")
+    print(f"分片抓取：{total} 個分片，至多 {processes} 個工作程序，"
+          f"每個估計 {memory_budget.per_worker_mb:.0f}MB，目前可用記憶體 {memory_budget.available_mb():.0f}MB")
+
+    started = time.time()
+    running = {}
+    last_limit = processes
+    executor = ProcessPoolExecutor(max_workers=processes)
+    try:
+        while pending or running:
+            # 每次有分片完成就重新評估：可用記憶體不足時少啟動工作程序，恢復後再補上
+            limit = memory_budget.workers(processes)
+            if pending and limit != last_limit:
+                print(f"🧠 可用記憶體 {memory_budget.available_mb():.0f}MB，同時執行的工作程序調整為 {limit} 個")
+                last_limit = limit
+            while pending and len(running) < limit:
+                shard = pending.popleft()
+                running[executor.submit(crawl_shard, shard, options)] = shard
+
+            done, _ = wait(running, timeout=5, return_when=FIRST_COMPLETED)
+            for future in done:
+                shard = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # 工作程序異常結束：已寫入分片日誌的頁面照常併回，其餘頁面進入 dead-letter
+                    print(f"   ❌ 分片 {os.path.basename(shard['progress_file'])} 的工作程序失敗: {e}")
+                    result = {'ok': 0, 'failed': {page: str(e) for page in shard['pages']}, 'peak_mb': 0.0,
+                              'seconds': 0.0, 'metrics': None}
+                memory_budget.observe(result['peak_mb'])
+                with metrics.timer('shard.merge'):
+                    merged = merge_shard(shard['progress_file'], stores[shard['batch_progress_file']], audit, shard,
+                                         result['failed'], dead_letters)
+                if result['metrics']:
+                    # 各頁的成功、失敗、列數與各階段耗時由工作程序記錄
+                    metrics.merge(result['metrics'])
+                else:
+                    # 工作程序異常結束，沒有指標可併入：只依併回的結果計數
+                    metrics.count('pages_ok', merged)
+                    metrics.count('pages_failed', len(shard['pages']) - merged)
+                metrics.record('shard', result['seconds'])
+                finished = total - len(pending) - len(running)
+                print(f"   ✅ 分片 {finished}/{total}：{os.path.basename(shard['progress_file'])} "
+                      f"成功 {merged} 頁，失敗 {len(shard['pages']) - merged} 頁，峰值 {result['peak_mb']:.0f}MB")
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        for store in stores.values():
+            store.close()
+        print(f"⏱️ 分片抓取耗時 {time.time() - started:.1f} 秒")
+
+    return [dedup_books(ProgressStore(batch['progress_file']).load()) for batch in batches]
@@ -0,0 +1,288 @@
+"""
+Google Sheets ISBN 比對與更新
+先以書名索引算出所有差異，再用少數幾次 batch_update 寫回（取代逐格 update_cell + sleep）；
+書名對不上的列改以正規化書名的 n-gram 索引模糊比對，只自動修正可確定的，其餘列出候選供人工確認；
+工作表內容快照在本機，試算表的最後修改時間沒變就直接沿用，有變動時也只讀取書名與 ISBN 兩欄
+"""
+
+import json
+import random
+import time
+
+import gspread
+from gspread.exceptions import APIError
+from gspread.utils import rowcol_to_a1
+
+from .progress import write_json_atomic
+from .title_match import AUTO_SCORE, REPORT_SCORE, TitleIndex, classify_match, normalize_title
+
+# Sheets API 可重試的狀態碼（配額用盡 / 暫時性錯誤）
+RETRYABLE_STATUS = {429, 500, 502, 503}
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+CREDENTIALS_FILE = 'myapikey.json'
+SHEET_URL = 'https://docs.google.com/spreadsheets/d/1BhstIJ_z6S0Yzxbn4kTUnF5miTdZAhQebiG-F_vztDQ/edit?usp=sharing'
+SNAPSHOT_FILE = '../進度檔案/sheet_snapshot.json'
+# 比對只需要這兩欄
+SHEET_COLUMNS = ('書名', 'ISBN')
+
+
+def open_sheet(credentials_file=CREDENTIALS_FILE, url=SHEET_URL):
+    """以服務帳戶憑證開啟書單工作表；只在真的要讀寫 Sheets 時呼叫（會連網）"""
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    creds = ServiceAccountCredentials.from_json_keyfile_name(credentials_file, SCOPE)
+    return gspread.authorize(creds).open_by_url(url).sheet1
+
+
+def index_books_by_name(all_books):
+    """書名 → 書籍；同名時保留第一筆（與原本 next(...) 行為一致）"""
+    index = {}
+    for book in all_books:
+        index.setdefault(book['name'], book)
+    return index
+
+
+def sheet_rows(all_records):
+    """逐列產生 (工作表列號, 書名, 原 ISBN)；單一紀錄格式有誤時印出警告並略過，不中斷整次同步"""
+    for i, record in enumerate(all_records):
+        try:
+            yield i + 2, str(record['書名']), str(record['ISBN']).strip()
+        except Exception as e:
+            print(f"處理第 {i + 2} 列時發生錯誤，已略過: {e}")
+
+
+def plan_isbn_updates(all_records, all_books):
+    """比對 Sheets 紀錄與抓取結果，回傳需要修正的差異清單"""
+    books_by_name = index_books_by_name(all_books)
+    changes = []
+    for row, book_name, old_isbn in sheet_rows(all_records):
+        match = books_by_name.get(book_name)
+        if match and match['isbn'] != old_isbn:
+            changes.append({'row': row, 'name': book_name, 'old': old_isbn, 'new': match['isbn']})
+    return changes
+
+
+def plan_fuzzy_updates(all_records, books_by_name, review=None, auto_score=AUTO_SCORE, k=3):
+    """
+    書名沒有完全相同的紀錄改以 n-gram 索引模糊比對：可確定的差異以 match='fuzzy' 回傳，
+    其餘相似度達 REPORT_SCORE 的候選放入 review（只列出，不寫入）
+    """
+    unmatched = [(row, title, old_isbn) for row, title, old_isbn in sheet_rows(all_records)
+                 if title not in books_by_name and normalize_title(title)]
+    if not unmatched:
+        return []
+    index = TitleIndex(books_by_name.values())
+    changes = []
+    for row, title, old_isbn in unmatched:
+        candidates = [(score, book) for score, book in index.search(title, k) if score >= REPORT_SCORE]
+        if not candidates or candidates[0][1]['isbn'] == old_isbn:
+            continue
+        score, book = candidates[0]
+        accepted, reason = classify_match(title, candidates, auto_score)
+        if accepted:
+            changes.append({'row': row, 'name': title, 'old': old_isbn, 'new': book['isbn'],
+                            'match': 'fuzzy', 'matched_name': book['name'], 'score': round(score, 3)})
+        elif review is not None:
+            review.append({'row': row, 'name': title, 'old': old_isbn, 'reason': reason,
+                           'candidates': [{'name': other['name'], 'isbn': other['isbn'], 'score': round(value, 3)}
+                                          for value, other in candidates]})
+    return changes
+
+
+def print_changes(changes):
+    for change in changes:
+        print(f'🔧 修正: {change["name"]}')
+        if change.get('match') == 'fuzzy':
+            print(f'     模糊比對: {change["matched_name"]}（相似度 {change["score"]:.2f}）')
+        print(f'     原ISBN: {change["old"]}')
+        print(f'     新ISBN: {change["new"]}')
+
+
+def print_review(review):
+    """列出相似度不足以自動修正的書名候選，供人工確認"""
+    if not review:
+        return
+    print(f'\n🔎 {len(review)} 本書名對不上且相似度不足以自動修正，請人工確認（未寫入）：')
+    for item in review:
+        print(f'   第 {item["row"]} 列「{item["name"]}」（ISBN {item["old"] or "空白"}）：{item["reason"]}')
+        for candidate in item['candidates']:
+            print(f'     {candidate["score"]:.2f}  {candidate["name"]}  {candidate["isbn"]}')
+
+
+def _status_code(error):
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None)
+
+
+def batch_update_with_backoff(sheet, data, max_retries=6, base_delay=2, max_delay=64):
+    """batch_update 遇到配額限制時以指數退避（含抖動）重試"""
+    for attempt in range(max_retries + 1):
+        try:
+            return sheet.batch_update(data, value_input_option='USER_ENTERED')
+        except APIError as e:
+            if _status_code(e) not in RETRYABLE_STATUS or attempt == max_retries:
+                raise
+            delay = min(max_delay, base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+            print(f'   ⏳ Sheets API 回應 {_status_code(e)}，{delay:.1f} 秒後重試 ({attempt + 1}/{max_retries})')
+            time.sleep(delay)
+
+
+def apply_isbn_updates(sheet, changes, isbn_col, chunk_size=500):
+    """把差異分批寫回 ISBN 欄，回傳寫入筆數"""
+    written = 0
+    for start in range(0, len(changes), chunk_size):
+        chunk = changes[start:start + chunk_size]
+        data = [{'range': rowcol_to_a1(change['row'], isbn_col), 'values': [[change['new']]]} for change in chunk]
+        batch_update_with_backoff(sheet, data)
+        written += len(chunk)
+        print(f'   💾 已寫入 {written}/{len(changes)} 筆')
+    return written
+
+
+def sheet_revision(sheet):
+    """試算表在 Drive 上的最後修改時間；取不到時回傳 None（不使用快照）"""
+    spreadsheet = sheet.spreadsheet
+    try:
+        if hasattr(spreadsheet, 'get_lastUpdateTime'):
+            return spreadsheet.get_lastUpdateTime()
+        return spreadsheet.lastUpdateTime  # 舊版 gspread
+    except Exception as e:
+        print(f"警告：無法取得試算表修改時間，略過快照: {e}")
+        return None
+
+
+def _snapshot_key(sheet):
+    return f'{sheet.spreadsheet.id}/{sheet.id}'
+
+
+def load_snapshot(snapshot_file, sheet, revision):
+    """快照屬於同一張工作表且修改時間相同時回傳 (records, header)，否則回傳 None"""
+    if not snapshot_file or revision is None:
+        return None
+    try:
+        with open(snapshot_file, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if snapshot.get('sheet') != _snapshot_key(sheet) or snapshot.get('revision') != revision:
+        return None
+    columns = snapshot['columns']
+    records = [dict(zip(columns, row)) for row in snapshot['rows']]
+    return records, snapshot['header']
+
+
+def save_snapshot(snapshot_file, sheet, revision, records, header):
+    if not snapshot_file or revision is None:
+        return
+    try:
+        write_json_atomic(snapshot_file, {
+            'sheet': _snapshot_key(sheet),
+            'revision': revision,
+            'header': header,
+            'columns': list(SHEET_COLUMNS),
+            'rows': [[record[column] for column in SHEET_COLUMNS] for record in records],
+        })
+    except OSError as e:
+        print(f"警告：無法寫入工作表快照: {e}")
+
+
+def _cell_text(value):
+    """未格式化的儲存格值轉成字串：數字 ISBN 9789573317241 不會變成科學記號或帶 .0"""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def fetch_sheet_records(sheet, columns=SHEET_COLUMNS):
+    """
+    只讀取需要的欄位：先讀標題列找出欄號，再以一次 batch_get 取回各欄
+    以 UNFORMATTED_VALUE 讀取原始值（與 get_all_records 相同），不受儲存格的數字格式影響
+    回傳 (records, header)；records 第 i 筆對應工作表第 i + 2 列，header 為 欄名 → 欄號
+    """
+    header = {}
+    for col, name in enumerate(sheet.row_values(1), start=1):
+        name = str(name).strip()
+        if name and name not in header:
+            header[name] = col
+    missing = [name for name in columns if name not in header]
+    if missing:
+        raise ValueError(f"工作表缺少欄位：{', '.join(missing)}")
+
+    ranges = []
+    for name in columns:
+        letter = rowcol_to_a1(1, header[name]).rstrip('0123456789')
+        ranges.append(f'{letter}2:{letter}')
+    values = sheet.batch_get(ranges, value_render_option='UNFORMATTED_VALUE')
+    # 每欄的長度到該欄最後一個非空白儲存格為止，空白儲存格為 []
+    row_count = max((len(column) for column in values), default=0)
+    records = []
+    for i in range(row_count):
+        record = {}
+        for name, column in zip(columns, values):
+            cells = column[i] if i < len(column) else []
+            record[name] = _cell_text(cells[0]) if cells else ''
+        records.append(record)
+    return records, header
+
+
+def load_sheet_records(sheet, snapshot_file=SNAPSHOT_FILE):
+    """工作表沒有變動時直接讀本機快照，否則只讀取書名與 ISBN 兩欄並更新快照；回傳 (records, header, revision)"""
+    started = time.perf_counter()
+    revision = sheet_revision(sheet)
+    cached = load_snapshot(snapshot_file, sheet, revision)
+    if cached is not None:
+        records, header = cached
+        print(f'📋 Google Sheets 自上次讀取後沒有變動，使用本機快照（{len(records)} 列，'
+              f'{time.perf_counter() - started:.2f} 秒）')
+        return records, header, revision
+
+    records, header = fetch_sheet_records(sheet)
+    save_snapshot(snapshot_file, sheet, revision, records, header)
+    print(f'📋 已讀取 Google Sheets 的書名與 ISBN 欄（{len(records)} 列，{time.perf_counter() - started:.2f} 秒）')
+    return records, header, revision
+
+
+def update_sheet(sheet, all_books, dry_run=False, snapshot_file=SNAPSHOT_FILE, catalogue=None, fuzzy=True,
+                 auto_score=AUTO_SCORE):
+    """
+    更新Google Sheets；dry_run 時只列出差異不寫入；snapshot_file 為 None 時每次都重新讀取工作表
+    有傳入 catalogue（書目資料庫）時以查詢比對，all_books 可為 None
+    fuzzy 時書名對不上的列再做模糊比對，相似度達 auto_score 且可區分的才修正，其餘只列出
+    """
+    print(f"\n{'='*60}")
+    print("開始更新Google Sheets..." if not dry_run else "比對Google Sheets（dry-run，不寫入）...")
+
+    all_records, header, revision = load_sheet_records(sheet, snapshot_file)
+    isbn_col = header['ISBN']
+
+    if catalogue is not None:
+        print(f'📋 以書目資料庫（{len(catalogue)} 列）比對 {len(all_records)} 本Sheets中的書籍...')
+        changes = catalogue.plan_isbn_updates(all_records)
+    else:
+        print(f'📋 比對 {len(all_books)} 本抓取的書籍和 {len(all_records)} 本Sheets中的書籍...')
+        changes = plan_isbn_updates(all_records, all_books)
+    review = []
+    if fuzzy:
+        started = time.perf_counter()
+        books_by_name = index_books_by_name(catalogue.iter_rows() if catalogue is not None else all_books)
+        fuzzy_changes = plan_fuzzy_updates(all_records, books_by_name, review, auto_score)
+        print(f'🔤 模糊比對書名：修正 {len(fuzzy_changes)} 本，待確認 {len(review)} 本'
+              f'（{time.perf_counter() - started:.2f} 秒）')
+        changes = sorted(changes + fuzzy_changes, key=lambda change: change['row'])
+    print_changes(changes)
+    print_review(review)
+
+    if dry_run:
+        print(f'\n📝 dry-run：共有 {len(changes)} 本書的ISBN需要修正，未寫入')
+        return changes
+
+    if changes:
+        apply_isbn_updates(sheet, changes, isbn_col)
+        # 寫入後的修改時間分不出讀取到寫入之間有沒有別人編輯：快照仍記在讀取時的修改時間，
+        # 與寫入後的不同，下次執行會重新讀取，不會把別人的修改藏在快照後面
+        for change in changes:
+            all_records[change['row'] - 2]['ISBN'] = change['new']
+        save_snapshot(snapshot_file, sheet, revision, all_records, header)
+
+    print(f'\n✅ Google Sheets更新完成！總共修正了 {len(changes)} 本書的ISBN')
+    return changes
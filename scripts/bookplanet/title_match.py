@@ -0,0 +1,97 @@
+"""
+書名模糊比對
+Sheets 與抓取結果的書名常只差在全形/半形標點、書名號（《》〈〉）、[中學生] 之類的標籤或空白。
+先把書名正規化，再以字元 n-gram 倒排索引找出共用最多 n-gram 的候選書名，依 Dice 係數排序取前 k 名；
+只比對和查詢書名有共用 n-gram 的書，不必逐一計算編輯距離
+"""
+
+import heapq
+import re
+import unicodedata
+
+# NFKC 之後全形［］已轉成半形，【】沒有半形
+_TAGS = re.compile(r'\[[^\]]*\]|【[^】]*】')
+_DIGITS = re.compile(r'\d+')
+
+# 與書名相同（正規化後）視為確定；其他候選依分數與是否和次佳候選明顯拉開距離判斷
+AUTO_SCORE = 0.9
+REPORT_SCORE = 0.5
+MIN_MARGIN = 0.1
+
+
+def normalize_title(title):
+    """全形轉半形、轉小寫，去掉 [中學生] 等標籤，以及所有標點、符號與空白（書名號內的文字保留）"""
+    text = unicodedata.normalize('NFKC', str(title)).lower()
+    untagged = _TAGS.sub('', text)
+    if untagged.strip():
+        text = untagged  # 整個書名都在括號裡時保留括號內的文字
+    return ''.join(ch for ch in text if unicodedata.category(ch)[0] not in 'PSZC')
+
+
+def title_grams(text, n=2):
+    """正規化書名的字元 n-gram 集合；比 n 短的書名以整個書名為一個 gram"""
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class TitleIndex:
+    """
+    抓取書名的 n-gram 倒排索引；books 為 {'name', 'isbn'} 清單，正規化後同名的書只保留第一筆
+    （與 sheets.index_books_by_name 的同名規則相同）
+    """
+
+    def __init__(self, books, n=2):
+        self.n = n
+        self.books = []
+        self._grams = []
+        self._exact = {}
+        self._postings = {}
+        for book in books:
+            title = normalize_title(book['name'])
+            if not title or title in self._exact:
+                continue
+            book_id = len(self.books)
+            grams = title_grams(title, n)
+            self._exact[title] = book_id
+            self.books.append(book)
+            self._grams.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(book_id)
+
+    def __len__(self):
+        return len(self.books)
+
+    def search(self, title, k=3):
+        """回傳最多 k 個 (分數, 書籍)，分數為 n-gram 集合的 Dice 係數，正規化後相同為 1.0"""
+        text = normalize_title(title)
+        exact = self._exact.get(text)
+        grams = title_grams(text, self.n)
+        shared = {}
+        for gram in grams:
+            for book_id in self._postings.get(gram, ()):
+                shared[book_id] = shared.get(book_id, 0) + 1
+        size = len(grams)
+        # 同分時正規化後相同的書名優先，其次是先出現的書
+        best = heapq.nlargest(k, shared.items(),
+                              key=lambda item: (2 * item[1] / (size + self._grams[item[0]]), item[0] == exact,
+                                                -item[0]))
+        return [(2 * count / (size + self._grams[book_id]), self.books[book_id]) for book_id, count in best]
+
+
+def classify_match(title, candidates, auto_score=AUTO_SCORE, min_margin=MIN_MARGIN):
+    """
+    判斷最佳候選能否自動採用：分數達 auto_score、書名中的數字（集數、冊數）相同，
+    且與 ISBN 不同的次佳候選至少相差 min_margin；回傳 (是否採用, 原因)
+    """
+    if not candidates:
+        return False, '沒有候選'
+    score, book = candidates[0]
+    if score < auto_score:
+        return False, f'相似度 {score:.2f} 低於 {auto_score}'
+    if _DIGITS.findall(normalize_title(title)) != _DIGITS.findall(normalize_title(book['name'])):
+        return False, '書名中的數字不同（可能是不同集數）'
+    for other_score, other in candidates[1:]:
+        if other['isbn'] != book['isbn'] and score - other_score < min_margin:
+            return False, f'與「{other["name"]}」（{other_score:.2f}）難以區分'
+    return True, None
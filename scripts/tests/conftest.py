@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 測試直接匯入 scripts/ 底下的 bookplanet 套件（與 benchmarks 相同）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
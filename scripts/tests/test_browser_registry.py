@@ -0,0 +1,85 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import psutil
+import pytest
+
+from bookplanet.browser_registry import SERVICE_OPTIONS, reap_orphans, register_browser, registered_browsers
+
+pytestmark = pytest.mark.skipif(os.name != 'posix', reason='程序群組只在 Linux/macOS 上使用')
+
+
+class FakeDriver:
+    """只有 service.process 的 WebDriver 替身"""
+
+    def __init__(self, process):
+        self.service = type('Service', (), {'process': process})()
+
+
+@pytest.fixture
+def fake_browser():
+    # 以新 session 啟動的 sh 代替 chromedriver，背景的 sleep 代替 Chrome
+    process = subprocess.Popen(['sh', '-c', 'sleep 60 & wait'], **SERVICE_OPTIONS['popen_kw'])
+    deadline = time.time() + 5
+    while not psutil.Process(process.pid).children() and time.time() < deadline:
+        time.sleep(0.01)
+    yield process
+    if process.poll() is None:
+        os.killpg(process.pid, 9)
+    process.wait()
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def register_as_orphan(driver, registry_dir):
+    entry = register_browser(driver, registry_dir=registry_dir)
+    # 假裝啟動它的爬蟲已結束
+    entry.update(owner_pid=dead_pid(), owner_started=None)
+    with open(os.path.join(registry_dir, f"{entry['driver_pid']}.json"), 'w', encoding='utf-8') as f:
+        json.dump(entry, f)
+    return entry
+
+
+def test_live_owner_is_not_reaped(fake_browser, tmp_path):
+    registry_dir = str(tmp_path)
+    entry = register_browser(FakeDriver(fake_browser), registry_dir=registry_dir)
+    assert entry['pgid'] == fake_browser.pid and len(entry['browser_pids']) == 1
+    assert reap_orphans(registry_dir, timeout=1)['browsers'] == 0
+    assert fake_browser.poll() is None
+
+
+def test_orphan_group_is_killed_and_entry_removed(fake_browser, tmp_path):
+    registry_dir = str(tmp_path)
+    entry = register_as_orphan(FakeDriver(fake_browser), registry_dir)
+    browser = psutil.Process(entry['browser_pids'][0])
+
+    result = reap_orphans(registry_dir, dry_run=True, timeout=1)
+    assert (result['browsers'], result['processes']) == (1, 2)
+    assert fake_browser.poll() is None and registered_browsers(registry_dir)
+
+    result = reap_orphans(registry_dir, timeout=1)
+    assert (result['browsers'], result['processes']) == (1, 2)
+    assert result['reclaimed_mb'] > 0
+    assert fake_browser.wait(timeout=5) is not None
+    assert not browser.is_running() or browser.status() == psutil.STATUS_ZOMBIE
+    assert registered_browsers(registry_dir) == []
+
+
+def test_entries_of_exited_browsers_and_corrupt_files_are_dropped(fake_browser, tmp_path):
+    registry_dir = str(tmp_path)
+    entry = register_as_orphan(FakeDriver(fake_browser), registry_dir)
+    # 先結束「Chrome」讓 sh 收回後自行結束，不留下殭屍程序
+    psutil.Process(entry['browser_pids'][0]).kill()
+    fake_browser.wait(timeout=5)
+    with open(os.path.join(registry_dir, '1.json'), 'w', encoding='utf-8') as f:
+        f.write('{')
+
+    assert reap_orphans(registry_dir, timeout=1)['browsers'] == 0
+    assert os.listdir(registry_dir) == []
@@ -0,0 +1,57 @@
+import json
+
+from bookplanet.catalogue_db import CatalogueDB
+from bookplanet.progress import ProgressStore
+from bookplanet.sheets import plan_isbn_updates
+
+
+def make_batch(tmp_path, name='zh_books_1_80.json', start_page=1):
+    return {'lang_code': '1', 'start_page': start_page, 'end_page': start_page + 1,
+            'progress_file': str(tmp_path / name)}
+
+
+def test_resync_removes_rows_imported_from_legacy_progress(tmp_path):
+    batch = make_batch(tmp_path)
+    with open(batch['progress_file'], 'w', encoding='utf-8') as f:
+        json.dump([{'name': '過期書名', 'isbn': '9789573317241'}, {'name': '改版書', 'isbn': '9789573317241'}], f,
+                  ensure_ascii=False)
+    catalogue = CatalogueDB(str(tmp_path / 'catalogue.sqlite3'))
+    catalogue.sync_batches([batch])
+    assert catalogue.find_by_name('過期書名')[0]['page'] == -1
+
+    store = ProgressStore(batch['progress_file'])
+    store.record_page(1, [{'name': '改版書', 'isbn': '9789861371955'}])
+    store.record_page(2, [{'name': '其他', 'isbn': '9789570851991'}])
+    store.close()
+    catalogue.sync_batches([batch])
+
+    assert catalogue.find_by_name('過期書名') == []
+    assert [match['page'] for match in catalogue.find_by_name('改版書')] == [1]
+    records = [{'書名': '改版書', 'ISBN': '9789573317241'}]
+    assert catalogue.plan_isbn_updates(records) == [
+        {'row': 2, 'name': '改版書', 'old': '9789573317241', 'new': '9789861371955'}]
+    catalogue.close()
+
+
+def test_sheet_diff_query_matches_in_memory_plan(tmp_path):
+    batches = [make_batch(tmp_path, 'a.json', 1), make_batch(tmp_path, 'b.json', 3)]
+    pages = {
+        ('a.json', 1): [{'name': '甲', 'isbn': '111'}, {'name': '乙', 'isbn': '222'}],
+        ('a.json', 2): [{'name': '甲', 'isbn': '333'}],
+        ('b.json', 3): [{'name': '丙', 'isbn': '444'}, {'name': '乙', 'isbn': '555'}],
+    }
+    all_books = []
+    for (name, page), rows in pages.items():
+        store = ProgressStore(str(tmp_path / name))
+        store.record_page(page, rows)
+        store.close()
+        all_books.extend(rows)
+    catalogue = CatalogueDB(str(tmp_path / 'catalogue.sqlite3'))
+    catalogue.sync_batches(batches)
+
+    records = [{'書名': '甲', 'ISBN': '333'}, {'書名': '乙', 'ISBN': '222'}, {'書名': '丙', 'ISBN': ' 000 '},
+               {'書名': '丁', 'ISBN': '999'}, {'書名': '乙'}]  # 格式有誤的列略過
+    assert catalogue.plan_isbn_updates(records) == plan_isbn_updates(records, all_books)
+    # 沒有變動時再次同步不會改寫任何頁面
+    assert catalogue.sync_batches(batches) == 0
+    catalogue.close()
@@ -0,0 +1,68 @@
+import gzip
+import hashlib
+
+import pytest
+
+from bookplanet.columnar import (META_OVERFLOW, META_X, ColumnarWriter, decode_catalogue, decode_columns,
+                                 load_catalogue)
+
+
+def encode(books):
+    writer = ColumnarWriter()
+    for book in books:
+        writer.add(book)
+    return writer
+
+
+def test_round_trip_keeps_every_isbn_form():
+    books = [
+        {'書名': '小王子', '適合對象': '國小', 'ISBN': '9789861371955'},
+        {'書名': '前導零', '適合對象': '國中', 'ISBN': '0306406152'},
+        {'書名': '結尾 X', '適合對象': '國小', 'ISBN': '080442957X'},
+        {'書名': '前導零且結尾 X', '適合對象': '', 'ISBN': '000000001X'},
+        {'書名': '超過 15 位數', '適合對象': '國中', 'ISBN': '97895708519912345'},
+        {'書名': '非數字', '適合對象': '國中', 'ISBN': 'N/A'},
+        {'書名': '空白', '適合對象': '國小', 'ISBN': ''},
+    ]
+    writer = encode(books)
+    assert list(writer.meta[4:6]) == [META_OVERFLOW, META_OVERFLOW]
+    assert writer.meta[2] == 10 | META_X
+    assert decode_catalogue(writer.to_bytes()) == books
+
+
+def test_names_with_newlines_do_not_shift_rows():
+    writer = encode([{'書名': '第一行\n第二行', '適合對象': '國小', 'ISBN': '9789861371955'},
+                     {'書名': '下一本', '適合對象': '國小', 'ISBN': '9789570851991'}])
+    columns = decode_columns(writer.to_bytes())
+    assert columns['書名'] == ['第一行 第二行', '下一本']
+    assert columns['ISBN'] == ['9789861371955', '9789570851991']
+
+
+def test_empty_catalogue():
+    assert decode_columns(encode([]).to_bytes()) == {'書名': [], '適合對象': [], 'ISBN': []}
+
+
+def test_write_gzip_is_deterministic_and_returns_uncompressed_hash(tmp_path):
+    books = [{'書名': '小王子', '適合對象': '國小', 'ISBN': '9789861371955'}]
+    first, second = str(tmp_path / 'a.bin.gz'), str(tmp_path / 'b.bin.gz')
+    digest = encode(books).write(first)
+    assert encode(books).write(second) == digest
+    with open(first, 'rb') as f:
+        data = f.read()
+    with open(second, 'rb') as f:
+        assert f.read() == data
+    assert hashlib.sha256(gzip.decompress(data)).hexdigest() == digest
+    assert load_catalogue(first) == books
+
+
+def test_too_many_audiences_is_rejected():
+    writer = ColumnarWriter()
+    for i in range(256):
+        writer.add({'書名': str(i), '適合對象': str(i), 'ISBN': ''})
+    with pytest.raises(ValueError):
+        writer.add({'書名': '第 257 種', '適合對象': '第 257 種', 'ISBN': ''})
+
+
+def test_decode_rejects_other_formats():
+    with pytest.raises(ValueError):
+        decode_columns(b'NOPE' + bytes(12))
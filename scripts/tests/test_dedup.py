@@ -0,0 +1,28 @@
+import pytest
+
+from bookplanet.dedup import BookIndex, book_key, dedup_books
+from bookplanet.isbn import normalize_isbn, parse_isbn
+
+
+@pytest.mark.parametrize('raw', [
+    '978-0-306-40615-7', ' 979 10 90636 07 1 ', '0-8044-2957-x', '9.789573317241E+12', 9789573317241, 'N/A', None,
+])
+def test_normalize_isbn_matches_audit_value(raw):
+    # 去重的鍵與 IsbnAudit 檢查後寫入的 ISBN 必須相同
+    assert normalize_isbn(raw) == parse_isbn(raw)['value']
+
+
+def test_audited_and_raw_isbn_share_one_key():
+    # 同一本書先以科學記號、後以檢查過的值出現，只保留第一筆
+    raw = {'name': '測試書', 'isbn': '9.789573317241E+12'}
+    audited = {'name': raw['name'], 'isbn': parse_isbn(raw['isbn'])['value']}
+    assert book_key(raw['name'], raw['isbn']) == book_key(' 測試書 ', audited['isbn'])
+    assert dedup_books([raw, audited]) == [raw]
+
+
+def test_book_index_ignores_hyphens_and_case():
+    index = BookIndex([{'name': '書', 'isbn': '0-8044-2957-x'}])
+    assert {'name': '書', 'isbn': '080442957X'} in index
+    assert not index.add('書', '080442957x')
+    assert index.add('另一本書', '080442957X')
+    assert len(index) == 2
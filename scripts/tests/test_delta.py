@@ -0,0 +1,112 @@
+import json
+import os
+
+from bookplanet.delta import (MAX_PATCHES, CatalogueDiff, CatalogueHasher, apply_patch, catalogue_hash,
+                              columns_hash, load_manifest, patches_since, publish_delta)
+
+
+def columns(books):
+    return {key: [book[key] for book in books] for key in ('書名', '適合對象', 'ISBN')}
+
+
+OLD = [
+    {'書名': '小王子', '適合對象': '國小', 'ISBN': '9789573317241'},
+    {'書名': '已下架', '適合對象': '國中', 'ISBN': '9789861371955'},
+    {'書名': '改版書', '適合對象': '國中', 'ISBN': '9789570851991'},
+    {'書名': '改對象', '適合對象': '國小', 'ISBN': '9789863207269'},
+    {'書名': '重複書', '適合對象': '國小', 'ISBN': '9789869999998'},
+    {'書名': '重複書', '適合對象': '國小', 'ISBN': '9789869999998'},
+]
+NEW = [
+    {'書名': '重複書', '適合對象': '國小', 'ISBN': '9789869999998'},
+    {'書名': '改對象', '適合對象': '國中', 'ISBN': '9789863207269'},
+    {'書名': '小王子', '適合對象': '國小', 'ISBN': '9789573317241'},
+    {'書名': '改版書', '適合對象': '國中', 'ISBN': '9789570851992'},
+    {'書名': '新書', '適合對象': '高中', 'ISBN': '9789570000001'},
+]
+
+
+def diff(old, new):
+    catalogue = CatalogueDiff(columns(old))
+    for record in new:
+        catalogue.observe(record)
+    return catalogue.finish(), catalogue.new_hash
+
+
+def test_patch_round_trip_reproduces_new_list():
+    patch, new_hash = diff(OLD, NEW)
+    assert patch['added'] == [{'書名': '新書', '適合對象': '高中', 'ISBN': '9789570000001'}]
+    assert {row['書名'] for row in patch['removed']} == {'已下架', '重複書'}
+    assert {row['書名'] for row in patch['changed']} == {'改版書', '改對象'}
+
+    patched = apply_patch(OLD, patch)
+    assert new_hash == catalogue_hash(NEW)
+    assert catalogue_hash(patched) == new_hash
+    assert sorted(map(str, patched)) == sorted(map(str, NEW))
+
+
+def test_empty_patch_when_nothing_changed():
+    patch, new_hash = diff(OLD, list(reversed(OLD)))
+    assert patch == {'added': [], 'removed': [], 'changed': []}
+    assert new_hash == catalogue_hash(OLD)
+    assert apply_patch(OLD, patch) == OLD
+
+
+def test_manifest_chains_patches_across_versions(tmp_path):
+    delta_dir = str(tmp_path / 'delta')
+    middle = NEW[:3]
+    first, middle_hash = diff(OLD, middle)
+    publish_delta(delta_dir, first, catalogue_hash(OLD), middle_hash)
+    second, new_hash = diff(middle, NEW)
+    manifest = publish_delta(delta_dir, second, middle_hash, new_hash)
+
+    assert manifest == load_manifest(delta_dir)
+    assert manifest['version'] == 3 and manifest['sha256'] == new_hash
+    books = OLD
+    for entry in patches_since(manifest, 1):
+        with open(os.path.join(delta_dir, entry['file']), encoding='utf-8') as f:
+            books = apply_patch(books, json.load(f))
+    assert catalogue_hash(books) == new_hash
+    # 沒有對應 patch 的版本改下載整份書單
+    assert patches_since(manifest, 0) is None
+    assert patches_since(manifest, 3) == []
+
+
+
+def test_streaming_hashes_match_catalogue_hash():
+    hasher = CatalogueHasher()
+    for record in NEW:
+        hasher.observe(record)
+    assert hasher.hexdigest() == columns_hash(columns(NEW)) == catalogue_hash(list(reversed(NEW)))
+    assert catalogue_hash(OLD) != catalogue_hash(NEW)
+
+
+def test_unchanged_publish_keeps_version_and_manual_edit_restarts_chain(tmp_path):
+    delta_dir = str(tmp_path / 'delta')
+    patch, new_hash = diff(OLD, NEW)
+    manifest = publish_delta(delta_dir, patch, catalogue_hash(OLD), new_hash)
+    assert manifest['version'] == 2
+    # 內容沒有變動：不產生新版本
+    assert publish_delta(delta_dir, diff(NEW, NEW)[0], new_hash, new_hash) == manifest
+
+    # 書單被手動修改過（上一版雜湊與 manifest 不符）：舊的 patch 鏈不再可用
+    edited = NEW[:2]
+    patch, edited_hash = diff(edited, NEW[:1])
+    manifest = publish_delta(delta_dir, patch, catalogue_hash(edited), edited_hash)
+    assert manifest['version'] == 4
+    assert [entry['from'] for entry in manifest['patches']] == [3]
+    assert patches_since(manifest, 2) is None
+
+
+def test_only_the_latest_patches_are_kept(tmp_path):
+    delta_dir = str(tmp_path / 'delta')
+    books = OLD
+    for i in range(MAX_PATCHES + 2):
+        new = books + [{'書名': f'新書 {i}', '適合對象': '國小', 'ISBN': f'97895700{i:05d}'}]
+        patch, new_hash = diff(books, new)
+        manifest = publish_delta(delta_dir, patch, catalogue_hash(books), new_hash)
+        books = new
+    assert len(manifest['patches']) == MAX_PATCHES
+    assert manifest['patches'][0]['from'] == 3
+    assert not os.path.exists(os.path.join(delta_dir, 'v1-v2.json'))
+    assert sorted(os.listdir(delta_dir)) == sorted([entry['file'] for entry in manifest['patches']] + ['manifest.json'])
@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+
+from bookplanet.driver_pool import DriverPool
+
+
+class FakeDriver:
+    """只實作 DriverPool 用到的方法；沒有 service 屬性，不會寫入瀏覽器登記"""
+
+    def __init__(self, number):
+        self.number = number
+        self.healthy = True
+        self.quit_called = False
+
+    def execute_script(self, script):
+        if not self.healthy:
+            raise ConnectionError('chrome not reachable')
+        return 1
+
+    def delete_all_cookies(self):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+class DriverFactory:
+    def __init__(self):
+        self.drivers = []
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            driver = FakeDriver(len(self.drivers))
+            self.drivers.append(driver)
+        return driver
+
+
+def test_driver_is_recycled_after_max_pages():
+    factory = DriverFactory()
+    pool = DriverPool(factory, size=1, max_pages=2, max_rss_mb=0)
+    assert pool.prewarm() == 1
+    used = []
+    for _ in range(5):
+        with pool.lease() as driver:
+            used.append(driver.number)
+    assert used == [0, 0, 1, 1, 2]
+    assert pool.recycled == 2
+    assert factory.drivers[0].quit_called and factory.drivers[1].quit_called
+    pool.close()
+    assert all(driver.quit_called for driver in factory.drivers)
+
+
+def test_unhealthy_driver_is_replaced_before_lease():
+    factory = DriverFactory()
+    pool = DriverPool(factory, size=1, max_pages=0, max_rss_mb=0)
+    pool.prewarm()
+    factory.drivers[0].healthy = False
+    with pool.lease() as driver:
+        assert driver.number == 1
+    assert factory.drivers[0].quit_called
+    pool.close()
+
+
+def test_pool_never_exceeds_size():
+    factory = DriverFactory()
+    pool = DriverPool(factory, size=2, max_pages=0, max_rss_mb=0)
+    barrier = threading.Barrier(2)
+
+    def work():
+        for _ in range(5):
+            with pool.lease():
+                try:
+                    barrier.wait(timeout=0.05)
+                except threading.BrokenBarrierError:
+                    pass
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(factory.drivers) == 2
+    pool.close()
+
+
+def test_recycle_closes_idle_and_retires_leased_drivers():
+    factory = DriverFactory()
+    pool = DriverPool(factory, size=2, max_pages=0, max_rss_mb=0)
+    pool.prewarm()
+    with pool.lease() as leased:
+        assert pool.recycle() == 1  # 閒置的那一個立即關閉
+        assert not leased.quit_called
+    assert leased.quit_called  # 租借中的在歸還時關閉
+    with pool.lease() as driver:
+        assert driver.number == 2
+    pool.close()
+    with pytest.raises(RuntimeError):
+        with pool.lease():
+            pass
@@ -0,0 +1,57 @@
+from bookplanet.fingerprint import FingerprintStore, refresh_pages
+from bookplanet.progress import ProgressStore
+from bookplanet.retry import DeadLetterQueue, RetryPolicy
+
+
+class StaticFetcher:
+    """每頁回傳固定內容；fail 中的頁面一律拋出例外"""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.requested = []
+
+    def fetch_page(self, lang_code, page):
+        self.requested.append(page)
+        if page in self.fail:
+            raise ConnectionError(f'page {page} down')
+        return [{'name': f'第{page}頁', 'isbn': '9780306406157'}]
+
+
+def journal_with_gaps(tmp_path, pages, failed):
+    store = ProgressStore(str(tmp_path / 'batch.json'), compact_every=0)
+    for page in pages:
+        store.record_page(page, [{'name': f'第{page}頁', 'isbn': '9780306406157'}])
+    for page in failed:
+        store.record_failure(page, 'timeout')
+    store.close()
+    store = ProgressStore(store.progress_file)
+    store.load()
+    return store
+
+
+def test_early_stop_still_fetches_missing_and_failed_pages(tmp_path):
+    store = journal_with_gaps(tmp_path, [page for page in range(1, 12) if page != 8], failed=[8])
+    fingerprints = FingerprintStore(str(tmp_path / 'fingerprints.json'))
+    fetcher = StaticFetcher()
+
+    changed, checked = refresh_pages(fetcher, store, fingerprints, '1', range(1, 13), stop_after=3,
+                                     policy=RetryPolicy(max_attempts=1))
+    store.close()
+
+    # 第 1-3 頁未變動就不再檢查已抓過的頁面，但先前失敗的第 8 頁與缺少的第 12 頁仍要抓
+    assert fetcher.requested == [1, 2, 3, 8, 12]
+    assert (changed, checked) == (2, 5)
+    assert ProgressStore(store.progress_file).missing_pages(1, 12) == []
+
+
+def test_pages_still_failing_stay_missing_for_next_run(tmp_path):
+    store = journal_with_gaps(tmp_path, range(1, 5), failed=[])
+    fingerprints = FingerprintStore(str(tmp_path / 'fingerprints.json'))
+    dead_letters = DeadLetterQueue()
+
+    refresh_pages(StaticFetcher(fail=[6]), store, fingerprints, '1', range(1, 7), stop_after=2,
+                  policy=RetryPolicy(max_attempts=1, base_delay=0), dead_letters=dead_letters)
+    store.close()
+
+    assert len(dead_letters) == 1
+    assert ProgressStore(store.progress_file).missing_pages(1, 6) == [6]
@@ -0,0 +1,49 @@
+import pytest
+
+from bookplanet.http_fetcher import HttpBookFetcher, PageParseError, parse_book_list_html
+from bookplanet.mock_server import MockBookListServer, render_page
+
+ROWS = [{'name': '小王子', 'isbn': '9789573317241'}, {'name': '<夜>&霧', 'isbn': '9789861371955'}]
+
+
+def test_parses_rendered_table_rows():
+    books, keys = parse_book_list_html(render_page(ROWS).decode('utf-8'))
+    assert books == ROWS
+    assert keys is None
+
+
+def test_skips_short_rows_and_template_cells():
+    html = ('<table><thead><tr><th>書名</th></tr></thead><tbody>'
+            '<tr><td>只有一欄</td></tr>'
+            '<tr><td> 書 <br>名 </td><td></td><td></td><td> 9789573317241 </td></tr>'
+            '<tr><td>{{item.BookName}}</td><td></td><td></td><td>9789861371955</td></tr>'
+            '<tr><td>沒有 ISBN</td><td></td><td></td><td></td></tr>'
+            '</tbody></table>')
+    books, _ = parse_book_list_html(html)
+    assert books == [{'name': '書 名', 'isbn': '9789573317241'}]
+
+
+def test_template_page_reads_inline_json():
+    books, keys = parse_book_list_html(render_page(ROWS, render_delay=0).decode('utf-8'))
+    assert books == ROWS
+    assert keys == ('BookName', 'ISBN')
+
+
+def test_template_without_data_returns_keys():
+    books, keys = parse_book_list_html(render_page(ROWS, render_delay=0, json_endpoint=True).decode('utf-8'))
+    assert books == []
+    assert keys == ('BookName', 'ISBN')
+
+
+def test_page_without_table_rows_raises():
+    with pytest.raises(PageParseError):
+        parse_book_list_html('<html><body><p>維護中</p></body></html>')
+
+
+def test_template_page_falls_back_to_json_url():
+    with MockBookListServer({('1', 1): ROWS}, render_delay=0, json_endpoint=True) as server:
+        with HttpBookFetcher(base_url=server.base_url) as fetcher:
+            with pytest.raises(PageParseError):
+                fetcher.fetch_page('1', 1)
+        with HttpBookFetcher(base_url=server.base_url, json_url=server.json_url) as fetcher:
+            assert fetcher.fetch_page('1', 1) == ROWS
@@ -0,0 +1,82 @@
+import pytest
+
+from bookplanet.isbn import (STATUS_CHECKSUM, STATUS_EAN, STATUS_EMPTY, STATUS_FORMAT, STATUS_OK, STATUS_SCIENTIFIC,
+                             IsbnAudit, ean13_check_digit, isbn10_check_digit, isbn10_to_13, isbn13_to_10,
+                             parse_isbn)
+
+
+@pytest.mark.parametrize('raw, value, isbn13', [
+    ('9780306406157', '9780306406157', '9780306406157'),
+    ('978-0-306-40615-7', '9780306406157', '9780306406157'),
+    (' 979 10 90636 07 1 ', '9791090636071', '9791090636071'),
+    ('0306406152', '0306406152', '9780306406157'),
+    ('0-8044-2957-x', '080442957X', '9780804429573'),
+])
+def test_valid_isbn10_and_isbn13(raw, value, isbn13):
+    info = parse_isbn(raw)
+    assert info['status'] == STATUS_OK
+    assert info['value'] == value
+    assert info['isbn13'] == isbn13
+
+
+@pytest.mark.parametrize('raw, status', [
+    ('9780306406158', STATUS_CHECKSUM),
+    ('0306406153', STATUS_CHECKSUM),
+    ('4006381333931', STATUS_EAN),        # 檢查碼正確但不是 978/979 開頭
+    ('9.78627E+12', STATUS_SCIENTIFIC),   # Excel 轉成科學記號
+    ('97803064061', STATUS_FORMAT),
+    ('', STATUS_EMPTY),
+    (None, STATUS_EMPTY),
+])
+def test_invalid_and_suspect_codes(raw, status):
+    info = parse_isbn(raw)
+    assert info['status'] == status
+    assert info['isbn13'] is None
+
+
+def test_isbn10_and_isbn13_conversion_round_trip():
+    assert isbn10_to_13('080442957X') == '9780804429573'
+    assert isbn13_to_10('9780804429573') == '080442957X'
+    # 979 開頭沒有對應的 ISBN-10
+    assert isbn13_to_10('9791090636071') is None
+
+
+def test_audit_normalizes_rows_and_keeps_raw_value():
+    audit = IsbnAudit()
+    rows = audit.normalize_rows([{'name': '甲', 'isbn': '978-0-306-40615-7'},
+                                 {'name': '乙', 'isbn': '9780306406158'}])
+    assert rows == [{'name': '甲', 'isbn': '9780306406157', 'isbn_raw': '978-0-306-40615-7'},
+                    {'name': '乙', 'isbn': '9780306406158'}]
+    assert (audit.total, audit.invalid, audit.suspect) == (2, 1, 0)
+
+
+def test_check_digits():
+    assert isbn10_check_digit('030640615') == '2'
+    assert isbn10_check_digit('080442957') == 'X'
+    assert ean13_check_digit('978030640615') == '7'
+    assert ean13_check_digit('400638133393') == '1'
+
+
+@pytest.mark.parametrize('raw, value', [
+    ('9.78627E+12', '9786270000000'),          # 位數已遺失，補零
+    ('9.789573317241E+12', '9789573317241'),   # 位數完整，可還原
+    ('9.7895733172415E+12', '9789573317242'),  # 小數位數多於指數時四捨五入
+    ('9.789573317241e+12', '9789573317241'),
+])
+def test_scientific_notation_is_expanded_but_flagged(raw, value):
+    info = parse_isbn(raw)
+    assert info['value'] == value
+    assert info['status'] == STATUS_SCIENTIFIC
+
+
+def test_audit_summary_counts_every_row_and_keeps_distinct_examples():
+    audit = IsbnAudit(max_examples=2)
+    for raw in ['9780306406157', '9780306406157', 'N/A', 'N/A', '123', '4006381333931', '']:
+        audit.check(raw)
+    summary = audit.summary()
+    assert summary['total'] == 7
+    assert summary['by_status'] == {STATUS_OK: 2, STATUS_FORMAT: 3, STATUS_EAN: 1, STATUS_EMPTY: 1}
+    assert (summary['invalid'], summary['suspect']) == (4, 1)
+    # 相同原始值只列一次，每種狀態最多 max_examples 個
+    assert summary['examples'][STATUS_FORMAT] == ['N/A', '123']
+    assert STATUS_OK not in summary['examples']
@@ -0,0 +1,52 @@
+import random
+
+from bookplanet.lookup_index import build_lookup_index, lookup, match_candidates
+
+
+def linear_lookup(isbns, candidate):
+    """index.html 原本的 Array.find：書單中第一本完全相同、只差檢查碼或互相包含（長度差 ≤ 2）的書"""
+    for row, digits in enumerate(isbns):
+        if not digits:
+            continue
+        if digits == candidate:
+            return row
+        if len(digits) == len(candidate) and digits[:-1] == candidate[:-1]:
+            return row
+        if (candidate in digits or digits in candidate) and abs(len(digits) - len(candidate)) <= 2:
+            return row
+    return None
+
+
+def test_earlier_book_wins_over_later_exact_match():
+    # 第 0 本只差檢查碼、第 1 本完全相同：線性比對取第 0 本，索引也必須如此
+    index = build_lookup_index(['9789573317240', '9789573317241'])
+    assert lookup(index, '9789573317241') == 0
+
+
+def test_contained_matches_follow_list_order():
+    index = build_lookup_index(['11978957331724199', '978957331724', '9789573317241'])
+    # 候選碼被第 0 本包含（長 2 碼），也包含第 1 本（短 1 碼），又與第 2 本相同
+    assert lookup(index, '978957331724199') == 0
+    assert lookup(index, '9789573317241') == 1
+
+
+def test_alias_only_when_no_candidate_matches_by_original_rules():
+    index = build_lookup_index(['9789861371955', '9780306406157'])
+    # ISBN-10 0306406152 只能以別名找到第 1 本
+    assert match_candidates(index, ['0306406152']) == (1, '0306406152')
+    # 後面的候選碼以原本的規則找得到時，不因前一個候選碼的別名而改變結果
+    assert match_candidates(index, ['0306406152', '9789861371955']) == (0, '9789861371955')
+    assert match_candidates(index, ['12345678']) == (None, None)
+
+
+def test_index_matches_linear_lookup():
+    rng = random.Random(7)
+    isbns = [f'978{rng.randrange(10 ** 4):04d}{rng.randrange(10 ** 6):06d}' for _ in range(300)]
+    isbns += [isbn[:-1] for isbn in isbns[:20]] + [isbn + '12' for isbn in isbns[20:40]] + ['']
+    rng.shuffle(isbns)
+    index = build_lookup_index(isbns)
+    candidates = [rng.choice([isbn for isbn in isbns if isbn]) for _ in range(300)]
+    candidates += [isbn[:-1] + str((int(isbn[-1]) + 1) % 10) for isbn in candidates[:100]]
+    candidates += [isbn + '99' for isbn in candidates[:50]] + ['97800000000000']
+    for candidate in candidates:
+        assert lookup(index, candidate) == linear_lookup(isbns, candidate), candidate
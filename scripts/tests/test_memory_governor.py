@@ -0,0 +1,94 @@
+import pytest
+
+from bookplanet import memory_governor
+from bookplanet.memory_governor import MemoryGovernor
+
+
+class FakeRss:
+    """以可修改的數值取代實際 RSS；(Python, 子程序) 兩部分相加即為控管的總和"""
+
+    def __init__(self, python_mb, children_mb=0.0):
+        self.python_mb = python_mb
+        self.children_mb = children_mb
+
+    def __call__(self):
+        return self.python_mb, self.children_mb
+
+
+@pytest.fixture
+def rss(monkeypatch):
+    fake = FakeRss(500.0)
+    monkeypatch.setattr(memory_governor, 'process_rss_mb', fake)
+    return fake
+
+
+def test_below_soft_limit_runs_nothing(rss):
+    governor = MemoryGovernor(soft_mb=1000, hard_mb=2000, interval=0)
+    called = []
+    governor.add_action('recycle', lambda: called.append('recycle'))
+    governor.checkpoint()
+    assert called == [] and governor.events == []
+
+
+def test_actions_run_in_order_until_below_soft_limit(rss):
+    governor = MemoryGovernor(soft_mb=1000, hard_mb=2000, interval=0)
+    rss.python_mb, rss.children_mb = 700.0, 600.0
+    governor.sample()  # 相當於背景執行緒的取樣
+    called = []
+
+    def nothing_to_release():
+        called.append('flush')
+        return False
+
+    def recycle_browser():
+        called.append('recycle')
+        rss.children_mb = 100.0
+
+    governor.add_action('flush', nothing_to_release)
+    governor.add_action('recycle', recycle_browser, '回收瀏覽器')
+    governor.add_action('never', lambda: called.append('never'))
+    governor.checkpoint()
+
+    # 回傳 False 的動作不記錄，降回軟上限後不再執行後面的動作
+    assert called == ['flush', 'recycle']
+    assert [(event['action'], event['before_mb'], event['after_mb']) for event in governor.events] == [
+        ('recycle', 1300.0, 800.0)]
+    assert governor.peak_mb == 1300.0
+
+    governor.remove_action('recycle')
+    assert [name for name, _, _ in governor._actions] == ['flush', 'never']
+
+
+def test_pause_above_hard_limit_until_memory_drops(rss, monkeypatch):
+    governor = MemoryGovernor(soft_mb=1000, hard_mb=1500, interval=0.01, pause_timeout=5)
+    rss.python_mb = 1800.0
+    governor.sample()
+    samples = []
+
+    def drop_after_three(seconds):
+        samples.append(seconds)
+        if len(samples) == 3:
+            rss.python_mb = 1200.0
+
+    monkeypatch.setattr(memory_governor.time, 'sleep', drop_after_three)
+    governor.checkpoint()
+    assert len(samples) == 3
+    assert governor.events[-1]['action'] == 'pause'
+    assert governor.events[-1]['after_mb'] == 1200.0
+    assert not governor._gave_up
+
+
+def test_gives_up_pausing_until_back_below_hard_limit(rss):
+    governor = MemoryGovernor(soft_mb=1000, hard_mb=1500, interval=0.01, pause_timeout=0.05)
+    rss.python_mb = 1800.0
+    governor.sample()
+    governor.checkpoint()
+    assert governor._gave_up
+    pauses = len(governor.events)
+
+    # 已放棄時不再暫停；降回硬上限以下後恢復控管
+    governor.checkpoint()
+    assert len(governor.events) == pauses
+    rss.python_mb = 1200.0
+    governor.checkpoint()
+    assert not governor._gave_up
@@ -0,0 +1,70 @@
+import json
+import pickle
+
+from bookplanet.metrics import NULL_METRICS, RunMetrics, percentile
+
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.50) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 0.99) == 99
+    assert percentile([7], 0.99) == 7
+    assert percentile([], 0.5) is None
+
+
+def test_page_stages_and_counters_go_into_report(tmp_path):
+    report_path = str(tmp_path / 'reports' / 'run.jsonl')
+    metrics = RunMetrics(report_path=report_path, rss_interval=0)
+    metrics.page_started()
+    with metrics.timer('driver.get'):
+        pass
+    metrics.record('extract', 0.25)
+    metrics.record('extract', 0.25)
+    metrics.page_done('1', 3, rows=20, retries=2)
+    metrics.page_started()
+    metrics.page_done('1', 4, ok=False)
+    summary = metrics.close()
+
+    assert summary['counters'] == {'pages_ok': 1, 'pages_failed': 1, 'rows': 20, 'retries': 2}
+    assert summary['rows_per_page'] == 20
+    assert summary['stages']['extract'] == {'count': 2, 'total': 0.5, 'p50': 0.25, 'p95': 0.25, 'p99': 0.25}
+    assert summary['stages']['page']['count'] == 2
+
+    with open(report_path, encoding='utf-8') as f:
+        events = [json.loads(line) for line in f]
+    assert [event['type'] for event in events] == ['run_start', 'page', 'page', 'rss', 'run_end']
+    page = events[1]
+    assert (page['lang'], page['page'], page['rows'], page['retries'], page['ok']) == ('1', 3, 20, 2, True)
+    # 每頁的明細只包含該頁期間的計時
+    assert set(page['stages']) == {'driver.get', 'extract'}
+    assert page['stages']['extract'] == 0.5
+    assert events[2]['stages'] == {}
+    assert events[-1]['counters'] == summary['counters']
+
+
+def test_worker_snapshot_merges_into_coordinator():
+    worker = RunMetrics(rss_interval=0)
+    worker.record('page', 0.1)
+    worker.count('pages_ok')
+    worker.count('rows', 20)
+    snapshot = pickle.loads(pickle.dumps(worker.snapshot()))
+
+    coordinator = RunMetrics(rss_interval=0)
+    coordinator.record('page', 0.3)
+    coordinator.count('pages_ok')
+    coordinator.merge(snapshot)
+    coordinator.merge(snapshot)
+    summary = coordinator.summary()
+    assert summary['counters'] == {'pages_ok': 3, 'rows': 40}
+    assert summary['stages']['page']['count'] == 3
+    assert summary['stages']['page']['p50'] == 0.1
+
+
+def test_null_metrics_accepts_every_call():
+    with NULL_METRICS.timer('stage'):
+        NULL_METRICS.record('stage', 1.0)
+        NULL_METRICS.count('pages_ok')
+    NULL_METRICS.page_started()
+    NULL_METRICS.page_done('1', 1, rows=20)
+    NULL_METRICS.merge({'stages': {}, 'counters': {}})
@@ -0,0 +1,143 @@
+import json
+
+from bookplanet.progress import ProgressStore
+
+
+def write_legacy(path, books):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(books, f, ensure_ascii=False)
+
+
+def test_legacy_file_is_used_until_pages_are_journaled(tmp_path):
+    progress_file = str(tmp_path / 'zh_books_1_80.json')
+    write_legacy(progress_file, [{'name': '舊書', 'isbn': '9789573317241'}])
+
+    store = ProgressStore(progress_file)
+    assert store.load() == [{'name': '舊書', 'isbn': '9789573317241'}]
+    assert list(ProgressStore(progress_file).iter_rows()) == [{'name': '舊書', 'isbn': '9789573317241'}]
+    # 舊版進度沒有頁碼，所有頁面都要重抓
+    assert store.missing_pages(1, 2) == [1, 2]
+
+
+def test_full_crawl_after_legacy_file_drops_stale_rows(tmp_path):
+    progress_file = str(tmp_path / 'zh_books_1_80.json')
+    write_legacy(progress_file, [{'name': '已下架', 'isbn': '9789573317241'},
+                                 {'name': '新書', 'isbn': '9789861371955'}])
+
+    store = ProgressStore(progress_file)
+    store.load()
+    store.record_page(1, [{'name': '新書', 'isbn': '9789861371955'}])
+    # 有了逐頁紀錄後，尚未關檔前的讀取也不再包含舊版資料
+    assert store.books() == [{'name': '新書', 'isbn': '9789861371955'}]
+    store.record_page(2, [{'name': '另一本', 'isbn': '9789570851991'}])
+    store.close()
+
+    expected = [{'name': '新書', 'isbn': '9789861371955'}, {'name': '另一本', 'isbn': '9789570851991'}]
+    reloaded = ProgressStore(progress_file)
+    assert reloaded.load() == expected
+    assert [page for page, _ in reloaded.entries()] == [1, 2]
+    assert list(ProgressStore(progress_file).iter_rows()) == expected
+    with open(reloaded.path, encoding='utf-8') as f:
+        assert '已下架' not in f.read()
+
+
+def test_legacy_entry_left_in_journal_is_ignored_once_pages_exist(tmp_path):
+    # 舊版本留下的日誌：page=null 的舊資料後面接著逐頁紀錄，尚未壓縮
+    progress_file = str(tmp_path / 'en_books.json')
+    store = ProgressStore(progress_file)
+    with open(store.path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'page': None, 'count': 1, 'ok': True, 'ts': 1.0,
+                            'rows': [{'name': 'Stale', 'isbn': '9780000000002'}]}) + '\n')
+        f.write(json.dumps({'page': 1, 'count': 1, 'ok': True, 'ts': 2.0,
+                            'rows': [{'name': 'Fresh', 'isbn': '9780306406157'}]}) + '\n')
+
+    assert list(ProgressStore(progress_file).iter_rows()) == [{'name': 'Fresh', 'isbn': '9780306406157'}]
+    assert store.load() == [{'name': 'Fresh', 'isbn': '9780306406157'}]
+    with open(store.path, encoding='utf-8') as f:
+        assert 'Stale' not in f.read()
+
+
+def write_pages(store, pages, torn=None):
+    """寫入完整的頁面，torn 為 (頁碼, 保留的字元數) 時再附加一行寫到一半的殘行"""
+    with open(store.path, 'w', encoding='utf-8') as f:
+        for page in pages:
+            f.write(json.dumps({'page': page, 'count': 1, 'ok': True, 'ts': float(page),
+                                'rows': [{'name': f'第{page}頁', 'isbn': '9780306406157'}]}, ensure_ascii=False) + '\n')
+        if torn:
+            page, keep = torn
+            line = json.dumps({'page': page, 'count': 1, 'ok': True, 'ts': float(page),
+                               'rows': [{'name': f'第{page}頁', 'isbn': '9780306406157'}]}, ensure_ascii=False)
+            f.write(line[:keep] if keep is not None else line)
+
+
+def test_torn_last_line_is_not_counted_as_done(tmp_path):
+    store = ProgressStore(str(tmp_path / 'batch.json'))
+    write_pages(store, [1, 2], torn=(3, 40))
+    assert store.missing_pages(1, 4) == [3, 4]
+    assert [row['name'] for row in ProgressStore(store.progress_file).iter_rows()] == ['第1頁', '第2頁']
+
+
+def test_complete_json_without_newline_is_still_torn(tmp_path):
+    # 寫到最後的 } 才中斷：內容能解析，但之後的附加會接在同一行
+    store = ProgressStore(str(tmp_path / 'batch.json'))
+    write_pages(store, [1, 2], torn=(3, None))
+    assert store.missing_pages(1, 3) == [3]
+    assert store.load() == [{'name': '第1頁', 'isbn': '9780306406157'}, {'name': '第2頁', 'isbn': '9780306406157'}]
+
+
+def test_append_after_torn_tail_truncates_it(tmp_path):
+    store = ProgressStore(str(tmp_path / 'batch.json'), compact_every=0)
+    write_pages(store, [1, 2], torn=(3, 40))
+    store.record_page(3, [{'name': '第3頁', 'isbn': '9780306406157'}])
+    store.record_page(4, [{'name': '第4頁', 'isbn': '9780306406157'}])
+
+    # 每筆附加後都已 flush，尚未壓縮前的檔案內容也要完整
+    with open(store.path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert [json.loads(line)['page'] for line in lines] == [1, 2, 3, 4]
+    store.close()
+    reloaded = ProgressStore(store.progress_file)
+    assert reloaded.missing_pages(1, 4) == []
+    assert [row['name'] for row in reloaded.load()] == ['第1頁', '第2頁', '第3頁', '第4頁']
+
+
+def test_torn_line_merged_with_next_append_is_refetched(tmp_path):
+    # 修正前的版本會把下一筆直接接在殘行後面：兩頁都無法解析，都要重抓
+    store = ProgressStore(str(tmp_path / 'batch.json'))
+    write_pages(store, [1], torn=(2, 30))
+    with open(store.path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'page': 3, 'count': 0, 'ok': True, 'ts': 3.0, 'rows': []}) + '\n')
+    assert store.missing_pages(1, 3) == [2, 3]
+
+
+def test_resume_keeps_successful_page_over_later_failure(tmp_path):
+    store = ProgressStore(str(tmp_path / 'batch.json'), compact_every=0)
+    store.record_failure(1, 'timeout')
+    assert store.failed_pages() == [1]
+    store.record_page(1, [{'name': '甲', 'isbn': '9780306406157'}])
+    store.record_failure(1, 'timeout')
+    store.record_page(2, [{'name': '乙', 'isbn': '9780306406157'}])
+    store.close()
+
+    reloaded = ProgressStore(store.progress_file)
+    assert reloaded.failed_pages() == []
+    assert reloaded.missing_pages(1, 3) == [3]
+    assert reloaded.page_rows(1) == [{'name': '甲', 'isbn': '9780306406157'}]
+    # close() 壓縮後每頁只剩一行
+    with open(reloaded.path, encoding='utf-8') as f:
+        assert len(f.read().splitlines()) == 2
+
+
+def test_page_status_reads_only_line_heads(tmp_path, monkeypatch):
+    store = ProgressStore(str(tmp_path / 'batch.json'), compact_every=0)
+    store.record_page(1, [{'name': '書名含 {"page": 9} 的書', 'isbn': '9780306406157'}] * 20)
+    store.record_failure(2, 'HTTP 503 {"page": 2}')
+    store.record_page(3, [])
+    store.close()
+
+    def no_json(*args, **kwargs):
+        raise AssertionError('page_status 不應解析整行')
+
+    # 書籍列與錯誤訊息中的引號已轉義，不會被當成第二個紀錄開頭
+    monkeypatch.setattr('bookplanet.progress.json.loads', no_json)
+    assert ProgressStore(store.progress_file).page_status() == {1: (20, True), 2: (0, False), 3: (0, True)}
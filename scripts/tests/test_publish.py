@@ -0,0 +1,66 @@
+import json
+import os
+import time
+
+from bookplanet.columnar import columnar_path_for, export_books_list, load_books_list_columns, load_catalogue
+from bookplanet.delta import catalogue_hash, delta_dir_for, load_manifest
+from bookplanet.lookup_index import index_path_for
+from bookplanet.progress import ProgressStore
+from bookplanet.publish import publish_books_list
+
+
+def publish(tmp_path, pages):
+    progress_file = str(tmp_path / 'batch.json')
+    store = ProgressStore(progress_file)
+    for page, rows in enumerate(pages, 1):
+        store.record_page(page, rows)
+    store.close()
+    out_path = str(tmp_path / 'data' / 'books_list.json')
+    publish_books_list([progress_file], out_path)
+    with open(out_path, encoding='utf-8') as f:
+        books = json.load(f)
+    with open(index_path_for(out_path), encoding='utf-8') as f:
+        index = json.load(f)
+    return out_path, books, index
+
+
+def test_index_records_hash_of_published_list(tmp_path):
+    out_path, books, index = publish(tmp_path, [[{'name': '小王子', 'isbn': '9789861371955'}],
+                                                [{'name': '海底兩萬里', 'isbn': '978-957-08-5199-1'}]])
+    assert index['count'] == len(books) == 2
+    assert index['sha256'] == catalogue_hash(books)
+    # 欄式書單與 JSON 出自同一次發佈，前端以索引的列數與雜湊驗證
+    assert load_catalogue(columnar_path_for(out_path)) == books
+
+
+def test_index_hash_matches_delta_manifest_after_republish(tmp_path):
+    publish(tmp_path, [[{'name': '小王子', 'isbn': '9789861371955'}]])
+    out_path, books, index = publish(tmp_path, [[{'name': '小王子', 'isbn': '9789861371955'}],
+                                                [{'name': '新書', 'isbn': '9789570851991'}]])
+    assert load_manifest(delta_dir_for(out_path))['sha256'] == index['sha256'] == catalogue_hash(books)
+
+
+def test_previous_columns_ignore_stale_columnar_file(tmp_path):
+    out_path, books, _ = publish(tmp_path, [[{'name': '小王子', 'isbn': '9789861371955'}]])
+    assert load_books_list_columns(out_path)['ISBN'] == ['9789861371955']
+
+    # 只更新了 JSON（例如手動轉檔或 checkout），欄式書單的 mtime 仍比較新
+    books[0]['ISBN'] = '9789570851991'
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(books, f, ensure_ascii=False)
+    os.utime(columnar_path_for(out_path), (time.time() + 60, time.time() + 60))
+    assert load_books_list_columns(out_path)['ISBN'] == ['9789570851991']
+
+
+def test_export_records_columnar_hash_in_index(tmp_path):
+    out_path, books, _ = publish(tmp_path, [[{'name': '小王子', 'isbn': '9789861371955'}]])
+    books.append({'書名': '新書', '適合對象': '', 'ISBN': '9789570851991'})
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(books, f, ensure_ascii=False)
+    assert load_books_list_columns(out_path)['ISBN'] == ['9789861371955', '9789570851991']
+
+    export_books_list(out_path)
+    with open(index_path_for(out_path), encoding='utf-8') as f:
+        index = json.load(f)
+    assert index['count'] == 2 and index['bin_sha256'] and index['json_sha256']
+    assert load_catalogue(columnar_path_for(out_path)) == books
@@ -0,0 +1,140 @@
+import pytest
+
+from bookplanet.metrics import RunMetrics
+
+from bookplanet.progress import ProgressStore
+from bookplanet.retry import (CircuitBreaker, DeadLetterQueue, RetryExhausted, RetryPolicy, is_retryable,
+                              retry_into_journals)
+from bookplanet.scheduler import PageScheduler
+
+
+class HttpError(Exception):
+    def __init__(self, status):
+        super().__init__(f'HTTP {status}')
+        self.response = type('Response', (), {'status_code': status})()
+
+
+class FlakyFetcher:
+    """前 failures[page] 次抓取拋出 ConnectionError，之後回傳一列"""
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.calls = []
+
+    def fetch_page(self, lang_code, page):
+        self.calls.append(page)
+        if self.failures.get(page, 0) > 0:
+            self.failures[page] -= 1
+            raise ConnectionError(f'page {page} down')
+        return [{'name': f'第{page}頁', 'isbn': '9780306406157'}]
+
+    def close(self):
+        pass
+
+
+def quick_policy(max_attempts=3, threshold=0):
+    return RetryPolicy(max_attempts=max_attempts, base_delay=0, breaker=CircuitBreaker(threshold=threshold))
+
+
+def test_policy_retries_until_success():
+    fetcher = FlakyFetcher({1: 2})
+    rows, retries = quick_policy().call(lambda: fetcher.fetch_page('1', 1))
+    assert retries == 2 and len(rows) == 1
+
+
+def test_policy_gives_up_after_max_attempts():
+    fetcher = FlakyFetcher({1: 5})
+    with pytest.raises(RetryExhausted) as exhausted:
+        quick_policy().call(lambda: fetcher.fetch_page('1', 1))
+    assert exhausted.value.attempts == 3
+    assert fetcher.calls == [1, 1, 1]
+
+
+def test_client_errors_are_not_retried():
+    assert not is_retryable(HttpError(404))
+    assert is_retryable(HttpError(429)) and is_retryable(HttpError(503))
+
+    def not_found():
+        raise HttpError(404)
+
+    with pytest.raises(RetryExhausted) as exhausted:
+        quick_policy().call(not_found)
+    assert exhausted.value.attempts == 1
+
+
+def test_backoff_doubles_up_to_max_delay():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0, jitter=0)
+    assert [policy.backoff(attempt) for attempt in range(1, 5)] == [1.0, 2.0, 4.0, 5.0]
+
+
+def test_breaker_opens_after_consecutive_server_errors_and_resets():
+    breaker = CircuitBreaker(threshold=2, cooldown=60)
+    breaker.record_failure(HttpError(404))  # 4xx 不計入
+    breaker.record_failure(ConnectionError())
+    assert not breaker.is_open
+    breaker.record_failure(HttpError(500))
+    assert breaker.is_open and breaker.cooldown == 120
+    breaker.record_success()
+    assert breaker.failures == 0 and breaker.cooldown == 60
+
+
+def test_dead_letters_are_written_back_to_their_journal(tmp_path):
+    progress_file = str(tmp_path / 'batch.json')
+    dead_letters = DeadLetterQueue()
+    dead_letters.add('1', 3, 'timeout', progress_file=progress_file)
+    dead_letters.add('1', 4, 'timeout', progress_file=progress_file)
+    fetcher = FlakyFetcher({4: 10})
+
+    recovered = retry_into_journals(dead_letters, fetcher, quick_policy(max_attempts=1))
+
+    assert recovered == [{'name': '第3頁', 'isbn': '9780306406157'}]
+    assert len(dead_letters) == 1
+    store = ProgressStore(progress_file)
+    assert store.completed_pages() == {3: 1}
+    assert store.failed_pages() == [4]
+
+
+def test_scheduler_yields_every_job_with_rows_or_error():
+    scheduler = PageScheduler(lambda: FlakyFetcher({2: 10}), workers=3, rate=0, policy=quick_policy(max_attempts=2))
+    results = {page: (rows, error) for _, page, rows, error in scheduler.run([('1', page) for page in range(1, 6)])}
+    assert sorted(results) == [1, 2, 3, 4, 5]
+    assert results[2][0] is None and isinstance(results[2][1], ConnectionError)
+    assert all(results[page][0] == [{'name': f'第{page}頁', 'isbn': '9780306406157'}] for page in (1, 3, 4, 5))
+
+
+def test_jitter_only_shortens_the_delay():
+    policy = RetryPolicy(base_delay=1.0, max_delay=8.0, jitter=0.5, seed=1)
+    for attempt in range(1, 6):
+        delay = policy.backoff(attempt)
+        ceiling = min(8.0, 2 ** (attempt - 1))
+        assert ceiling * 0.5 <= delay <= ceiling
+
+
+def test_open_breaker_holds_the_next_call():
+    policy = RetryPolicy(max_attempts=1, base_delay=0, breaker=CircuitBreaker(threshold=1, cooldown=0.05))
+    metrics = RunMetrics(rss_interval=0)
+    with pytest.raises(RetryExhausted):
+        policy.call(lambda: FlakyFetcher({1: 1}).fetch_page('1', 1), metrics=metrics)
+    assert policy.breaker.is_open and policy.breaker.opened == 1
+
+    rows, retries = policy.call(lambda: FlakyFetcher().fetch_page('1', 2), metrics=metrics)
+    assert retries == 0 and len(rows) == 1
+    assert not policy.breaker.is_open and policy.breaker.cooldown == 0.05
+    assert metrics.summary()['stages']['breaker.wait']['total'] > 0
+
+
+def test_failed_dead_letters_keep_their_context(capsys):
+    dead_letters = DeadLetterQueue()
+    dead_letters.add('1', 7, 'timeout', progress_file='/tmp/zh_books_1_80.json', batch='中文 1-80')
+    failures = []
+    recovered = dead_letters.retry(FlakyFetcher({7: 10}).fetch_page, quick_policy(max_attempts=1),
+                                   on_failure=lambda letter, error: failures.append(letter['page']))
+    assert recovered == 0 and failures == [7]
+    letter = dead_letters.drain()[0]
+    assert letter['batch'] == '中文 1-80' and letter['error'] == 'page 7 down'
+
+    dead_letters.add('1', 7, 'page 7 down', progress_file='/tmp/zh_books_1_80.json')
+    dead_letters.add('2', 1, 'HTTP 503')
+    dead_letters.print_summary()
+    output = capsys.readouterr().out
+    assert 'zh_books_1_80.json：第 7 頁' in output and '語言代碼 2：第 1 頁' in output
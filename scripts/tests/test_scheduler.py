@@ -0,0 +1,84 @@
+import threading
+import time
+
+from bookplanet.retry import CircuitBreaker, RetryPolicy
+from bookplanet.scheduler import HostLimiter, PageScheduler, TokenBucket
+
+
+class SlowFetcher:
+    """每頁睡 delay 秒，記錄同時進行中的最大請求數"""
+
+    created = []
+
+    def __init__(self, tracker, delay=0.02):
+        self.tracker = tracker
+        self.delay = delay
+        self.closed = False
+        SlowFetcher.created.append(self)
+
+    def fetch_page(self, lang_code, page):
+        with self.tracker['lock']:
+            self.tracker['active'] += 1
+            self.tracker['peak'] = max(self.tracker['peak'], self.tracker['active'])
+        time.sleep(self.delay)
+        with self.tracker['lock']:
+            self.tracker['active'] -= 1
+        return [{'name': f'{lang_code}-{page}', 'isbn': '9780306406157'}]
+
+    def close(self):
+        self.closed = True
+
+
+def new_tracker():
+    return {'lock': threading.Lock(), 'active': 0, 'peak': 0}
+
+
+def test_token_bucket_paces_requests_after_burst():
+    bucket = TokenBucket(rate=20, capacity=2)
+    started = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    # 前 2 個來自累積的 token，其餘 4 個以每秒 20 個補充
+    assert time.monotonic() - started >= 4 / 20 * 0.9
+
+
+def test_token_bucket_without_rate_never_waits():
+    bucket = TokenBucket(rate=0)
+    started = time.monotonic()
+    for _ in range(1000):
+        bucket.acquire()
+    assert time.monotonic() - started < 0.1
+
+
+def test_host_limiter_caps_concurrent_requests():
+    limiter = HostLimiter(2)
+    tracker = new_tracker()
+    fetcher = SlowFetcher(tracker)
+
+    def work():
+        with limiter.slot('read.tn.edu.tw'):
+            fetcher.fetch_page('1', 1)
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert tracker['peak'] == 2
+
+
+def test_scheduler_fetches_every_job_with_one_fetcher_per_worker():
+    SlowFetcher.created = []
+    tracker = new_tracker()
+    jobs = [('1', page) for page in range(1, 13)] + [('2', 1)]
+    policy = RetryPolicy(max_attempts=1, base_delay=0, breaker=CircuitBreaker(threshold=0))
+    scheduler = PageScheduler(lambda: SlowFetcher(tracker), workers=3, rate=0, max_per_host=2, policy=policy)
+
+    results = {(lang_code, page): rows for lang_code, page, rows, error in scheduler.run(jobs)}
+
+    assert sorted(results) == sorted(jobs)
+    assert all(rows[0]['name'] == f'{lang_code}-{page}' for (lang_code, page), rows in results.items())
+    # 每個工作執行緒第一次抓取時建立自己的 fetcher，結束後全部關閉；同一主機最多 2 個請求同時進行
+    assert 1 <= len(SlowFetcher.created) <= 3
+    assert all(fetcher.closed for fetcher in SlowFetcher.created)
+    assert tracker['peak'] <= 2
@@ -0,0 +1,26 @@
+from bookplanet.metrics import RunMetrics
+from bookplanet.mock_server import MockBookListServer
+from bookplanet.sharding import MemoryBudget, crawl_sharded
+
+
+def test_worker_metrics_are_merged_into_run_summary(tmp_path):
+    pages = {('1', page): [{'name': f'第{page}頁第{row}本', 'isbn': f'978{page:05d}{row:05d}'} for row in range(3)]
+             for page in range(1, 6)}
+    batch = {'name': '測試批次', 'lang_code': '1', 'start_page': 1, 'end_page': 5,
+             'progress_file': str(tmp_path / 'batch.json')}
+    metrics = RunMetrics(rss_interval=0)
+
+    with MockBookListServer(pages) as server:
+        options = {'engine': 'http', 'base_url': server.base_url, 'rate': 0, 'max_attempts': 1}
+        books, = crawl_sharded([batch], options, processes=2, shard_pages=2, memory_budget=MemoryBudget(1, reserve_mb=0),
+                               metrics=metrics)
+
+    summary = metrics.summary()
+    assert len(books) == 15
+    # 各頁由工作程序計數一次，列數與各階段耗時併回協調程序
+    assert summary['counters']['pages_ok'] == 5
+    assert summary['counters']['rows'] == 15
+    assert summary['rows_per_page'] == 3
+    assert summary['stages']['page']['count'] == 5
+    assert summary['stages']['http.get']['count'] == 5
+    assert summary['stages']['shard']['count'] == 3
@@ -0,0 +1,86 @@
+from bookplanet.sheets import plan_isbn_updates, update_sheet
+
+
+class FakeSpreadsheet:
+    id = 'spreadsheet'
+
+    def __init__(self):
+        self.revision = 1
+
+    def get_lastUpdateTime(self):
+        return f'2026-01-01T00:00:0{self.revision}Z'
+
+
+class FakeSheet:
+    """只有書名與 ISBN 兩欄的工作表，每次寫入或 edit 都會推進修改時間"""
+
+    id = 0
+
+    def __init__(self, rows):
+        self.spreadsheet = FakeSpreadsheet()
+        self.rows = [list(row) for row in rows]
+        self.reads = 0
+        self.render_options = []
+
+    def row_values(self, row):
+        return ['書名', 'ISBN']
+
+    def batch_get(self, ranges, **kwargs):
+        self.reads += 1
+        self.render_options.append(kwargs.get('value_render_option'))
+        return [[[row[0]] for row in self.rows], [[row[1]] for row in self.rows]]
+
+    def batch_update(self, data, **kwargs):
+        for item in data:
+            self.rows[int(item['range'][1:]) - 2][1] = item['values'][0][0]
+        self.spreadsheet.revision += 1
+
+    def edit(self, row, isbn):
+        self.rows[row - 2][1] = isbn
+        self.spreadsheet.revision += 1
+
+
+def test_snapshot_after_write_does_not_hide_concurrent_edits(tmp_path):
+    snapshot = str(tmp_path / 'sheet_snapshot.json')
+    books = [{'name': '甲', 'isbn': '111'}, {'name': '乙', 'isbn': '222'}]
+    sheet = FakeSheet([('甲', '000'), ('乙', '222')])
+    original_update = sheet.batch_update
+
+    def update_after_someone_else(data, **kwargs):
+        sheet.edit(3, '999')  # 讀取後、寫入前有人改了乙的 ISBN
+        original_update(data, **kwargs)
+
+    sheet.batch_update = update_after_someone_else
+    changes = update_sheet(sheet, books, snapshot_file=snapshot, fuzzy=False)
+    assert [change['row'] for change in changes] == [2]
+
+    sheet.batch_update = original_update
+    changes = update_sheet(sheet, books, snapshot_file=snapshot, fuzzy=False)
+    assert sheet.reads == 2
+    assert changes == [{'row': 3, 'name': '乙', 'old': '999', 'new': '222'}]
+
+
+def test_unchanged_sheet_uses_snapshot(tmp_path):
+    snapshot = str(tmp_path / 'sheet_snapshot.json')
+    books = [{'name': '甲', 'isbn': '111'}]
+    sheet = FakeSheet([('甲', '111')])
+    assert update_sheet(sheet, books, snapshot_file=snapshot, fuzzy=False) == []
+    assert update_sheet(sheet, books, snapshot_file=snapshot, fuzzy=False) == []
+    assert sheet.reads == 1
+
+
+def test_numeric_cells_are_read_unformatted_and_compared_as_text(tmp_path):
+    # UNFORMATTED_VALUE 時數字 ISBN 以數字回傳，不會是 9.78957E+12 之類的顯示格式
+    books = [{'name': '甲', 'isbn': '9789573317241'}, {'name': '1984', 'isbn': '9789573317586'}]
+    sheet = FakeSheet([('甲', 9789573317241), (1984, 9789573317000.0)])
+    changes = update_sheet(sheet, books, snapshot_file=None, fuzzy=False)
+    assert sheet.render_options == ['UNFORMATTED_VALUE']
+    assert changes == [{'row': 3, 'name': '1984', 'old': '9789573317000', 'new': '9789573317586'}]
+
+
+def test_malformed_record_is_skipped_without_aborting(capsys):
+    records = [{'書名': '甲', 'ISBN': '000'}, {'書名': '乙'}, {'書名': '丙', 'ISBN': '000'}]
+    books = [{'name': '甲', 'isbn': '111'}, {'name': '乙', 'isbn': '222'}, {'name': '丙', 'isbn': '333'}]
+    changes = plan_isbn_updates(records, books)
+    assert [change['row'] for change in changes] == [2, 4]
+    assert '第 3 列' in capsys.readouterr().out
@@ -0,0 +1,123 @@
+import random
+
+import pytest
+
+from bookplanet.sheets import index_books_by_name, plan_fuzzy_updates
+from bookplanet.title_match import (AUTO_SCORE, REPORT_SCORE, TitleIndex, classify_match, normalize_title,
+                                   title_grams)
+
+BOOKS = [
+    {'name': '哈利波特1：神秘的魔法石', 'isbn': '9789573317241'},
+    {'name': '哈利波特2：消失的密室', 'isbn': '9789573317586'},
+    {'name': '小王子', 'isbn': '9789861371955'},
+    {'name': '海底兩萬里', 'isbn': '9789570851991'},
+    {'name': '海底兩萬哩', 'isbn': '9789863207269'},
+]
+
+
+@pytest.mark.parametrize('title, expected', [
+    ('《小王子》', '小王子'),
+    ('[中學生]小王子', '小王子'),
+    ('【推薦】 小 王 子！', '小王子'),
+    ('哈利波特１：神秘的魔法石', '哈利波特1神秘的魔法石'),
+    ('The Little Prince', 'thelittleprince'),
+    ('[小王子]', '小王子'),  # 整個書名都在括號裡時保留
+])
+def test_normalize_title(title, expected):
+    assert normalize_title(title) == expected
+
+
+def test_search_ranks_normalized_exact_title_first():
+    index = TitleIndex(BOOKS)
+    score, book = index.search('《小王子》')[0]
+    assert score == 1.0 and book['isbn'] == '9789861371955'
+    assert index.search('完全無關的書') == []
+
+
+def test_search_keeps_first_of_duplicate_normalized_titles():
+    index = TitleIndex(BOOKS + [{'name': '小王子。', 'isbn': '9780000000002'}])
+    assert len(index) == len(BOOKS)
+    assert index.search('小王子')[0][1]['isbn'] == '9789861371955'
+
+
+def test_classify_accepts_unique_close_match():
+    index = TitleIndex(BOOKS)
+    candidates = index.search('[中學生]小王子')
+    assert classify_match('[中學生]小王子', candidates) == (True, None)
+
+
+def test_classify_rejects_different_volume_number():
+    index = TitleIndex(BOOKS)
+    title = '哈利波特3：神秘的魔法石'
+    candidates = index.search(title)
+    # 分數夠高也不採用集數不同的候選
+    accepted, reason = classify_match(title, candidates, auto_score=candidates[0][0])
+    assert not accepted and '數字' in reason
+
+
+def test_classify_rejects_ambiguous_candidates():
+    index = TitleIndex(BOOKS)
+    title = '海底兩萬裡'
+    candidates = index.search(title)
+    # 兩個候選分數相同，差距小於 MIN_MARGIN
+    accepted, _ = classify_match(title, candidates, auto_score=0.5)
+    assert not accepted
+
+
+def test_classify_rejects_below_auto_score():
+    index = TitleIndex(BOOKS)
+    candidates = index.search('海底兩')
+    assert REPORT_SCORE <= candidates[0][0] < AUTO_SCORE
+    accepted, reason = classify_match('海底兩', candidates)
+    assert not accepted and '低於' in reason
+
+
+def test_plan_fuzzy_updates_auto_fixes_and_reports():
+    records = [
+        {'書名': '《小王子》', 'ISBN': '123'},             # 正規化後相同：自動修正
+        {'書名': '哈利波特3：神秘的魔法石', 'ISBN': ''},    # 集數不同：只列出
+        {'書名': '海底兩萬哩', 'ISBN': '9789863207269'},   # 書名完全相同：不經模糊比對
+        {'書名': '毫不相干', 'ISBN': ''},                  # 沒有候選
+    ]
+    review = []
+    changes = plan_fuzzy_updates(records, index_books_by_name(BOOKS), review)
+    assert [(change['row'], change['new']) for change in changes] == [(2, '9789861371955')]
+    assert [item['row'] for item in review] == [3]
+    # 提高自動修正門檻到 1.0 以上時全部改為人工確認
+    review = []
+    assert plan_fuzzy_updates(records, index_books_by_name(BOOKS), review, auto_score=1.01) == []
+    assert [item['row'] for item in review] == [2, 3]
+
+
+def test_title_grams_of_short_titles():
+    assert title_grams('') == set()
+    assert title_grams('書') == {'書'}
+    assert title_grams('小王子') == {'小王', '王子'}
+
+
+def test_search_matches_brute_force_dice():
+    # 與逐本計算 Dice 係數的線性掃描比較：分數與排序（同分時先出現的書優先）相同
+    rng = random.Random(7)
+    alphabet = '小王子海底兩萬里哈利波特魔法石'
+    books = [{'name': ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 8))), 'isbn': str(i)}
+             for i in range(300)]
+    index = TitleIndex(books)
+    for _ in range(50):
+        title = ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 6)))
+        grams = title_grams(title)
+        expected = []
+        for book in index.books:
+            other = title_grams(normalize_title(book['name']))
+            shared = len(grams & other)
+            if shared:
+                exact = normalize_title(book['name']) == title
+                expected.append((-2 * shared / (len(grams) + len(other)), not exact, int(book['isbn']), book))
+        expected = [(-score, book) for score, _, _, book in sorted(expected)[:5]]
+        assert index.search(title, k=5) == expected
+
+
+def test_classify_accepts_close_candidate_with_same_isbn():
+    candidates = [(0.95, {'name': '小王子', 'isbn': '9789861371955'}),
+                  (0.94, {'name': '小王子（新版）', 'isbn': '9789861371955'})]
+    assert classify_match('小王子', candidates) == (True, None)
+    assert classify_match('小王子', []) == (False, '沒有候選')
@@ -67,6 +67,7 @@ function Test-JsonFiles {
     $jsonFiles = @(
         "config/scan_config.json",
         "data/books_list.json",
+        "data/books_list.index.json",
         "data/messages.json",
         "data/stats.json"
     )
@@ -61,6 +61,7 @@ validate_json_files() {
     local json_files=(
         "config/scan_config.json"
         "data/books_list.json"
+        "data/books_list.index.json"
         "data/messages.json"
         "data/stats.json"
     )